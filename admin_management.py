@@ -1,4 +1,15 @@
 #!/usr/bin/env python
+"""
+Admin management for the ROI Calculator.
+
+Run without arguments for the interactive menu. For bulk changes pass an
+operation and read usernames (one per line) from stdin:
+
+    python admin_management.py grant-unlimited < usernames.txt
+    python admin_management.py reset-calculations alice bob
+    python admin_management.py reset-calculations --all
+"""
+import argparse
 import os
 import sys
 import django
@@ -10,6 +21,7 @@ django.setup()
 
 from django.contrib.auth.models import User
 from calculator.models import ROIResult, Payment, UserCalculationLimit
+from calculator import user_limits
 
 class AdminManager:
     """Admin management class for ROI Calculator"""
@@ -54,30 +66,29 @@ class AdminManager:
     
     def grant_unlimited_access(self, username):
         """Grant unlimited access to a user"""
-        try:
-            user = User.objects.get(username=username)
-            user_limit, created = UserCalculationLimit.objects.get_or_create(user=user)
-            user_limit.unlimited_access = True
-            user_limit.unlimited_access_purchased_at = datetime.now()
-            user_limit.save()
-            print(f"✅ Granted unlimited access to {username}")
-            return True
-        except User.DoesNotExist:
+        if not User.objects.filter(username=username).exists():
             print(f"❌ User {username} not found")
             return False
+        user_limits.grant_unlimited_access(user_limits.users_by_username([username]))
+        print(f"✅ Granted unlimited access to {username}")
+        return True
     
     def reset_user_calculations(self, username):
         """Reset calculation count for a user"""
-        try:
-            user = User.objects.get(username=username)
-            user_limit, created = UserCalculationLimit.objects.get_or_create(user=user)
-            user_limit.full_calculations_used = 0
-            user_limit.save()
-            print(f"✅ Reset calculation count for {username}")
-            return True
-        except User.DoesNotExist:
+        if not User.objects.filter(username=username).exists():
             print(f"❌ User {username} not found")
             return False
+        user_limits.reset_calculations(user_limits.users_by_username([username]))
+        print(f"✅ Reset calculation count for {username}")
+        return True
+    
+    def grant_unlimited_access_bulk(self, usernames):
+        """Grant unlimited access to many users, one UPDATE per batch of usernames"""
+        return run_bulk(user_limits.grant_unlimited_access, usernames)
+    
+    def reset_user_calculations_bulk(self, usernames):
+        """Reset calculation counts for many users, one UPDATE per batch of usernames"""
+        return run_bulk(user_limits.reset_calculations, usernames)
     
     def create_test_user(self, username, email, password='test123'):
         """Create a test user for demonstration"""
@@ -182,8 +193,66 @@ class AdminManager:
             else:
                 print("❌ Invalid choice. Please try again.")
 
+BULK_OPERATIONS = {
+    'grant-unlimited': user_limits.grant_unlimited_access,
+    'reset-calculations': user_limits.reset_calculations,
+}
+
+
+def run_bulk(operation, usernames, batch_size=user_limits.BATCH_SIZE):
+    """Apply a user_limits operation to usernames in batches.
+
+    Returns (matched users, updated rows, unknown usernames).
+    """
+    matched = updated = 0
+    unknown = []
+    for batch in user_limits.batched(usernames, batch_size):
+        users = user_limits.users_by_username(batch)
+        found = set(users.values_list('username', flat=True))
+        unknown.extend(name for name in batch if name not in found)
+        matched += len(found)
+        updated += operation(users)
+    return matched, updated, unknown
+
+
+def read_usernames(stream):
+    for line in stream:
+        username = line.strip()
+        if username:
+            yield username
+
+
+def run_cli(argv):
+    """Non-interactive bulk mode."""
+    parser = argparse.ArgumentParser(description='Bulk calculation-limit operations.')
+    parser.add_argument('operation', choices=sorted(BULK_OPERATIONS))
+    parser.add_argument('usernames', nargs='*', help='Usernames; read from stdin when omitted.')
+    parser.add_argument('--all', action='store_true', help='Apply to every user.')
+    parser.add_argument('--batch-size', type=int, default=user_limits.BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    operation = BULK_OPERATIONS[args.operation]
+    if args.all:
+        updated = operation(User.objects.all())
+        print(f"✅ {args.operation}: {updated} limit rows updated")
+        return 0
+
+    usernames = args.usernames or read_usernames(sys.stdin)
+    matched, updated, unknown = run_bulk(operation, usernames, args.batch_size)
+    print(f"✅ {args.operation}: {matched} users matched, {updated} limit rows updated")
+    if unknown:
+        shown = ', '.join(unknown[:10])
+        more = f" (+{len(unknown) - 10} more)" if len(unknown) > 10 else ""
+        print(f"❌ {len(unknown)} unknown usernames: {shown}{more}", file=sys.stderr)
+        return 1
+    return 0
+
+
 def main():
     """Main function"""
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
     print("🚀 Starting ROI Calculator Admin Management...")
     admin_manager = AdminManager()
     
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Time to evaluate N scenarios through the API: one request per scenario against one batch request.
+
+Against a scratch database, with token authentication:
+
+- "per scenario": POST calculations/ once per scenario (validation,
+  calculate_roi, one INSERT and a serializer per call)
+- "batch": one POST to calculate/batch/ (column checks, the NumPy
+  formulas and a streamed response), with and without ``save``
+- "ingest": one NDJSON upload to calculations/ingest/ (per-line
+  validation, one transaction per API_INGEST_BATCH_SIZE lines)
+
+    python benchmarks/bench_api_batch.py --scenarios 10000 --single 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+
+
+def configure(workdir):
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.CHATBOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.HOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+    settings.SQL_OBSERVER_ENABLED = False
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def scenarios(count):
+    from calculator.api.serializers import INPUT_BOUNDS
+
+    rng = random.Random(0)
+    return [
+        {name: rng.randint(int(low), int(high)) if whole else round(rng.uniform(low, high), 2)
+         for name, (low, high, whole) in INPUT_BOUNDS.items()}
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', type=int, default=10_000)
+    parser.add_argument('--single', type=int, default=200, help='Scenarios to time one request at a time.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir)
+
+        from django.contrib.auth.models import User
+        from django.test import Client
+        from rest_framework.authtoken.models import Token
+
+        user = User.objects.create(username='benchmark', is_staff=True)
+        client = Client(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        batch = scenarios(args.scenarios)
+
+        start = time.perf_counter()
+        for scenario in batch[:args.single]:
+            response = client.post('/api/v1/calculations/', scenario, content_type='application/json')
+            assert response.status_code == 201, response.content
+        single_ms = (time.perf_counter() - start) * 1000 / args.single
+
+        rows = [('per scenario', single_ms * args.scenarios)]
+        for save in (False, True):
+            start = time.perf_counter()
+            response = client.post(
+                '/api/v1/calculate/batch/', {'scenarios': batch, 'save': save}, content_type='application/json'
+            )
+            body = b''.join(response.streaming_content)
+            rows.append((f'batch{" + save" if save else ""}', (time.perf_counter() - start) * 1000))
+            assert json.loads(body)['count'] == args.scenarios
+
+        start = time.perf_counter()
+        response = client.post(
+            '/api/v1/calculations/ingest/', '\n'.join(json.dumps(scenario) for scenario in batch),
+            content_type='application/x-ndjson',
+        )
+        summary = json.loads(b''.join(response.streaming_content).splitlines()[-1])['summary']
+        rows.append(('ingest', (time.perf_counter() - start) * 1000))
+        assert summary == {'created': args.scenarios}, summary
+
+    print(f'{args.scenarios} scenarios ("per scenario" extrapolated from {args.single} requests)')
+    print(f'{"":<16}{"total ms":>12}{"us/scenario":>13}')
+    for name, total_ms in rows:
+        print(f'{name:<16}{total_ms:>12.1f}{total_ms * 1000 / args.scenarios:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
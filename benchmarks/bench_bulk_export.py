@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Reports/sec of the bulk ZIP export against the number of worker processes.
+
+Uses unsaved in-memory results and bypasses the PDF cache, so only
+rendering and archiving are measured. Pool start-up is excluded by
+warming each pool before timing.
+
+    python benchmarks/bench_bulk_export.py --reports 200 --workers 0 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from calculator.bulk_export import ReportExporter
+from calculator.models import ROIResult
+
+
+def sample_results(count):
+    user = User(id=1, username='benchmark')
+    results = []
+    for index in range(count):
+        result = ROIResult(
+            id=index + 1, user=user, mode='full', timestamp=timezone.now(),
+            annual_revenue=100_000_000 + index, gross_margin=80, container_app_fraction=90,
+            annual_cloud_spend=10_000_000, compute_spend_fraction=60, cost_sensitive_fraction=50,
+            num_engineers=100, engineer_cost_per_year=150_000, ops_time_fraction=15,
+            ops_toil_fraction=50, toil_reduction_fraction=45, avg_response_time_sec=2,
+            exec_time_influence_fraction=33, lat_red_container=28, lat_red_serverless=50,
+            revenue_lift_per_100ms=1, current_fci_fraction=2, fci_reduction_fraction=75,
+            cost_per_1pct_fci=1,
+            cloud_savings=1_410_000, productivity_gain=506_250, performance_gain=1_627_440,
+            availability_gain=1_200_000, total_annual_gain=4_743_690, roi_percent=31.5,
+            payback_months=0.3,
+        )
+        results.append(result)
+    return results
+
+
+def run(workers, results):
+    exporter = ReportExporter(workers=workers, use_cache=False)
+    try:
+        if workers:
+            # Start every worker (and its Django import) before timing.
+            for _ in exporter.stream_zip(results[:workers]):
+                pass
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in exporter.stream_zip(results))
+        elapsed = time.perf_counter() - start
+    finally:
+        exporter.close()
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    results = sample_results(args.reports)
+    print(f'{args.reports} reports, {os.cpu_count()} CPUs')
+    print(f'{"workers":>8} {"seconds":>9} {"reports/s":>10} {"speedup":>8} {"zip MB":>7}')
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        elapsed, size = run(workers, results)
+        rate = args.reports / elapsed
+        baseline = baseline or rate
+        print(f'{workers:>8} {elapsed:>9.2f} {rate:>10.1f} {rate / baseline:>7.2f}x {size / 1e6:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Database queries and time per request for the hot-cache reads, and recomputes under a stampede.
+
+A logged-in client requests the dashboard, the history chart data and
+the payment-required page against a scratch database. "cold" clears the
+shared tier before every request, so each read goes to the database;
+"warm" serves them from the per-process tier. The stampede test starts
+``--threads`` callers at once on an expired key whose recompute takes
+``--compute-ms``, with a plain get/set and with TieredCache.
+
+    python benchmarks/bench_hot_cache.py --results 200 --requests 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+
+
+def configure(workdir):
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.CHATBOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        # As configured in settings: file-based, shared by the workers.
+        settings.HOT_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(workdir, 'hot'),
+        },
+    }
+    settings.SQL_OBSERVER_ENABLED = False
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def measure(client, path, requests, before=None):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries = [], 0
+    for _ in range(requests):
+        if before:
+            before()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (path, response.status_code)
+        queries += len(captured)
+    return queries / requests, statistics.median(timings)
+
+
+def run_pages(results, requests):
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.test import Client
+
+    from calculator.models import ROIResult
+
+    from bench_bulk_export import sample_results
+
+    user = User.objects.create(username='benchmark')
+    saved = sample_results(results)
+    for result in saved:
+        result.id = None
+        result.user = user
+    ROIResult.objects.bulk_create(saved)
+
+    client = Client()
+    client.force_login(user)
+    shared = caches[settings.HOT_CACHE_ALIAS]
+    rows = []
+    for path in ('/dashboard/', '/dashboard/history/analysis/data/?range=1y', '/dashboard/payment-required/'):
+        client.get(path)  # compile templates
+        rows.append((path, measure(client, path, requests, before=shared.clear), measure(client, path, requests)))
+    return rows
+
+
+def run_stampede(threads, compute_ms):
+    from django.core.cache import caches
+
+    from calculator.caching import TieredCache
+
+    calls = {'plain': 0, 'tiered': 0}
+    lock = threading.Lock()
+
+    def compute(name):
+        with lock:
+            calls[name] += 1
+        time.sleep(compute_ms / 1000)
+        return 'value'
+
+    def plain():
+        shared = caches['default']
+        if shared.get('plain') is None:
+            shared.set('plain', compute('plain'), 60)
+
+    tiered = TieredCache('bench', ttl=60)
+    tiered.set('key', 'value')
+    tiered.local.clear()
+    caches['default'].clear()  # a miss in both tiers
+
+    def cached():
+        tiered.get_or_set('key', lambda: compute('tiered'))
+
+    for target in (plain, cached):
+        barrier = threading.Barrier(threads)
+
+        def worker(target=target, barrier=barrier):
+            barrier.wait()
+            target()
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--results', type=int, default=200, help='Saved results for the logged-in user.')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--compute-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir)
+        rows = run_pages(args.results, args.requests)
+        calls = run_stampede(args.threads, args.compute_ms)
+
+    print(f'{args.results} saved results, {args.requests} requests per row')
+    print(f'{"path":<44}{"cold q":>8}{"cold ms":>9}{"warm q":>8}{"warm ms":>9}')
+    for path, (cold_q, cold_ms), (warm_q, warm_ms) in rows:
+        print(f'{path:<44}{cold_q:>8.2f}{cold_ms:>9.2f}{warm_q:>8.2f}{warm_ms:>9.2f}')
+    print(f'\n{args.threads} concurrent misses, {args.compute_ms:g} ms recompute')
+    print(f'recomputes: plain get/set {calls["plain"]}, TieredCache {calls["tiered"]}')
+
+
+if __name__ == '__main__':
+    main()
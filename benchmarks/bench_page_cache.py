@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Median response time of the cached pages under each caching layer.
+
+Every page is requested through the full middleware stack with Django's
+test client, against a scratch database and a local-memory cache:
+
+- "no cache": the template loader cache is emptied and the page and
+  fragment caches are off or cleared before every request
+- "loader": compiled templates are reused (the cached loader Django
+  uses whenever ``loaders`` is not configured); page and fragment
+  caches are still cold
+- "page/fragment": everything is warm. Landing and contact come from
+  the anonymous page cache; the dashboard and results pages reuse
+  their ``{% cache %}`` blocks
+
+    python benchmarks/bench_page_cache.py --results 50 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+
+LAYERS = ('no cache', 'loader', 'page/fragment')
+
+
+def configure(workdir):
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.CHATBOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.HOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+    settings.SQL_OBSERVER_ENABLED = False
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def reset_template_loaders():
+    from django.template import engines
+
+    for engine in engines.all():
+        for loader in engine.engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+def measure(client, path, repeat, before=None):
+    timings = []
+    for _ in range(repeat + 1):
+        if before:
+            before()
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (path, response.status_code)
+    # The first request only warms whatever the layer keeps.
+    return statistics.median(timings[1:])
+
+
+def run(results, repeat):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from calculator.models import ROIResult
+
+    from bench_bulk_export import sample_results
+
+    user = User.objects.create(username='benchmark')
+    saved = sample_results(results)
+    for result in saved:
+        result.id = None
+        result.user = user
+    ROIResult.objects.bulk_create(saved)
+
+    anonymous = Client()
+    member = Client()
+    member.force_login(user)
+    pages = [
+        ('landing', anonymous, '/'),
+        ('contact', anonymous, '/contact/'),
+        ('dashboard', member, '/dashboard/'),
+        ('results', member, '/dashboard/results/'),
+        ('chatbot', member, '/dashboard/chatbot/'),
+    ]
+
+    def cold():
+        reset_template_loaders()
+        cache.clear()
+
+    rows = []
+    for name, client, path in pages:
+        with override_settings(PAGE_CACHE_TTL=0):
+            timings = [measure(client, path, repeat, before=cold), measure(client, path, repeat, before=cache.clear)]
+        timings.append(measure(client, path, repeat))
+        rows.append((name, timings))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--results', type=int, default=50, help='Saved results for the logged-in user.')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir)
+        rows = run(args.results, args.repeat)
+
+    print(f'median ms per request, {args.results} saved results, {args.repeat} requests per cell')
+    print(f'{"page":<10}' + ''.join(f'{layer:>15}' for layer in LAYERS) + f'{"speedup":>9}')
+    for name, timings in rows:
+        print(f'{name:<10}' + ''.join(f'{ms:>15.2f}' for ms in timings) + f'{timings[0] / timings[-1]:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Per-report render time with and without the shared ReportLab style registry.
+
+"before" rebuilds the stylesheet, paragraph styles and table styles for
+every report, as export_pdf used to; "after" uses the process-wide
+registry from get_report_styles(). Output goes to a sink that discards
+it, so only layout and serialization are measured.
+
+    python benchmarks/bench_report_render.py --reports 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+django.setup()
+
+from calculator.reports import ReportStyles, build_result_pdf, get_report_styles
+
+from bench_bulk_export import sample_results
+
+
+class NullSink:
+    def write(self, data):
+        return len(data)
+
+
+def measure(results, styles_factory):
+    timings = []
+    sink = NullSink()
+    for result in results:
+        start = time.perf_counter()
+        build_result_pdf(result, sink, styles=styles_factory())
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=200)
+    args = parser.parse_args()
+
+    results = sample_results(args.reports)
+    # Warm up imports and font metrics so neither run pays for them.
+    build_result_pdf(results[0], NullSink())
+
+    runs = [
+        ('before', measure(results, ReportStyles)),
+        ('after', measure(results, get_report_styles)),
+    ]
+    print(f'{args.reports} reports')
+    print(f'{"":>7} {"mean ms":>8} {"p50 ms":>8} {"p95 ms":>8}')
+    for name, timings in runs:
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f'{name:>7} {statistics.mean(timings):>8.2f} {statistics.median(timings):>8.2f} {p95:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
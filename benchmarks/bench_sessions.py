@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Database queries and time per authenticated request for each SESSION_PROFILE.
+
+A logged-in client polls the export progress endpoint (the most frequent
+authenticated request) and loads the results page, against a scratch
+database. For each session engine the benchmark reports queries per
+request, how many of them touched django_session, and the median time.
+
+    python benchmarks/bench_sessions.py --requests 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+
+PROFILES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def configure(workdir):
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.CHATBOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.HOT_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        # As configured in settings: file-based, shared by the workers.
+        settings.SESSION_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(workdir, 'sessions'),
+        },
+    }
+    settings.SQL_OBSERVER_ENABLED = False
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def run(engine, user, paths, requests):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    rows = []
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.force_login(user)
+        for path in paths:
+            client.get(path)  # warm the session cache and compiled templates
+            timings, queries, session_queries = [], 0, 0
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(path)
+                    timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, (path, response.status_code)
+                queries += len(captured)
+                session_queries += sum('django_session' in query['sql'] for query in captured)
+            rows.append((path, queries / requests, session_queries / requests, statistics.median(timings)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir)
+
+        from django.contrib.auth.models import User
+
+        from calculator.bulk_export import ExportProgress
+
+        user = User.objects.create(username='benchmark')
+        ExportProgress(user.id, 'bench').update(1, 10)
+        paths = ['/dashboard/results/export-all/progress/bench/', '/dashboard/results/']
+
+        print(f'{args.requests} requests per row')
+        print(f'{"profile":<16}{"path":<48}{"queries":>8}{"session":>8}{"p50 ms":>8}')
+        for profile, engine in PROFILES.items():
+            for path, queries, session_queries, p50 in run(engine, user, paths, args.requests):
+                print(f'{profile:<16}{path:<48}{queries:>8.2f}{session_queries:>8.2f}{p50:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
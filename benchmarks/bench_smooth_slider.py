@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Per-page cost of rendering {% smooth_slider %} tags, with and without the render cache.
+
+The page holds the slider tags of the full calculator, one per input.
+"uncached" clears the LRU before every page, so each tag renders the
+compiled include template; "cached" serves every tag from the LRU after
+the first page.
+
+    python benchmarks/bench_smooth_slider.py --pages 2000
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+django.setup()
+
+from django.conf import settings
+from django.template import engines
+
+from calculator.templatetags.smooth_slider import render_slider
+
+# The full calculator's own slider tags, rendered with its default values.
+PAGE = '{% load smooth_slider %}' + ''.join(re.findall(
+    r'{% smooth_slider .*? %}',
+    (Path(settings.BASE_DIR) / 'templates' / 'calculator' / 'full_calculator.html').read_text(),
+))
+
+
+def measure(template, pages, before=None):
+    timings = []
+    for _ in range(pages):
+        if before:
+            before()
+        start = time.perf_counter()
+        template.render({'form': None})
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), statistics.quantiles(timings, n=100)[94]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000)
+    args = parser.parse_args()
+
+    template = engines.all()[0].from_string(PAGE)
+    template.render({'form': None})  # compile the include template
+
+    print(f'{PAGE.count("smooth_slider") - 1} sliders per page, {args.pages} pages')
+    print(f'{"":<10}{"p50 ms":>9}{"p95 ms":>9}')
+    uncached = measure(template, args.pages, before=render_slider.cache_clear)
+    render_slider.cache_clear()
+    cached = measure(template, args.pages)
+    for name, (p50, p95) in (('uncached', uncached), ('cached', cached)):
+        print(f'{name:<10}{p50:>9.3f}{p95:>9.3f}')
+    print(f'speedup   {uncached[0] / cached[0]:>8.1f}x')
+    print(render_slider.cache_info())
+
+
+if __name__ == '__main__':
+    main()
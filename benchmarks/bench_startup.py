@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Import-time budget for a cold ``django.setup()`` plus URL resolution.
+
+Runs a fresh interpreter under ``-X importtime``, resolves the URLconf
+(which imports every view module) and adds up the cumulative time of
+the top-level imports made after interpreter start-up. Exits with status
+1 if the total goes over ``--budget-ms`` or if any module that should
+only load on first use (Gemini SDK, ReportLab, ...) was imported.
+
+    python benchmarks/bench_startup.py --budget-ms 400 --top 15
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by particular requests; they must not load at start-up.
+LAZY_MODULES = [
+    'google.generativeai',
+    'google.protobuf',
+    'grpc',
+    'reportlab',
+    'requests',
+    'pytz',
+    'decouple',
+    'calculator.bulk_export',
+    'calculator.comparison',
+    'numpy',
+    'rest_framework.views',
+]
+
+MARKER = '--- startup begins ---'
+
+SNIPPET = f'''
+import sys
+sys.stderr.write({MARKER!r} + "\\n")
+import django
+django.setup()
+from django.urls import get_resolver, resolve
+resolve("/dashboard/")
+get_resolver().reverse_dict
+sys.stderr.write("LOADED " + " ".join(sorted(sys.modules)) + "\\n")
+'''
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+DEFAULT_BUDGET_MS = 400
+
+
+def measure():
+    """Run one cold start; return (total ms, top-level imports, own modules, loaded modules)."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='roi_calculator.settings')
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stderr.splitlines()
+    started = False
+    top_level, own, loaded = [], [], set()
+    for line in stderr:
+        if line == MARKER:
+            started = True
+            continue
+        if line.startswith('LOADED '):
+            loaded = set(line.split()[1:])
+            continue
+        match = LINE.match(line)
+        if not started or not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if not indent:
+            top_level.append((name, int(cumulative_us) / 1000))
+        if name.split('.')[0] in ('calculator', 'roi_calculator'):
+            own.append((name, int(self_us) / 1000))
+    total = sum(ms for _, ms in top_level)
+    return total, top_level, own, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the fastest of.')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    # Import timings are noisy; the fastest run is the least disturbed one.
+    total, top_level, own, loaded = min((measure() for _ in range(args.repeat)), key=lambda run: run[0])
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    report = {
+        'total_ms': round(total, 1),
+        'budget_ms': args.budget_ms,
+        'slowest_imports': [
+            {'module': name, 'ms': round(ms, 1)}
+            for name, ms in sorted(top_level, key=lambda item: -item[1])[:args.top]
+        ],
+        'project_modules': [
+            {'module': name, 'self_ms': round(ms, 1)}
+            for name, ms in sorted(own, key=lambda item: -item[1])[:args.top]
+        ],
+        'eager_lazy_modules': eager,
+    }
+    ok = total <= args.budget_ms and not eager
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f'cold django.setup() + URL resolution: {total:.1f} ms of imports (budget {args.budget_ms:.0f} ms)')
+        print('\nslowest top-level imports:')
+        for row in report['slowest_imports']:
+            print(f"  {row['ms']:>8.1f} ms  {row['module']}")
+        print('\nproject modules (self time):')
+        for row in report['project_modules']:
+            print(f"  {row['self_ms']:>8.1f} ms  {row['module']}")
+        if eager:
+            print(f'\nimported at start-up but should be lazy: {", ".join(eager)}')
+        print('\nOK' if ok else '\nOVER BUDGET' if not eager else '\nFAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,547 @@
+#!/usr/bin/env python
+"""
+In-process load test of the whole Django stack with synthetic users.
+
+Builds a throw-away SQLite database and creates ``--users`` accounts.
+Each virtual user logs in through the real login form (session cookie
+and CSRF included) and then runs a weighted mix of requests against the
+project's real WSGI or ASGI application: quick estimates, full-calculator
+POSTs, saving results, the results page, history data, PDF export and the
+chatbot.
+
+No external service is contacted. Gemini is a local HTTP stub that the
+REST backend is pointed at (``GEMINI_API_BASE_URL``). Razorpay's side
+of the payment flow is played by the harness: when a user runs out of
+free calculations it creates a payment, posts the checkout callback to
+``verify_payment`` and then delivers the ``payment.captured`` webhook.
+
+Latency percentiles and req/s are reported per endpoint as JSON, so runs
+can be diffed or plotted:
+
+    python benchmarks/loadtest.py --server wsgi --concurrency 16 --duration 20 > wsgi.json
+    python benchmarks/loadtest.py --server asgi --concurrency 16 --duration 20 > asgi.json
+
+Accounts use the MD5 password hasher unless ``--real-hasher`` is given,
+so login latency does not include PBKDF2 and setup is fast.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlencode
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+
+HOST = 'localhost'
+PASSWORD = 'load-test-password'
+
+# (endpoint, weight) for the steady-state mix
+MIX = [
+    ('quick_estimate', 20),
+    ('full_calculator', 10),
+    ('save_quick_results', 10),
+    ('results', 15),
+    ('history_analysis_data', 15),
+    ('export_pdf', 5),
+    ('chatbot_api', 10),
+]
+
+CHAT_QUESTIONS = [
+    # Answered by the FAQ index
+    'What is ROI?',
+    'How is the payback period calculated?',
+    'What does FCI mean?',
+    # Go to Gemini on first ask, then to the answer cache
+    'Should a 40 person startup move to Kubernetes?',
+    'How do spot instances change my cloud savings?',
+    'Is serverless cheaper for bursty workloads?',
+]
+
+
+class StubGemini:
+    """Local Gemini REST endpoint answering after ``latency`` seconds."""
+
+    def __init__(self, latency):
+        stub = self
+        self.latency = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                time.sleep(stub.latency)
+                payload = json.dumps({
+                    'candidates': [{'content': {'parts': [{'text': 'It depends on your workload mix.'}]}}],
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def configure(workdir, gemini_url, real_hasher):
+    """Point the project at a scratch database, local caches and the stub."""
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'loadtest.sqlite3'),
+        # Concurrent writers wait for the lock instead of failing at once.
+        'OPTIONS': {'timeout': 30, 'transaction_mode': 'IMMEDIATE'},
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        settings.CHATBOT_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'loadtest-chatbot',
+        },
+        settings.HOT_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'loadtest-hot',
+        },
+    }
+    settings.PDF_CACHE_DIR = os.path.join(workdir, 'pdf')
+    settings.SQL_OBSERVER_ENABLED = False
+    settings.GEMINI_API_KEY = 'load-test'
+    settings.CHATBOT_LLM_BACKEND = 'rest'
+    settings.GEMINI_API_BASE_URL = gemini_url
+    if not real_hasher:
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    django.setup()
+
+
+def create_users(count):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'load{index:05d}', password=password) for index in range(count)]
+    )
+    return [f'load{index:05d}' for index in range(count)]
+
+
+class Request:
+    def __init__(self, endpoint, method, path, query=None, form=None, json_body=None):
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.query = urlencode(query or {})
+        self.content_type = ''
+        self.body = b''
+        if form is not None:
+            self.content_type = 'application/x-www-form-urlencoded'
+            self.body = urlencode(form).encode()
+        elif json_body is not None:
+            self.content_type = 'application/json'
+            self.body = json.dumps(json_body).encode()
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name):
+        name = name.lower()
+        return [value for key, value in self.headers if key.lower() == name]
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def full_calculator_form(rng):
+    from calculator.forms import FullCalculatorForm
+
+    form = {}
+    for name, field in FullCalculatorForm.base_fields.items():
+        low = field.min_value if field.min_value is not None else 0
+        high = field.max_value if field.max_value is not None else field.initial * 2
+        # Jitter around the defaults the form ships with.
+        value = field.initial * rng.uniform(0.5, 1.5)
+        form[name] = int(min(max(value, low), high))
+    return form
+
+
+def session(username, rng, stop, length):
+    """One visit of a virtual user as a generator: yields Requests, receives Responses.
+
+    Logs in, makes ``length`` requests from the mix (fewer if ``stop()``
+    turns true) and logs out.
+    """
+    login_page = yield Request('login_form', 'GET', '/login/')
+    token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', login_page.body).group(1).decode()
+    yield Request('login', 'POST', '/login/', form={
+        'username': username, 'password': PASSWORD, 'csrfmiddlewaretoken': token,
+    })
+    endpoints, weights = zip(*MIX)
+    saved = []
+    for _ in range(length):
+        if stop():
+            break
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == 'quick_estimate':
+            yield Request(endpoint, 'GET', '/dashboard/quick/', query={
+                'annualRevenue': rng.randrange(1_000_000, 1_000_000_000, 1_000_000),
+                'annualCloudSpend': rng.randrange(100_000, 100_000_000, 100_000),
+                'numEngineers': rng.randrange(1, 1000),
+            })
+        elif endpoint == 'full_calculator':
+            response = yield Request(
+                endpoint, 'POST', '/dashboard/full/', form=full_calculator_form(rng),
+            )
+            if response.status == 302 and response.header('Location')[0].endswith('/payment-required/'):
+                yield from pay()
+        elif endpoint == 'save_quick_results':
+            response = yield Request(endpoint, 'POST', '/dashboard/save-quick-results/', json_body={
+                'inputs': {'annualRevenue': 100_000_000, 'annualCloudSpend': 10_000_000, 'numEngineers': 100},
+                'results': {
+                    'totalAnnualGain': 4_743_690, 'roiPercent': 31.5, 'paybackMonths': 0.3,
+                    'cloudSavings': 1_410_000, 'productivityGain': 506_250,
+                    'performanceGain': 1_627_440, 'availabilityGain': 1_200_000,
+                },
+            })
+            if response.status == 200:
+                saved.append(response.json()['result_id'])
+        elif endpoint == 'results':
+            yield Request(endpoint, 'GET', '/dashboard/results/')
+        elif endpoint == 'history_analysis_data':
+            yield Request(endpoint, 'GET', '/dashboard/history/analysis/data/', query={
+                'range': rng.choice(['10d', '1m', '2m', '3m', '6m', '1y']),
+            })
+        elif endpoint == 'export_pdf':
+            if saved:
+                yield Request(endpoint, 'GET', f'/dashboard/results/export/{rng.choice(saved)}/')
+        elif endpoint == 'chatbot_api':
+            yield Request(endpoint, 'POST', '/dashboard/chatbot/api/', json_body={
+                'message': rng.choice(CHAT_QUESTIONS),
+            })
+    yield Request('logout', 'GET', '/logout/')
+
+
+def pay():
+    """Razorpay's part of checkout: order, client callback, then webhook.
+
+    ``verify_payment`` completes the payment, so the webhook that follows
+    finds nothing pending and gets a 404, as it does in production.
+    """
+    order = yield Request('create_payment', 'POST', '/dashboard/payment/create/')
+    if order.status != 200:
+        return
+    razorpay_payment_id = f'pay_{order.json()["payment_id"].replace("-", "")[:14]}'
+    yield Request('verify_payment', 'POST', '/dashboard/payment/verify/', json_body={
+        'payment_id': order.json()['payment_id'],
+        'razorpay_payment_id': razorpay_payment_id,
+        'razorpay_signature': 'stub-signature',
+    })
+    yield Request('razorpay_webhook', 'POST', '/dashboard/payment/webhook/', json_body={
+        'event': 'payment.captured',
+        'payload': {'payment': {'entity': {'id': razorpay_payment_id, 'amount': 100}}},
+    })
+
+
+class Cookies:
+    def __init__(self):
+        self.values = {}
+
+    def update(self, response):
+        for header in response.header('Set-Cookie'):
+            cookie = SimpleCookie(header)
+            for name, morsel in cookie.items():
+                self.values[name] = morsel.value
+
+    def header(self):
+        return '; '.join(f'{name}={value}' for name, value in self.values.items())
+
+
+def _headers(request, cookies):
+    headers = [('host', HOST), ('cookie', cookies.header())]
+    if 'csrftoken' in cookies.values:
+        headers.append(('x-csrftoken', cookies.values['csrftoken']))
+    if request.content_type:
+        headers.append(('content-type', request.content_type))
+        headers.append(('content-length', str(len(request.body))))
+    return headers
+
+
+def wsgi_call(application, request, cookies):
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'PATH_INFO': request.path,
+        'QUERY_STRING': request.query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(request.body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in _headers(request, cookies):
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            environ[f'HTTP_{name.upper().replace("-", "_")}'] = value
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split()[0])
+        started['headers'] = headers
+
+    iterable = application(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return Response(started['status'], started['headers'], body)
+
+
+async def asgi_call(application, request, cookies):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': request.method,
+        'scheme': 'http',
+        'path': request.path,
+        'raw_path': request.path.encode(),
+        'query_string': request.query.encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in _headers(request, cookies)],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 0),
+    }
+    sent = False
+    status, headers, chunks = None, [], []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': request.body, 'more_body': False}
+        # Only reached if the app waits for a disconnect.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, headers
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            headers = [(name.decode(), value.decode()) for name, value in message['headers']]
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+
+    await application(scope, receive, send)
+    return Response(status, headers, b''.join(chunks))
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            if status is None or status >= 500:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, statuses, errors, elapsed):
+    def stats(values):
+        ordered = sorted(values)
+        return {
+            'count': len(ordered),
+            'rps': round(len(ordered) / elapsed, 2),
+            'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+        }
+
+    endpoints = {}
+    for endpoint in sorted(samples):
+        endpoints[endpoint] = {
+            **stats(samples[endpoint]),
+            'errors': errors.get(endpoint, 0),
+            'statuses': statuses[endpoint],
+        }
+    every = [value for values in samples.values() for value in values]
+    total = stats(every) if every else {'count': 0}
+    total['errors'] = sum(errors.values())
+    return {'elapsed_s': round(elapsed, 3), 'total': total, 'endpoints': endpoints}
+
+
+def _drive(step, recorder, cookies, generator):
+    """Run one session generator, sending each response back into it."""
+    response = None
+    while True:
+        try:
+            request = generator.send(response)
+        except StopIteration:
+            return
+        started = time.perf_counter()
+        try:
+            response = yield step(request, cookies)
+        except Exception:
+            recorder.record(request.endpoint, time.perf_counter() - started, None)
+            raise
+        recorder.record(request.endpoint, time.perf_counter() - started, response.status)
+        cookies.update(response)
+
+
+def _visit_length(rng):
+    return rng.randint(10, 30)
+
+
+def run_wsgi(usernames, concurrency, duration, seed, recorder):
+    from roi_calculator.wsgi import application
+
+    deadline = time.perf_counter() + duration
+    stop = lambda: time.perf_counter() >= deadline
+    step = lambda request, cookies: wsgi_call(application, request, cookies)
+    queue = list(usernames)
+    queue_lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while not stop():
+            # Users take turns: each visit goes to the longest-idle account.
+            with queue_lock:
+                username = queue.pop(0)
+            driver = _drive(step, recorder, Cookies(), session(username, rng, stop, _visit_length(rng)))
+            response = None
+            try:
+                while True:
+                    response = driver.send(response)
+            except StopIteration:
+                pass
+            with queue_lock:
+                queue.append(username)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+
+
+async def run_asgi(usernames, concurrency, duration, seed, recorder):
+    from roi_calculator.asgi import application
+
+    deadline = time.perf_counter() + duration
+    stop = lambda: time.perf_counter() >= deadline
+    step = lambda request, cookies: asgi_call(application, request, cookies)
+    queue = list(usernames)
+
+    async def worker(index):
+        rng = random.Random(seed + index)
+        while not stop():
+            username = queue.pop(0)
+            driver = _drive(step, recorder, Cookies(), session(username, rng, stop, _visit_length(rng)))
+            response = None
+            try:
+                while True:
+                    # The driver yields the coroutine for the next request.
+                    response = await driver.send(response)
+            except StopIteration:
+                pass
+            queue.append(username)
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--users', type=int, default=50, help='Synthetic accounts to create.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Users active at the same time (at most --users).')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of steady-state load.')
+    parser.add_argument('--gemini-latency', type=float, default=0.3, help='Seconds the Gemini stub takes.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--real-hasher', action='store_true', help='Keep the PBKDF2 password hasher.')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+    args = parser.parse_args(argv)
+    if args.concurrency > args.users:
+        parser.error('--concurrency cannot exceed --users')
+
+    stub = StubGemini(args.gemini_latency)
+    # Settings and some views print diagnostics; keep stdout for the report.
+    with tempfile.TemporaryDirectory() as workdir, redirect_stdout(sys.stderr):
+        configure(workdir, stub.url, args.real_hasher)
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        usernames = create_users(args.users)
+        recorder = Recorder()
+        started = time.perf_counter()
+        if args.server == 'wsgi':
+            run_wsgi(usernames, args.concurrency, args.duration, args.seed, recorder)
+        else:
+            asyncio.run(run_asgi(usernames, args.concurrency, args.duration, args.seed, recorder))
+        elapsed = time.perf_counter() - started
+        stub.close()
+
+    report = {
+        'config': {
+            'server': args.server, 'users': args.users, 'concurrency': args.concurrency,
+            'duration_s': args.duration, 'gemini_latency_s': args.gemini_latency, 'seed': args.seed,
+            'real_hasher': args.real_hasher, 'python': sys.version.split()[0], 'django': django.get_version(),
+        },
+        **summarize(recorder.samples, recorder.statuses, recorder.errors, elapsed),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main()
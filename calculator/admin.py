@@ -1,15 +1,145 @@
+import csv
+
 from django.contrib import admin
-from .models import ROIResult, Payment, UserCalculationLimit
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import hot_cache, user_limits
+from .models import Job, ROIResult, Payment, UserCalculationLimit
 
 # Register your models here.
 
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids exact COUNT(*) over large tables.
+
+    Unfiltered changelists use the database's row estimate (planner
+    statistics); filtered ones count at most ``count_cap`` rows. Exact
+    counts are still used while the table is small enough for them to be
+    cheap, and whenever there are no statistics: SQLite only has them
+    once ``manage.py analyze_tables`` (or the ``analyze_tables`` job) has
+    run.
+    """
+
+    exact_count_below = 10_000
+    count_cap = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_count_below:
+                return estimate
+            return queryset.count()
+        # COUNT over a LIMITed subquery stops scanning at the cap.
+        return queryset.order_by()[:self.count_cap].count()
+
+
+def estimated_row_count(model, using='default'):
+    """Row count from planner statistics, or None when there are none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table]
+            )
+        elif connection.vendor == 'sqlite':
+            # Populated by ANALYZE. Each row starts with the number of rows
+            # in the table (or, for a partial index, in the index).
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+            return max(counts) if counts else None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class ScalableChangeListMixin:
+    """Changelist settings shared by the large-table admins.
+
+    ``indexed_search_fields`` replaces the default ``icontains`` search,
+    which cannot use an index, with a prefix search written as a range
+    (``field >= term AND field < term + U+10FFFF``) that every backend can
+    answer from a B-tree index. Matching is case-sensitive.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    indexed_search_fields = ()
+    csv_export_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term or not self.indexed_search_fields:
+            return queryset, False
+        # Each field is matched in its own subquery: an OR across a join
+        # would otherwise make the planner fall back to a full scan.
+        condition = Q()
+        for field in self.indexed_search_fields:
+            matches = self.model._default_manager.filter(**{
+                f'{field}__gte': search_term, f'{field}__lt': search_term + '\U0010ffff',
+            }).values('pk')
+            condition |= Q(pk__in=matches)
+        return queryset.filter(condition), False
+
+    def get_search_fields(self, request):
+        # Non-empty so the admin shows the search box.
+        return self.indexed_search_fields
+
+    @admin.action(description='Export selected rows as CSV')
+    def export_as_csv(self, request, queryset):
+        fields = self.csv_export_fields
+        response = StreamingHttpResponse(
+            _csv_rows(fields, queryset.values_list(*fields).iterator(chunk_size=2000)),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.opts.model_name}.csv"'
+        return response
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_rows(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
 @admin.register(ROIResult)
-class ROIResultAdmin(admin.ModelAdmin):
+class ROIResultAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ['user', 'mode', 'roi_percent', 'total_annual_gain', 'payment_required', 'payment_completed', 'timestamp']
-    list_filter = ['mode', 'payment_required', 'payment_completed', 'timestamp']
-    search_fields = ['user__username', 'user__email']
+    list_filter = ['mode', 'payment_required', 'payment_completed']
+    list_select_related = ['user']
+    date_hierarchy = 'timestamp'
+    indexed_search_fields = ['user__username']
+    raw_id_fields = ['user']
     readonly_fields = ['timestamp']
     ordering = ['-timestamp']
+    csv_export_fields = [
+        'id', 'user__username', 'mode', 'timestamp', 'annual_revenue', 'annual_cloud_spend', 'num_engineers',
+        'cloud_savings', 'productivity_gain', 'performance_gain', 'availability_gain',
+        'total_annual_gain', 'roi_percent', 'payback_months', 'payment_required', 'payment_completed',
+    ]
     
     fieldsets = (
         ('User & Mode', {
@@ -34,15 +164,37 @@ class ROIResultAdmin(admin.ModelAdmin):
             'fields': ('payment_required', 'payment_completed')
         }),
     )
+    
+    actions = ['download_reports', 'export_as_csv']
+    
+    def download_reports(self, request, queryset):
+        # Imported here so loading the admin does not pull in the export pool.
+        from .bulk_export import get_exporter
+
+        results = queryset.select_related('user').order_by('user__username', '-timestamp')
+        response = StreamingHttpResponse(
+            get_exporter().stream_zip(results.iterator(chunk_size=100)),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = 'attachment; filename="ROI_Reports.zip"'
+        return response
+    download_reports.short_description = "Download PDF reports as ZIP"
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ['payment_id', 'user', 'amount', 'status', 'payment_method', 'created_at', 'paid_at']
-    list_filter = ['status', 'payment_method', 'created_at', 'paid_at']
-    search_fields = ['payment_id', 'user__username', 'user__email', 'razorpay_payment_id']
+    list_filter = ['status', 'payment_method']
+    list_select_related = ['user']
+    date_hierarchy = 'created_at'
+    indexed_search_fields = ['payment_id', 'razorpay_payment_id', 'user__username']
+    raw_id_fields = ['user']
     readonly_fields = ['payment_id', 'created_at', 'updated_at', 'paid_at']
     ordering = ['-created_at']
+    csv_export_fields = [
+        'payment_id', 'user__username', 'amount', 'currency', 'status', 'payment_method',
+        'razorpay_order_id', 'razorpay_payment_id', 'created_at', 'paid_at',
+    ]
     
     fieldsets = (
         ('Payment Info', {
@@ -56,21 +208,20 @@ class PaymentAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_as_completed', 'mark_as_failed', 'mark_as_refunded']
+    actions = ['mark_as_completed', 'mark_as_failed', 'mark_as_refunded', 'export_as_csv']
     
     def mark_as_completed(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.update(status='completed', paid_at=timezone.now())
+        updated = user_limits.mark_payments(queryset, 'completed')
         self.message_user(request, f'{updated} payments marked as completed.')
     mark_as_completed.short_description = "Mark selected payments as completed"
     
     def mark_as_failed(self, request, queryset):
-        updated = queryset.update(status='failed')
+        updated = user_limits.mark_payments(queryset, 'failed')
         self.message_user(request, f'{updated} payments marked as failed.')
     mark_as_failed.short_description = "Mark selected payments as failed"
     
     def mark_as_refunded(self, request, queryset):
-        updated = queryset.update(status='refunded')
+        updated = user_limits.mark_payments(queryset, 'refunded')
         self.message_user(request, f'{updated} payments marked as refunded.')
     mark_as_refunded.short_description = "Mark selected payments as refunded"
 
@@ -103,12 +254,30 @@ class UserCalculationLimitAdmin(admin.ModelAdmin):
     
     def reset_calculations(self, request, queryset):
         updated = queryset.update(full_calculations_used=0)
+        hot_cache.invalidate_users(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} users\' calculation limits reset.')
     reset_calculations.short_description = "Reset calculation limits to 0"
     
     def add_free_calculations(self, request, queryset):
-        for obj in queryset:
-            obj.full_calculations_used = max(0, obj.full_calculations_used - 5)
-            obj.save()
-        self.message_user(request, f'Added 5 free calculations to {queryset.count()} users.')
+        updated = user_limits.add_free_calculations(queryset)
+        self.message_user(request, f'Added {user_limits.FREE_CALCULATIONS} free calculations to {updated} users.')
     add_free_calculations.short_description = "Add 5 free calculations"
+
+
+@admin.register(Job)
+class JobAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['kind', 'status', 'user', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    readonly_fields = ['locked_by', 'locked_until', 'result', 'last_error', 'created_at', 'finished_at']
+    ordering = ['-created_at']
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        # Running jobs are left to their worker.
+        updated = queryset.exclude(status='running').update(
+            status='queued', run_after=timezone.now(), attempts=0, finished_at=None,
+        )
+        self.message_user(request, f'{updated} job(s) queued to run again.')
+    retry_now.short_description = "Queue selected jobs to run again"
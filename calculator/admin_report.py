@@ -0,0 +1,240 @@
+"""
+Per-user activity report for administrators.
+
+Counts and sums are computed by the database with correlated subqueries.
+The three latest calculations and two latest payments per user come from
+windowed ``Prefetch`` querysets. Users are streamed with ``.iterator()``.
+Each chunk of ``chunk_size`` users costs the same three queries however
+much data those users have, and only one chunk is in memory at a time.
+"""
+
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.db.models import (
+    Avg, Count, DecimalField, IntegerField, Max, Min, OuterRef, Prefetch, Q, Subquery, Sum,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Payment, ROIResult
+
+RECENT_CALCULATIONS = 3
+RECENT_PAYMENTS = 2
+CHUNK_SIZE = 2000
+
+CSV_FIELDS = [
+    'id', 'username', 'email', 'date_joined', 'is_superuser', 'is_active',
+    'calculation_count', 'payment_count', 'total_paid',
+    'full_calculations_used', 'unlimited_access', 'unlimited_access_purchased_at',
+    'recent_calculations', 'recent_payments',
+]
+
+
+def _aggregate_subquery(queryset, aggregate, output_field):
+    """Correlated subquery computing ``aggregate`` over ``queryset`` per user."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=output_field,
+        ),
+        0,
+        output_field=output_field,
+    )
+
+
+def user_report_queryset():
+    """Users annotated with their activity totals and recent items."""
+    return (
+        User.objects.order_by('date_joined', 'pk')
+        .select_related('usercalculationlimit')
+        .annotate(
+            calculation_count=_aggregate_subquery(ROIResult.objects.all(), Count('pk'), IntegerField()),
+            payment_count=_aggregate_subquery(Payment.objects.all(), Count('pk'), IntegerField()),
+            total_paid=_aggregate_subquery(
+                Payment.objects.filter(status='completed'), Sum('amount'),
+                DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .prefetch_related(
+            # Sliced prefetch querysets are evaluated with a ROW_NUMBER()
+            # window per user, so only the latest rows are fetched.
+            Prefetch(
+                'roiresult_set',
+                queryset=ROIResult.objects.only('user_id', 'mode', 'roi_percent', 'timestamp')
+                .order_by('-timestamp')[:RECENT_CALCULATIONS],
+                to_attr='recent_calculations',
+            ),
+            Prefetch(
+                'payment_set',
+                queryset=Payment.objects.only('user_id', 'amount', 'status', 'created_at')
+                .order_by('-created_at')[:RECENT_PAYMENTS],
+                to_attr='recent_payments',
+            ),
+        )
+    )
+
+
+def _limit(user):
+    try:
+        return user.usercalculationlimit
+    except User.usercalculationlimit.RelatedObjectDoesNotExist:
+        return None
+
+
+def iter_user_rows(chunk_size=CHUNK_SIZE):
+    """Yield one plain dict per user, streaming users in chunks."""
+    for user in user_report_queryset().iterator(chunk_size=chunk_size):
+        limit = _limit(user)
+        yield {
+            'id': user.pk,
+            'username': user.username,
+            'email': user.email,
+            'date_joined': user.date_joined.isoformat(),
+            'is_superuser': user.is_superuser,
+            'is_active': user.is_active,
+            'calculation_count': user.calculation_count,
+            'payment_count': user.payment_count,
+            'total_paid': f'{user.total_paid:.2f}',
+            'full_calculations_used': limit.full_calculations_used if limit else None,
+            'unlimited_access': limit.unlimited_access if limit else None,
+            'unlimited_access_purchased_at': (
+                limit.unlimited_access_purchased_at.isoformat()
+                if limit and limit.unlimited_access_purchased_at else None
+            ),
+            'recent_calculations': [
+                {'mode': calc.mode, 'roi_percent': calc.roi_percent, 'timestamp': calc.timestamp.isoformat()}
+                for calc in user.recent_calculations
+            ],
+            'recent_payments': [
+                {'amount': f'{payment.amount:.2f}', 'status': payment.status, 'created_at': payment.created_at.isoformat()}
+                for payment in user.recent_payments
+            ],
+        }
+
+
+def summary():
+    """Site-wide totals, one aggregate query per model."""
+    roi = ROIResult.objects.aggregate(
+        count=Count('pk'), avg_roi=Avg('roi_percent'), max_roi=Max('roi_percent'), min_roi=Min('roi_percent'),
+    )
+    payments = Payment.objects.aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=Q(status='completed')),
+        total_revenue=Sum('amount', filter=Q(status='completed')),
+    )
+    users = User.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+        admins=Count('pk', filter=Q(is_superuser=True)),
+        # One-to-one, so the join adds no rows to the counts above.
+        limits=Count('usercalculationlimit'),
+    )
+    return {
+        'users': {
+            'total': users['total'],
+            'active': users['active'],
+            'admins': users['admins'],
+            'regular': users['total'] - users['admins'],
+        },
+        'calculation_limits': users['limits'],
+        'calculations': roi,
+        'payments': {
+            'total': payments['total'],
+            'completed': payments['completed'],
+            'total_revenue': f"{payments['total_revenue'] or 0:.2f}",
+        },
+    }
+
+
+def write_text(output, rows, summary_data):
+    """Human-readable report in the style of the original admin dashboard."""
+    def line(text=''):
+        output.write(f'{text}\n')
+
+    users, calculations, payments = summary_data['users'], summary_data['calculations'], summary_data['payments']
+    line("=" * 80)
+    line("🔐 ROI CALCULATOR - ADMIN DASHBOARD")
+    line("=" * 80)
+    line("\n📊 DATABASE OVERVIEW")
+    line(f"   Total Registered Users: {users['total']}")
+    line(f"   Total ROI Calculations: {calculations['count']}")
+    line(f"   Total Payments: {payments['total']}")
+    line(f"   Total Calculation Limits: {summary_data['calculation_limits']}")
+    line("\n👥 ALL REGISTERED USERS & THEIR DATA")
+    line("-" * 80)
+
+    for i, row in enumerate(rows, 1):
+        line(f"\n{i}. 👤 USER: {row['username']}")
+        line(f"   📧 Email: {row['email']}")
+        line(f"   📅 Joined: {row['date_joined'][:19].replace('T', ' ')}")
+        line(f"   🔑 Is Admin: {'Yes' if row['is_superuser'] else 'No'}")
+        line(f"   🟢 Is Active: {'Yes' if row['is_active'] else 'No'}")
+        line(f"   📈 ROI Calculations: {row['calculation_count']}")
+        if row['recent_calculations']:
+            line("   📊 Recent Calculations:")
+            for calc in row['recent_calculations']:
+                line(f"      - {calc['mode'].title()} | ROI: {calc['roi_percent']:.1f}% | Date: {calc['timestamp'][:16].replace('T', ' ')}")
+        line(f"   💳 Payments: {row['payment_count']}")
+        if row['recent_payments']:
+            line(f"   💰 Total Paid: ₹{row['total_paid']}")
+            line("   📋 Recent Payments:")
+            for payment in row['recent_payments']:
+                line(f"      - ₹{payment['amount']} | Status: {payment['status']} | Date: {payment['created_at'][:16].replace('T', ' ')}")
+        if row['full_calculations_used'] is None:
+            line("   🎯 Calculation Limits: Not set")
+        else:
+            line("   🎯 Calculation Limits:")
+            line(f"      - Full Calculations Used: {row['full_calculations_used']}")
+            line(f"      - Unlimited Access: {'Yes' if row['unlimited_access'] else 'No'}")
+            if row['unlimited_access_purchased_at']:
+                line(f"      - Unlimited Access Purchased: {row['unlimited_access_purchased_at'][:16].replace('T', ' ')}")
+        line("-" * 40)
+
+    line("\n📈 SUMMARY STATISTICS")
+    line("-" * 40)
+    if calculations['count']:
+        line("   📊 ROI Statistics:")
+        line(f"      - Average ROI: {calculations['avg_roi']:.1f}%")
+        line(f"      - Highest ROI: {calculations['max_roi']:.1f}%")
+        line(f"      - Lowest ROI: {calculations['min_roi']:.1f}%")
+    if payments['completed']:
+        line("   💰 Revenue Statistics:")
+        line(f"      - Total Revenue: ₹{payments['total_revenue']}")
+        line(f"      - Completed Payments: {payments['completed']}")
+    line("   👥 User Statistics:")
+    line(f"      - Active Users: {users['active']}")
+    line(f"      - Admin Users: {users['admins']}")
+    line(f"      - Regular Users: {users['regular']}")
+
+
+def write_csv(output, rows):
+    """Write rows as CSV; recent items are flattened into one cell each."""
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        row = dict(row)
+        row['recent_calculations'] = '; '.join(
+            f"{calc['mode']} {calc['roi_percent']:.1f}% {calc['timestamp']}" for calc in row['recent_calculations']
+        )
+        row['recent_payments'] = '; '.join(
+            f"{payment['amount']} {payment['status']} {payment['created_at']}" for payment in row['recent_payments']
+        )
+        writer.writerow(row)
+
+
+def write_json(output, rows, summary_data=None):
+    """Write ``{"summary": ..., "users": [...]}`` one user at a time."""
+    output.write('{"summary": ')
+    output.write(json.dumps(summary_data))
+    output.write(', "users": [')
+    for index, row in enumerate(rows):
+        if index:
+            output.write(',')
+        output.write('\n')
+        output.write(json.dumps(row))
+    output.write('\n]}\n')
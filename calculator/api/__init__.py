@@ -0,0 +1,17 @@
+"""
+JSON REST API, version 1, under ``/api/v1/``:
+
+- ``auth/token/``: POST ``username`` and ``password`` to get a token.
+  Every other endpoint needs it, sent as ``Authorization: Token <key>``.
+- ``calculations/``: list (cursor-paginated, newest first) and create
+- ``calculations/<id>/``: retrieve and delete
+- ``calculations/ingest/``: save many calculations sent as NDJSON, with
+  one status line back per input line (see ``ingest``)
+- ``calculate/batch/``: evaluate up to ``API_BATCH_MAX_SCENARIOS``
+  scenarios in one call, optionally saving them
+
+Creating a full calculation uses up one of the user's free calculations,
+as on the website. Django REST framework is only imported by ``views``,
+which ``urls`` loads on the first API request, so start-up does not pay
+for it.
+"""
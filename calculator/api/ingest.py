@@ -0,0 +1,125 @@
+"""
+NDJSON ingest for ``calculations/ingest/``.
+
+The request body holds one calculation per line, in the format
+``calculations/`` accepts, plus an optional ``client_id`` that is echoed
+back so offline queues can match statuses to their entries. Lines are
+read from the request stream while the response is being written, so
+neither side holds the whole upload in memory.
+
+Every line is validated and its outputs recomputed on the server; any
+outputs the client sends are ignored. Lines are processed in batches of
+``API_INGEST_BATCH_SIZE``: the valid rows of a batch are saved in one
+transaction with one ``bulk_create``, and then one status line per input
+line is streamed back, in input order:
+
+    {"line": 1, "status": "created", "id": 42}
+    {"line": 2, "status": "invalid", "errors": {...}}
+    {"line": 3, "status": "payment_required"}
+    {"line": 4, "status": "failed", "error": "..."}
+
+Free calculations for a batch's full rows are reserved inside its
+transaction, against the limit as it is then, so concurrent uploads and
+saves cannot spend past it; full rows beyond what is left are
+``payment_required``. A final ``{"summary": {...}}`` line counts each
+status. ``failed`` means the batch's transaction was rolled back; those
+lines can be resent.
+"""
+
+import json
+from collections import Counter
+
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .. import hot_cache
+from ..models import ROIResult, UserCalculationLimit
+from ..user_limits import FREE_CALCULATIONS
+from ..views.payments import get_or_create_user_limit
+from .serializers import CalculationSerializer
+
+
+def _encode(item):
+    return (json.dumps(item, separators=(',', ':')) + '\n').encode()
+
+
+class Ingest:
+    """Iterating an Ingest consumes ``stream`` and yields the NDJSON response."""
+
+    def __init__(self, user, stream, batch_size):
+        self.user = user
+        self.stream = stream
+        self.batch_size = batch_size
+        self.counts = Counter()
+        self.limit = get_or_create_user_limit(user)
+        self.unlimited = self.limit.get_remaining_free_calculations() == float('inf')
+        # One serializer validates every line; building its fields per line
+        # would cost more than the rest of the row's processing.
+        self.serializer = CalculationSerializer()
+
+    def __iter__(self):
+        batch = []
+        for number, raw in enumerate(self.stream or (), start=1):
+            if not raw.strip():
+                continue
+            batch.append(self.parse(number, raw))
+            if len(batch) >= self.batch_size:
+                yield from self.flush(batch)
+                batch = []
+        yield from self.flush(batch)
+        yield _encode({'summary': dict(self.counts)})
+
+    def parse(self, number, raw):
+        """Return ``[status, unsaved ROIResult or None]`` for one line."""
+        status = {'line': number}
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            return [{**status, 'status': 'invalid', 'errors': {'non_field_errors': ['Invalid JSON.']}}, None]
+        if not isinstance(row, dict):
+            return [{**status, 'status': 'invalid', 'errors': {'non_field_errors': ['Expected a JSON object.']}}, None]
+        if 'client_id' in row:
+            status['client_id'] = row.pop('client_id')
+        try:
+            data = self.serializer.run_validation(row)
+        except ValidationError as exc:
+            return [{**status, 'status': 'invalid', 'errors': exc.detail}, None]
+        result = ROIResult(user=self.user, payment_completed=data['mode'] == 'full', **data)
+        return [{**status, 'status': 'created'}, result]
+
+    def reserve(self, wanted):
+        """Spend up to ``wanted`` free calculations; return how many were spent."""
+        limits = UserCalculationLimit.objects.filter(pk=self.limit.pk)
+        while True:
+            used = limits.values_list('full_calculations_used', flat=True).get()
+            granted = min(wanted, max(0, FREE_CALCULATIONS - used))
+            # Only applies if nobody has spent any since the read; otherwise
+            # read again.
+            if not granted or limits.filter(full_calculations_used=used).update(
+                full_calculations_used=used + granted
+            ):
+                return granted
+
+    def flush(self, batch):
+        pending = [entry for entry in batch if entry[1] is not None]
+        if pending:
+            full = [entry for entry in pending if entry[1].mode == 'full']
+            try:
+                with transaction.atomic():
+                    granted = len(full) if self.unlimited or not full else self.reserve(len(full))
+                    refused = {id(entry) for entry in full[granted:]}
+                    saved = [entry for entry in pending if id(entry) not in refused]
+                    ROIResult.objects.bulk_create([result for _, result in saved])
+            except DatabaseError as exc:
+                for status, _ in pending:
+                    status.update(status='failed', error=str(exc))
+            else:
+                for status, result in saved:
+                    status['id'] = result.pk
+                for status, _ in full[granted:]:
+                    status['status'] = 'payment_required'
+            # bulk_create() and update() send no model signals.
+            hot_cache.invalidate_users([self.user.pk])
+        for status, _ in batch:
+            self.counts[status['status']] += 1
+            yield _encode(status)
@@ -0,0 +1,67 @@
+"""Serializers of the REST API, validated against the calculator forms' bounds."""
+
+from django import forms
+from rest_framework import serializers
+
+from .. import roi_engine
+from ..forms import FullCalculatorForm
+from ..models import ROIResult
+from ..views.calculations import calculate_roi
+
+QUICK_INPUTS = ('annual_revenue', 'annual_cloud_spend', 'num_engineers')
+
+# name -> (min, max, whole numbers only), as the full calculator accepts them
+INPUT_BOUNDS = {
+    name: (field.min_value, field.max_value, not isinstance(field, forms.FloatField))
+    for name, field in ((name, FullCalculatorForm.base_fields[name]) for name in roi_engine.INPUTS)
+}
+
+
+def input_field(name):
+    low, high, whole = INPUT_BOUNDS[name]
+    field_class = serializers.IntegerField if whole else serializers.FloatField
+    return field_class(min_value=low, max_value=high, required=name in QUICK_INPUTS)
+
+
+class CalculationSerializer(serializers.ModelSerializer):
+    """A saved calculation. Clients send the inputs; the outputs are computed.
+
+    Inputs the full calculator has defaults for may be left out. A quick
+    estimate only reads ``QUICK_INPUTS`` and stores the defaults for the rest.
+    """
+
+    mode = serializers.ChoiceField(choices=ROIResult.MODE_CHOICES, default='full')
+
+    class Meta:
+        model = ROIResult
+        fields = ('id', 'timestamp', 'mode', *roi_engine.INPUTS, *roi_engine.OUTPUTS)
+        read_only_fields = ('id', 'timestamp', *roi_engine.OUTPUTS)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields.update({name: input_field(name) for name in roi_engine.INPUTS})
+        return fields
+
+    def validate(self, attrs):
+        inputs = {name: attrs[name] for name in roi_engine.INPUTS if name in attrs}
+        if attrs['mode'] == 'quick':
+            inputs = {**inputs, **roi_engine.DEFAULTS}
+        else:
+            inputs = {**roi_engine.DEFAULTS, **inputs}
+        return {'mode': attrs['mode'], **inputs, **calculate_roi(inputs, mode=attrs['mode'])}
+
+
+class BatchSerializer(serializers.Serializer):
+    """The envelope of a batch request; the scenarios are checked column by column."""
+
+    mode = serializers.ChoiceField(choices=ROIResult.MODE_CHOICES, default='full')
+    save = serializers.BooleanField(default=False)
+    scenarios = serializers.JSONField()
+
+    def validate_scenarios(self, scenarios):
+        limit = self.context['max_scenarios']
+        if not isinstance(scenarios, list) or not scenarios:
+            raise serializers.ValidationError('Expected a non-empty list of scenario objects.')
+        if len(scenarios) > limit:
+            raise serializers.ValidationError(f'At most {limit} scenarios per request.')
+        return scenarios
@@ -0,0 +1,30 @@
+"""URLs of the REST API. Each view is imported on its first request."""
+
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+
+def _lazy(name):
+    view = None
+
+    # The API authenticates with tokens, not cookies; DRF's own views are
+    # CSRF-exempt for the same reason.
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            from . import views
+
+            view = getattr(views, name)
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+urlpatterns = [
+    path('<str:version>/auth/token/', _lazy('obtain_token'), name='api_token'),
+    path('<str:version>/calculations/', _lazy('calculation_list'), name='api_calculations'),
+    path('<str:version>/calculations/ingest/', _lazy('ingest_calculations'), name='api_ingest_calculations'),
+    path('<str:version>/calculations/<int:pk>/', _lazy('calculation_detail'), name='api_calculation'),
+    path('<str:version>/calculate/batch/', _lazy('calculate_batch'), name='api_calculate_batch'),
+]
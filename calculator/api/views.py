@@ -0,0 +1,137 @@
+"""Views of the REST API (see ``calculator.api``)."""
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import generics, serializers
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.authtoken.views import obtain_auth_token
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination
+from rest_framework.views import APIView
+
+from .. import hot_cache
+from ..models import ROIResult, UserCalculationLimit
+from ..pdf_cache import get_pdf_cache
+from ..tasks import prerender_pdf
+from ..user_limits import BATCH_SIZE, spend_free_calculations
+from ..views.payments import get_or_create_user_limit
+from . import batch
+from .ingest import Ingest
+from .serializers import BatchSerializer, CalculationSerializer
+
+
+class PaymentRequired(APIException):
+    status_code = 402
+    default_detail = 'You have used all your free calculations. Please make a payment to continue.'
+    default_code = 'payment_required'
+
+
+def spend(user, count):
+    """Use up ``count`` of ``user``'s free calculations or raise PaymentRequired.
+
+    The limit may be cached or spent by a concurrent request since; the
+    conditional UPDATE is what decides. Call inside the transaction that
+    saves the results, so a failed save gives the calculations back.
+    """
+    user_limit = get_or_create_user_limit(user)
+    if user_limit.get_remaining_free_calculations() != float('inf') and not spend_free_calculations(
+        UserCalculationLimit.objects.filter(pk=user_limit.pk), count
+    ):
+        raise PaymentRequired()
+
+
+class NewestFirst(CursorPagination):
+    # Served by the (user, -timestamp) index.
+    ordering = '-timestamp'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class CalculationList(generics.ListCreateAPIView):
+    serializer_class = CalculationSerializer
+    pagination_class = NewestFirst
+
+    def get_queryset(self):
+        return ROIResult.objects.filter(user=self.request.user)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        full = serializer.validated_data['mode'] == 'full'
+        if full:
+            spend(self.request.user, 1)
+        # Saving the result also retires the user's cached limit.
+        result = serializer.save(user=self.request.user, payment_completed=full)
+        if full:
+            prerender_pdf(result)
+
+
+class CalculationDetail(generics.RetrieveDestroyAPIView):
+    serializer_class = CalculationSerializer
+
+    def get_queryset(self):
+        return ROIResult.objects.filter(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        result_id = instance.pk
+        instance.delete()
+        get_pdf_cache().invalidate([result_id])
+
+
+class CalculateBatch(APIView):
+    """Evaluate many scenarios in one request.
+
+    POST ``{"mode": "full", "save": false, "scenarios": [{...}, ...]}``.
+    The response is ``{"count": n, "results": [{output: value, ...}, ...]}``
+    in scenario order; saved results also carry their ``id``. Saving
+    full calculations uses up one free calculation per scenario.
+    """
+
+    def post(self, request, *args, **kwargs):
+        envelope = BatchSerializer(data=request.data, context={
+            'max_scenarios': getattr(settings, 'API_BATCH_MAX_SCENARIOS', 10_000),
+        })
+        envelope.is_valid(raise_exception=True)
+        mode, save, scenarios = (envelope.validated_data[key] for key in ('mode', 'save', 'scenarios'))
+        try:
+            columns = batch.input_columns(scenarios, mode)
+        except batch.ScenarioError as exc:
+            raise serializers.ValidationError({'scenarios': exc.messages})
+        outputs = batch.evaluate(columns)
+        ids = self.save(mode, columns, outputs) if save else None
+        return StreamingHttpResponse(batch.stream_json(outputs, ids), content_type='application/json')
+
+    @transaction.atomic
+    def save(self, mode, columns, outputs):
+        user = self.request.user
+        count = len(outputs['roi_percent'])
+        if mode == 'full':
+            spend(user, count)
+        saved = ROIResult.objects.bulk_create(
+            batch.build_results(user, mode, columns, outputs), batch_size=BATCH_SIZE
+        )
+        # bulk_create() and update() send no model signals.
+        hot_cache.invalidate_users([user.pk])
+        return [result.pk for result in saved]
+
+
+class IngestCalculations(APIView):
+    """Save calculations sent as NDJSON, one per line (see ``calculator.api.ingest``).
+
+    Also accepts the website's session, so the calculator pages can
+    upload results they queued while offline.
+    """
+
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        ingest = Ingest(request.user, request.stream, getattr(settings, 'API_INGEST_BATCH_SIZE', 500))
+        return StreamingHttpResponse(ingest, content_type='application/x-ndjson')
+
+
+obtain_token = obtain_auth_token
+calculation_list = CalculationList.as_view()
+calculation_detail = CalculationDetail.as_view()
+calculate_batch = CalculateBatch.as_view()
+ingest_calculations = IngestCalculations.as_view()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CalculatorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calculator'
+
+    def ready(self):
+        # Connects the signal handlers that invalidate cached hot reads.
+        from . import hot_cache  # noqa: F401
@@ -0,0 +1,230 @@
+"""
+Bulk export of PDF reports as a streamed ZIP archive.
+
+ReportLab layout is pure Python and holds the GIL, so rendering many
+reports in threads does not go any faster. ``ReportExporter`` renders
+them in a process pool instead and writes each PDF into the archive as
+soon as its worker finishes; the archive is produced chunk by chunk and
+never held in memory as a whole.
+
+Workers receive fully loaded ``ROIResult`` instances (with ``user``
+selected) and never touch the database.
+"""
+
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import reports
+from .pdf_cache import get_pdf_cache
+
+
+def _init_worker():
+    # Spawned workers start from a fresh interpreter; unpickling model
+    # instances needs the app registry.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+        django.setup()
+
+
+def render_report(result):
+    """Render one report to bytes. Runs inside a pool worker."""
+    output = io.BytesIO()
+    reports.build_result_pdf(result, output)
+    return output.getvalue()
+
+
+def archive_name(result):
+    # Report filenames only have minute resolution, so prefix the id to
+    # keep them unique inside the archive.
+    return f'{result.pk}_{reports.report_filename(result)}'
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that ``zipfile`` streams into."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ReportExporter:
+    """Render ROIResult reports in a process pool and stream them as a ZIP.
+
+    ``workers=0`` renders in the calling process, which is the baseline
+    the benchmark compares against. At most ``2 * workers`` reports are in
+    flight at once, so memory stays bounded however many results are
+    exported. Reports already in the on-disk PDF cache are not rendered
+    again, and freshly rendered ones are added to it.
+    """
+
+    def __init__(self, workers=None, use_cache=True):
+        if workers is None:
+            workers = getattr(settings, 'BULK_EXPORT_WORKERS', 2)
+        self.workers = workers
+        self.use_cache = use_cache
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # fork() in a threaded server can deadlock the child on
+                    # a lock held by another thread; spawn is safe.
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                    )
+        return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _discard(self, pool):
+        """Forget a broken pool so the next export starts a fresh one.
+
+        Other exports may already be using a replacement; only ``pool``
+        itself is shut down, and its futures have all failed already.
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def render(self, results):
+        """Yield (result, pdf bytes) in completion order."""
+        cache = get_pdf_cache() if self.use_cache else None
+        if self.workers == 0:
+            for result in results:
+                data = cache.read(result.pk) if cache else None
+                if data is None:
+                    data = render_report(result)
+                    if cache:
+                        cache.store(result.pk, data)
+                yield result, data
+            return
+
+        pool = self.pool
+        pending = {}
+        try:
+            for result in results:
+                data = cache.read(result.pk) if cache else None
+                if data is not None:
+                    yield result, data
+                    continue
+                pending[pool.submit(render_report, result)] = result
+                if len(pending) >= 2 * self.workers:
+                    yield from self._collect(pending, cache)
+            while pending:
+                yield from self._collect(pending, cache)
+        except BrokenProcessPool:
+            # A worker died; later exports get a fresh pool.
+            self._discard(pool)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def _collect(pending, cache):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = pending.pop(future)
+            data = future.result()
+            if cache:
+                cache.store(result.pk, data)
+            yield result, data
+
+    def stream_zip(self, results, total=None, on_progress=None):
+        """Yield the bytes of a ZIP archive holding one PDF per result.
+
+        ``on_progress(done, total)`` is called after each report is added.
+        """
+        sink = _ZipSink()
+        done = 0
+        # PDFs are already compressed; deflating them again costs CPU for
+        # next to no saving.
+        with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+            for result, data in self.render(results):
+                archive.writestr(archive_name(result), data)
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+                yield sink.drain()
+        yield sink.drain()
+
+
+class ExportProgress:
+    """Progress of one user's export, readable from other requests.
+
+    Stored under a client-chosen token in the cache shared by all worker
+    processes (``HOT_CACHE_ALIAS``), so the page that started the download
+    can poll it while the ZIP streams, whichever process serves the poll.
+    """
+
+    TIMEOUT = 60 * 60
+    TOKEN_RE = re.compile(r'^[\w-]{1,64}$')
+
+    def __init__(self, user_id, token):
+        self.key = f'bulk_export:progress:{user_id}:{token}'
+
+    @classmethod
+    def valid_token(cls, token):
+        return bool(token and cls.TOKEN_RE.match(token))
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'HOT_CACHE_ALIAS', 'default')]
+
+    def update(self, done, total):
+        self._cache().set(self.key, {
+            'done': done,
+            'total': total,
+            'finished': total is not None and done >= total,
+        }, self.TIMEOUT)
+
+    def get(self):
+        return self._cache().get(self.key)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the process-wide ReportExporter; its pool is started on first use."""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = ReportExporter()
+    return _exporter
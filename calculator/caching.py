@@ -0,0 +1,208 @@
+"""
+Small caching helpers shared by the calculator app.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU mapping with a per-entry TTL.
+
+    Used as a process-local tier in front of Django's cache framework so
+    that hot keys never leave the worker process.
+    """
+
+    def __init__(self, max_entries=1000, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class FlightTimeout(Exception):
+    """Waiting for another caller's call took longer than ``wait_timeout``."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time in this process.
+
+    Callers that arrive while a call for their key is running wait for it
+    and share its result (or exception) instead of repeating the work;
+    with a ``wait_timeout`` they give up after that many seconds with
+    FlightTimeout.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, wait_timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if not call.done.wait(wait_timeout):
+                raise FlightTimeout(key)
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def in_flight(self, key):
+        return key in self._calls
+
+
+class TieredCache:
+    """One cache namespace: an LRUCache in front of a shared Django cache alias.
+
+    Entries are fresh for ``ttl`` seconds and are then served stale for up
+    to ``stale_ttl`` more while a single caller recomputes them (soft
+    expiry). A miss is computed once: concurrent callers in this process
+    wait on a SingleFlight, and other processes wait on a lock key in the
+    shared tier for up to ``lock_timeout`` seconds. The shared lock uses
+    ``cache.add`` and is best-effort on backends where that is not atomic
+    (such as the file-based cache).
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, namespace, ttl, stale_ttl=0, alias='default', max_entries=1000, lock_timeout=10):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl + stale_ttl)
+        self.flights = SingleFlight()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        return f'tiered:{self.namespace}:{key}'
+
+    def _load(self, full_key):
+        # Entries are (value, fresh_until) pairs; fresh_until is wall-clock
+        # time so every process agrees on it.
+        entry = self.local.get(full_key)
+        if entry is None:
+            entry = self.shared.get(full_key)
+            if entry is not None:
+                remaining = entry[1] + self.stale_ttl - time.time()
+                if remaining > 0:
+                    self.local.set(full_key, entry, remaining)
+        return entry
+
+    def get(self, key, default=None):
+        entry = self._load(self.make_key(key))
+        return default if entry is None else entry[0]
+
+    def set(self, key, value):
+        full_key = self.make_key(key)
+        entry = (value, time.time() + self.ttl)
+        self.local.set(full_key, entry)
+        self.shared.set(full_key, entry, self.ttl + self.stale_ttl)
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        self.local.delete(full_key)
+        self.shared.delete(full_key)
+
+    def get_or_set(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` to fill a miss."""
+        full_key = self.make_key(key)
+        entry = self._load(full_key)
+        if entry is None:
+            return self.flights.do(full_key, lambda: self._recompute(key, compute))
+        value, fresh_until = entry
+        if fresh_until > time.time() or self.flights.in_flight(full_key):
+            return value
+        return self.flights.do(full_key, lambda: self._recompute(key, compute, stale=entry))
+
+    def _recompute(self, key, compute, stale=None):
+        full_key = self.make_key(key)
+        lock_key = f'{full_key}:lock'
+        locked = self.shared.add(lock_key, 1, self.lock_timeout)
+        if not locked:
+            # Another process is recomputing this key.
+            if stale is not None:
+                return stale[0]
+            entry = self._wait_for(full_key)
+            if entry is not None:
+                return entry[0]
+        try:
+            value = compute()
+            self.set(key, value)
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+        return value
+
+    def _wait_for(self, full_key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            entry = self.shared.get(full_key)
+            if entry is not None:
+                return entry
+        return None
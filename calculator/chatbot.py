@@ -0,0 +1,317 @@
+"""
+Chatbot support code: the assistant's system prompt, the answer cache
+that sits in front of the Gemini API and the limit on concurrent streams.
+"""
+
+import contextlib
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .caching import LRUCache, TieredCache
+
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+SYSTEM_PROMPT = """ROI Calculator Input Categories and Default Values:
+
+BUSINESS INPUTS:
+- annualRevenue: $100,000,000 (Annual company revenue)
+- grossMargin: 80% (Company's gross profit margin)
+- containerAppFraction: 90% (Percentage of applications that are containerized)
+- annualCloudSpend: $10,000,000 (Total annual cloud infrastructure spending)
+- computeSpendFraction: 60% (Percentage of cloud spend on compute resources)
+- costSensitiveFraction: 50% (Percentage of compute spend that is cost-sensitive)
+
+PRODUCTIVITY INPUTS:
+- numEngineers: 100 (Number of engineers in the team)
+- engineerCostPerYear: $150,000 (Annual cost per engineer including salary and benefits)
+- opsTimeFraction: 15% (Percentage of engineering time spent on operations)
+- opsToilFraction: 50% (Percentage of ops time spent on repetitive tasks/toil)
+- toilReductionFraction: 45% (Expected reduction in toil through automation - fixed)
+
+PERFORMANCE INPUTS:
+- avgResponseTimeSec: 2 seconds (Current average application response time)
+- execTimeInfluenceFraction: 33% (Percentage of revenue influenced by execution time - fixed)
+- latRedContainer: 28% (Latency reduction for containerized apps - fixed)
+- latRedServerless: 50% (Latency reduction for serverless apps - fixed)
+- revenueLiftPer100ms: 1% (Revenue increase per 100ms response time improvement)
+
+AVAILABILITY INPUTS:
+- currentFCIFraction: 2% (Current Failure Cost Index as percentage of revenue)
+- fciReductionFraction: 75% (Expected reduction in failure costs - fixed)
+- costPer1PctFCI: 1% (Cost per 1% of FCI)
+
+CALCULATION FORMULAS:
+
+1. Cloud Savings:
+   computeSpend = annualCloudSpend * (computeSpendFraction / 100)
+   costSensitiveSpend = computeSpend * (costSensitiveFraction / 100)
+   cloudSavings = costSensitiveSpend * ((containerAppFraction / 100) * 0.5 + (1 - containerAppFraction / 100) * 0.2)
+
+2. Productivity Gain:
+   productivityGain = numEngineers * engineerCostPerYear * (opsTimeFraction / 100) * (opsToilFraction / 100) * (toilReductionFraction / 100)
+
+3. Performance Gain:
+   weightedLatRed = (containerAppFraction / 100) * (latRedContainer / 100) + (1 - containerAppFraction / 100) * (latRedServerless / 100)
+   timeSavedSec = avgResponseTimeSec * weightedLatRed
+   revGainPct = (timeSavedSec / 0.1) * (revenueLiftPer100ms / 100)
+   performanceGain = annualRevenue * revGainPct * (grossMargin / 100) * (execTimeInfluenceFraction / 100)
+
+4. Availability Gain:
+   fciCostFraction = (costPer1PctFCI / 100) * (currentFCIFraction / 100 / 0.01)
+   fciCost = annualRevenue * fciCostFraction * (grossMargin / 100)
+   availabilityGain = fciCost * (fciReductionFraction / 100)
+
+5. Total Calculations:
+
+   totalAnnualGain = cloudSavings + productivityGain + performanceGain + availabilityGain
+   estimatedCost = annualCloudSpend / 10
+   roiPercent = (totalAnnualGain / (estimatedCost + numEngineers * engineerCostPerYear)) * 100
+   paybackMonths = (12 * estimatedCost) / totalAnnualGain (0 when there is no gain)
+
+The calculator estimates the ROI by calculating potential savings and gains across four key areas: cloud infrastructure optimization, engineering productivity improvements, application performance enhancements, and system availability improvements."""
+
+# Changing the prompt or the model invalidates every cached answer.
+PROMPT_VERSION = hashlib.sha1(
+    f'{GEMINI_MODEL_NAME}\n{SYSTEM_PROMPT}'.encode('utf-8')
+).hexdigest()[:12]
+
+STOPWORDS = frozenset("""
+a about an and are as at be can could do does did for from i in is it
+its me my of on or please tell the this to us was will with would you your
+""".split())
+
+# Kept in cache keys: "why is FCI high" and "what is FCI" need different answers.
+INTERROGATIVES = frozenset('how what when where which who whom whose why'.split())
+
+# What contractions of the interrogatives become once apostrophes are dropped.
+_CONTRACTIONS = {'whats': 'what', 'hows': 'how', 'wheres': 'where', 'whos': 'who', 'whys': 'why'}
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+
+
+def question_words(question):
+    """Lower-cased words of ``question``, without punctuation."""
+    text = unicodedata.normalize('NFKC', question).lower()
+    text = text.replace("'", '')
+    return [_CONTRACTIONS.get(word, word) for word in _PUNCTUATION_RE.sub(' ', text).split()]
+
+
+def normalize_question(question):
+    """Fold a question into a canonical form for cache lookups.
+
+    Case, surrounding/inner whitespace, punctuation and common stopwords are
+    ignored, so "What is FCI?" and "what's  FCI" map to the same key.
+    Interrogatives are kept, so "Why is FCI high?" maps to another one.
+    """
+    words = question_words(question)
+    kept = [word for word in words if word not in STOPWORDS]
+    # A question made only of stopwords and interrogatives ("What is it?")
+    # still needs a distinct key.
+    if all(word in INTERROGATIVES for word in kept):
+        return ' '.join(words)
+    return ' '.join(kept)
+
+
+class UsageCounters:
+    """Integer counters kept per process and, via Django's cache, across processes.
+
+    Increments only touch process memory; they are added to the shared
+    totals at most every ``flush_interval`` seconds (and whenever the
+    shared totals are read), so counting stays off the request path. The
+    shared totals use ``cache.incr`` and are best-effort on backends
+    without atomic increments (such as the file-based cache).
+    """
+
+    flush_interval = 10
+
+    def __init__(self, prefix, names, alias):
+        self.prefix = prefix
+        self.names = tuple(names)
+        self.alias = alias
+        self.process = dict.fromkeys(self.names, 0)
+        self._pending = dict.fromkeys(self.names, 0)
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _key(self, name):
+        return f'{self.prefix}:{name}'
+
+    def incr(self, name, delta=1):
+        with self._lock:
+            self.process[name] += delta
+            self._pending[name] += delta
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add the increments counted since the last flush to the shared totals."""
+        with self._lock:
+            pending, self._pending = self._pending, dict.fromkeys(self.names, 0)
+            self._flushed_at = time.monotonic()
+        cache = caches[self.alias]
+        for name, delta in pending.items():
+            if delta:
+                # add() is a no-op when the counter exists, so incr() never raises.
+                cache.add(self._key(name), 0, None)
+                cache.incr(self._key(name), delta)
+
+    def shared(self):
+        self.flush()
+        values = caches[self.alias].get_many([self._key(name) for name in self.names])
+        return {name: values.get(self._key(name), 0) for name in self.names}
+
+    def reset(self):
+        caches[self.alias].delete_many([self._key(name) for name in self.names])
+        with self._lock:
+            self.process = dict.fromkeys(self.names, 0)
+            self._pending = dict.fromkeys(self.names, 0)
+
+
+class AnswerCache:
+    """Cache chatbot answers by normalized question.
+
+    Answers live in the ``chatbot`` TieredCache namespace: a bounded,
+    process-local LRU in front of the Django cache alias named by
+    ``CHATBOT_CACHE_ALIAS``, so every worker process shares them. Both
+    tiers honour ``CHATBOT_CACHE_TTL``.
+
+    Keys include a generation token kept in the shared tier, which
+    ``clear()`` replaces; the alias also holds the FAQ counters, so it is
+    not cleared outright. Each process reuses the token it has read for
+    ``CHATBOT_CACHE_GENERATION_TTL`` seconds, so other processes stop
+    serving the old answers within that many seconds.
+    """
+
+    generation_key = f'chatbot:generation:{PROMPT_VERSION}'
+
+    def __init__(self):
+        self.alias = getattr(settings, 'CHATBOT_CACHE_ALIAS', 'default')
+        self.ttl = getattr(settings, 'CHATBOT_CACHE_TTL', 60 * 60 * 24)
+        self.max_entries = getattr(settings, 'CHATBOT_CACHE_MAX_ENTRIES', 1000)
+        self.store = TieredCache('chatbot', self.ttl, alias=self.alias, max_entries=self.max_entries)
+        self.local = self.store.local
+        self.generations = LRUCache(
+            max_entries=1, ttl=getattr(settings, 'CHATBOT_CACHE_GENERATION_TTL', 2),
+        )
+        self.counters = UsageCounters(
+            f'chatbot:stats:{PROMPT_VERSION}', ('hits', 'misses'), self.alias
+        )
+
+    def generation(self):
+        token = self.generations.get(self.generation_key)
+        if token is not None:
+            return token
+        shared = self.store.shared
+        token = shared.get(self.generation_key)
+        if token is None:
+            token = uuid.uuid4().hex[:12]
+            if not shared.add(self.generation_key, token, None):
+                token = shared.get(self.generation_key, token)
+        self.generations.set(self.generation_key, token)
+        return token
+
+    def make_key(self, question):
+        digest = hashlib.sha1(normalize_question(question).encode('utf-8')).hexdigest()
+        return f'answer:{PROMPT_VERSION}:{self.generation()}:{digest}'
+
+    def get(self, question):
+        answer = self.store.get(self.make_key(question))
+        self.counters.incr('hits' if answer is not None else 'misses')
+        return answer
+
+    def set(self, question, answer):
+        self.store.set(self.make_key(question), answer)
+
+    def clear(self):
+        """Drop every cached answer, in this process and the shared tier."""
+        token = uuid.uuid4().hex[:12]
+        self.store.shared.set(self.generation_key, token, None)
+        self.generations.set(self.generation_key, token)
+        self.local.clear()
+        self.counters.reset()
+
+    def stats(self):
+        """Hit/miss counters for this process and across all processes."""
+        process = self.counters.process
+        shared = self.counters.shared()
+        return {
+            'prompt_version': PROMPT_VERSION,
+            'process': _with_ratio(process['hits'], process['misses']),
+            'shared': _with_ratio(shared['hits'], shared['misses']),
+            'local_entries': len(self.local),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
+
+
+def _with_ratio(hits, misses):
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+    }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Return the process-wide AnswerCache, creating it on first use."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+    return _answer_cache
+
+
+def sse_event(event, data):
+    """Encode one server-sent event with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode('utf-8')
+
+
+class StreamLimiter:
+    """Cap the number of concurrent upstream streams in this process.
+
+    The app is served over WSGI, where each stream holds a worker thread
+    for its whole length; a process-wide semaphore bounds how many of
+    them can be waiting on Gemini at once.
+    """
+
+    def __init__(self):
+        self._semaphore = None
+        self._limit = None
+        self._lock = threading.Lock()
+
+    def semaphore(self):
+        limit = getattr(settings, 'CHATBOT_STREAM_MAX_CONCURRENCY', 20)
+        with self._lock:
+            if self._limit != limit:
+                self._semaphore = threading.BoundedSemaphore(limit)
+                self._limit = limit
+            return self._semaphore
+
+    @contextlib.contextmanager
+    def slot(self, timeout):
+        """Hold a slot for the block; yields False if the cap stayed full."""
+        semaphore = self.semaphore()
+        acquired = semaphore.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                semaphore.release()
+
+
+stream_limiter = StreamLimiter()
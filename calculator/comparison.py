@@ -0,0 +1,177 @@
+"""
+Side-by-side comparison report for several saved ROI results.
+
+Every scenario is a row. Each gain component gets a value column and a
+delta column against the baseline (the first scenario requested).
+Styles come from the process-wide ``ReportStyles`` shared with the
+result reports. Large comparisons are split into fixed-size tables with
+fixed row heights and column widths. ReportLab then never has to measure or split one huge
+table, so rendering cost grows linearly with the number of scenarios.
+"""
+
+import datetime
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import ROIResult
+from .reports import get_report_styles
+
+# (field, label, lower_is_better)
+COMPONENTS = [
+    ('cloud_savings', 'Cloud', False),
+    ('productivity_gain', 'Productivity', False),
+    ('performance_gain', 'Performance', False),
+    ('availability_gain', 'Availability', False),
+    ('total_annual_gain', 'Total Gain', False),
+    ('roi_percent', 'ROI %', False),
+    ('payback_months', 'Payback (mo)', True),
+]
+
+MAX_SCENARIOS = 500
+ROWS_PER_TABLE = 25
+
+_PAGE_SIZE = landscape(A4)
+_ROW_HEIGHT = 16
+_SCENARIO_WIDTH = 1.35 * inch
+_VALUE_WIDTH = 0.74 * inch
+_DELTA_WIDTH = 0.6 * inch
+_COL_WIDTHS = [_SCENARIO_WIDTH] + [_VALUE_WIDTH, _DELTA_WIDTH] * len(COMPONENTS)
+
+
+class ComparisonError(ValueError):
+    """The requested set of results cannot be compared."""
+
+
+def parse_ids(raw):
+    """'3,1,2' -> [3, 1, 2], keeping order and dropping duplicates."""
+    ids = []
+    for part in raw.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ComparisonError(f'Invalid result id: {part!r}')
+        result_id = int(part)
+        if result_id not in ids:
+            ids.append(result_id)
+    if len(ids) < 2:
+        raise ComparisonError('Select at least two results to compare.')
+    if len(ids) > MAX_SCENARIOS:
+        raise ComparisonError(f'At most {MAX_SCENARIOS} results can be compared at once.')
+    return ids
+
+
+def load_results(user, ids):
+    """Fetch the user's results for ``ids`` in one query, in request order."""
+    found = ROIResult.objects.filter(user=user).select_related('user').in_bulk(ids)
+    missing = [result_id for result_id in ids if result_id not in found]
+    if missing:
+        raise ComparisonError(f'Unknown result id(s): {", ".join(map(str, missing))}')
+    return [found[result_id] for result_id in ids]
+
+
+def comparison_rows(results):
+    """Values and deltas against the first result, one dict per scenario."""
+    baseline = results[0]
+    rows = []
+    for position, result in enumerate(results, start=1):
+        cells = []
+        for field, label, lower_is_better in COMPONENTS:
+            value = getattr(result, field) or 0
+            delta = value - (getattr(baseline, field) or 0)
+            cells.append({
+                'field': field,
+                'value': value,
+                'delta': delta,
+                'text': format_value(field, value),
+                'delta_text': format_delta(field, delta),
+                'better': delta != 0 and (delta < 0) == lower_is_better,
+            })
+        rows.append({
+            'position': position,
+            'result': result,
+            'label': f'#{position} {"Quick" if result.mode == "quick" else "Full"} '
+                     f'{result.timestamp.strftime("%b %d %H:%M")}',
+            'cells': cells,
+        })
+    return rows
+
+
+def format_value(field, value):
+    if field == 'roi_percent':
+        return f'{value:,.1f}%'
+    if field == 'payback_months':
+        return f'{value:,.1f}'
+    return f'${value:,.0f}'
+
+
+def format_delta(field, delta):
+    if delta == 0:
+        return '-'
+    if field == 'roi_percent':
+        return f'{delta:+,.1f}pp'
+    if field == 'payback_months':
+        return f'{delta:+,.1f}'
+    sign = '+' if delta > 0 else '-'
+    return f'{sign}${abs(delta):,.0f}'
+
+
+def _header_row():
+    row = ['Scenario']
+    for _, label, _ in COMPONENTS:
+        # The standard Type 1 fonts have no Greek glyphs, so no 'Δ'.
+        row.extend([label, 'vs #1'])
+    return row
+
+
+def _table(rows, first, report_styles):
+    data = [_header_row()]
+    styles = []
+    for row_index, row in enumerate(rows, start=1):
+        line = [row['label']]
+        for column, cell in enumerate(row['cells']):
+            line.append(cell['text'])
+            line.append(cell['delta_text'])
+            if cell['delta']:
+                delta_column = 2 + 2 * column
+                styles.append((
+                    'TEXTCOLOR', (delta_column, row_index), (delta_column, row_index),
+                    report_styles.comparison_better if cell['better'] else report_styles.comparison_worse,
+                ))
+        data.append(line)
+    # Fixed widths and heights skip ReportLab's per-cell measuring pass.
+    table = Table(data, colWidths=_COL_WIDTHS, rowHeights=_ROW_HEIGHT, repeatRows=1)
+    table.setStyle(report_styles.comparison_table)
+    if first:
+        styles = report_styles.comparison_baseline + styles
+    if styles:
+        table.setStyle(TableStyle(styles))
+    return table
+
+
+def build_comparison_pdf(results, output):
+    """Render the comparison of ``results`` into the binary file-like ``output``."""
+    rows = comparison_rows(results)
+    styles = get_report_styles()
+    doc = SimpleDocTemplate(
+        output, pagesize=_PAGE_SIZE, leftMargin=0.4 * inch, rightMargin=0.4 * inch,
+        topMargin=0.5 * inch, bottomMargin=0.5 * inch,
+        title='ROI Scenario Comparison',
+    )
+    story = [
+        Paragraph('ROI Scenario Comparison', styles.comparison_title),
+        Paragraph(
+            f'{len(rows)} scenarios for {results[0].user.username}. '
+            f'Deltas are relative to scenario #1.', styles.comparison_subtitle,
+        ),
+    ]
+    for start in range(0, len(rows), ROWS_PER_TABLE):
+        story.append(_table(rows[start:start + ROWS_PER_TABLE], first=start == 0, report_styles=styles))
+        story.append(Spacer(1, 8))
+    story.append(Paragraph(
+        f'Cloud ROI Calculator | Generated: {datetime.datetime.now().strftime("%m/%d/%Y, %I:%M %p")}',
+        styles.comparison_footer,
+    ))
+    doc.build(story)
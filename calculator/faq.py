@@ -0,0 +1,344 @@
+"""
+Local FAQ answering for the chatbot.
+
+A TF-IDF index over a curated FAQ plus the input and formula descriptions
+from the chatbot system prompt. Questions that match an entry closely
+enough are answered here without a Gemini round trip.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .chatbot import INTERROGATIVES, SYSTEM_PROMPT, UsageCounters, normalize_question
+
+CURATED_FAQ = [
+    {
+        'questions': [
+            'What is FCI?',
+            'What does FCI mean?',
+            'What is the failure cost index?',
+        ],
+        'answer': (
+            'FCI is the Failure Cost Index: the share of annual revenue lost to '
+            'outages and failures. The calculator defaults to a current FCI of 2% '
+            'and assumes a 75% reduction in failure costs, which drives the '
+            'Availability Gain.'
+        ),
+    },
+    {
+        'questions': [
+            'How does the ROI calculator work?',
+            'What does this calculator do?',
+            'What are the four gain areas?',
+        ],
+        'answer': (
+            'The calculator estimates ROI from four areas: cloud savings '
+            '(infrastructure optimization), productivity gain (less operational '
+            'toil), performance gain (revenue from faster response times) and '
+            'availability gain (lower failure costs). Their sum is the total '
+            'annual gain, which is compared against the estimated cost to give '
+            'ROI % and payback months.'
+        ),
+    },
+    {
+        'questions': [
+            'What is the difference between quick estimate and full calculator?',
+            'Quick estimate vs full calculator',
+            'Which calculator should I use?',
+        ],
+        'answer': (
+            'Quick Estimate only asks for annual revenue, annual cloud spend and '
+            'number of engineers, and uses default values for everything else. '
+            'The Full Calculator lets you adjust every business, productivity, '
+            'performance and availability input.'
+        ),
+    },
+    {
+        'questions': [
+            'How many free calculations do I get?',
+            'Is the full calculator free?',
+            'Calculation limit',
+        ],
+        'answer': (
+            'Every account gets 5 free Full Calculator calculations. Quick '
+            'Estimates are not limited. After the free calculations are used, a '
+            'one-time payment unlocks unlimited Full Calculator access.'
+        ),
+    },
+    {
+        'questions': [
+            'How do I get unlimited access?',
+            'How do I pay?',
+            'How much does unlimited access cost?',
+        ],
+        'answer': (
+            'Open the Full Calculator after your free calculations are used and '
+            'follow the payment prompt. A one-time payment of ₹1 through Razorpay '
+            'grants unlimited Full Calculator access. Your payments are listed '
+            'under Payment History.'
+        ),
+    },
+    {
+        'questions': [
+            'What is toil?',
+            'What is ops toil?',
+        ],
+        'answer': (
+            'Toil is repetitive, manual operational work. The calculator assumes '
+            'engineers spend 15% of their time on operations, half of which is '
+            'toil, and that automation removes 45% of that toil. The saved '
+            'engineering cost is the Productivity Gain.'
+        ),
+    },
+    {
+        'questions': [
+            'What is ROI percent?',
+            'How is ROI calculated?',
+        ],
+        'answer': (
+            'ROI % compares the total annual gain (cloud savings + productivity '
+            '+ performance + availability gains) with the estimated cost of the '
+            'investment, expressed as a percentage.'
+        ),
+    },
+    {
+        'questions': [
+            'What is the payback period?',
+            'How is the payback period calculated?',
+            'How is payback months calculated?',
+        ],
+        'answer': (
+            'Payback months is how long the total annual gain takes to cover '
+            'the estimated cost: paybackMonths = (12 * estimatedCost) / '
+            'totalAnnualGain.'
+        ),
+    },
+    {
+        'questions': [
+            'Can I export my results to PDF?',
+            'How do I download a report?',
+        ],
+        'answer': (
+            'Yes. Open My Results and click Export PDF on any saved calculation '
+            'to download a report with its metrics, breakdown and inputs.'
+        ),
+    },
+    {
+        'questions': [
+            'How do I delete a calculation?',
+            'How do I clear my results?',
+        ],
+        'answer': (
+            'On the My Results page each calculation has a Delete button, and '
+            'Delete All removes every saved calculation.'
+        ),
+    },
+]
+
+_INPUT_RE = re.compile(r'^- (\w+): (.+?) \((.+)\)$', re.MULTILINE)
+_FORMULA_RE = re.compile(r'^\d+\. ([^:\n]+):\n((?:\n?   .+\n?)+)', re.MULTILINE)
+
+
+def _humanize(name):
+    """'costPer1PctFCI' -> 'cost per 1 pct fci'."""
+    words = re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+', name)
+    return ' '.join(word.lower() for word in words)
+
+
+def prompt_entries(prompt=SYSTEM_PROMPT):
+    """Build FAQ entries from the input and formula sections of the prompt."""
+    entries = []
+    for name, default, description in _INPUT_RE.findall(prompt):
+        description = description.replace(' - fixed', '')
+        label = _humanize(name)
+        entries.append({
+            'questions': [
+                f'What is {label}?',
+                f'What is {name}?',
+                description,
+            ],
+            'answer': f'{name} is the {description[0].lower()}{description[1:]}. '
+                      f'The default value is {default}.',
+        })
+    for title, body in _FORMULA_RE.findall(prompt):
+        formula = '\n'.join(line.strip() for line in body.strip().splitlines() if line.strip())
+        entries.append({
+            'questions': [
+                f'How is {title.lower()} calculated?',
+                f'What is the formula for {title.lower()}?',
+            ],
+            'answer': f'{title} is calculated as:\n{formula}',
+        })
+    return entries
+
+
+class FAQIndex:
+    """TF-IDF index over FAQ question variants.
+
+    Questions are scored against their full set of terms: terms the index
+    has never seen count towards the question's length with the weight of
+    an unseen term, so "How do I pay with UPI?" does not match "How do I
+    pay?" just because "upi" is dropped by the vectorizer. A question must
+    also have at least ``min_coverage`` of its content words in the
+    vocabulary, and questions with figures in them are about the asker's
+    own numbers, which no canned answer covers.
+
+    scikit-learn is imported and the vectorizer fitted on first use, so
+    requests that never reach the chatbot do not pay for it.
+    """
+
+    min_coverage = 0.75
+
+    def __init__(self, entries=None, threshold=None):
+        self.entries = entries if entries is not None else CURATED_FAQ + prompt_entries()
+        self.threshold = threshold if threshold is not None else getattr(
+            settings, 'CHATBOT_FAQ_THRESHOLD', 0.6
+        )
+        self._vectorizer = None
+        self._analyzer = None
+        self._matrix = None
+        self._unseen_idf = 0.0
+        self._owners = []
+        self._lock = threading.Lock()
+
+    def _build(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import normalize
+
+        documents = []
+        owners = []
+        for position, entry in enumerate(self.entries):
+            for question in entry['questions']:
+                documents.append(question)
+                owners.append(position)
+        # Queries are normalized in search(), together with their unknown terms.
+        vectorizer = TfidfVectorizer(
+            preprocessor=normalize_question, ngram_range=(1, 2), sublinear_tf=True, norm=None
+        )
+        self._matrix = normalize(vectorizer.fit_transform(documents))
+        # The smoothed idf of a term that is in no document.
+        self._unseen_idf = math.log(len(documents) + 1) + 1
+        self._owners = owners
+        self._analyzer = vectorizer.build_analyzer()
+        self._vectorizer = vectorizer
+
+    def search(self, question):
+        """Return (entry, score) for the closest FAQ entry, or (None, 0.0)."""
+        if self._vectorizer is None:
+            with self._lock:
+                if self._vectorizer is None:
+                    self._build()
+        terms = Counter(self._analyzer(question))
+        vocabulary = self._vectorizer.vocabulary_
+        words = [term for term in terms if ' ' not in term and term not in INTERROGATIVES]
+        if any(word.isdigit() for word in words):
+            return None, 0.0
+        if words and sum(word in vocabulary for word in words) < self.min_coverage * len(words):
+            return None, 0.0
+        query = self._vectorizer.transform([question])
+        if not query.nnz:
+            return None, 0.0
+        # Same sublinear tf weighting as the vectorizer.
+        unknown = sum(
+            ((1 + math.log(count)) * self._unseen_idf) ** 2
+            for term, count in terms.items() if term not in vocabulary
+        )
+        norm = math.sqrt(query.multiply(query).sum() + unknown)
+        # Matrix rows are L2-normalized, so this is the cosine similarity.
+        scores = (self._matrix @ query.T).toarray().ravel() / norm
+        best = int(scores.argmax())
+        return self.entries[self._owners[best]], float(scores[best])
+
+    def answer(self, question):
+        """Return the FAQ answer if the best match clears the threshold."""
+        entry, score = self.search(question)
+        if entry is not None and score >= self.threshold:
+            return entry['answer']
+        return None
+
+
+class FAQStats:
+    """Counts how many questions were answered locally vs. by Gemini.
+
+    Latencies are accumulated in microseconds so they can share the
+    integer counters used for the answer cache statistics.
+    """
+
+    def __init__(self):
+        alias = getattr(settings, 'CHATBOT_CACHE_ALIAS', 'default')
+        self.counters = UsageCounters(
+            'chatbot:faq', ('local', 'upstream', 'local_us', 'upstream_us'), alias
+        )
+
+    def record_local(self, seconds):
+        self.counters.incr('local')
+        self.counters.incr('local_us', int(seconds * 1_000_000))
+
+    def record_upstream(self, seconds):
+        self.counters.incr('upstream')
+        self.counters.incr('upstream_us', int(seconds * 1_000_000))
+
+    def reset(self):
+        self.counters.reset()
+
+    def stats(self):
+        return {
+            'process': _summarize(self.counters.process),
+            'shared': _summarize(self.counters.shared()),
+        }
+
+
+def _summarize(counts):
+    local, upstream = counts['local'], counts['upstream']
+    total = local + upstream
+    avg_local = counts['local_us'] / local / 1000 if local else 0.0
+    avg_upstream = counts['upstream_us'] / upstream / 1000 if upstream else None
+    saved = (avg_upstream - avg_local) * local if avg_upstream is not None else None
+    return {
+        'local': local,
+        'upstream': upstream,
+        'local_fraction': round(local / total, 4) if total else 0.0,
+        'avg_local_ms': round(avg_local, 3),
+        'avg_upstream_ms': round(avg_upstream, 3) if avg_upstream is not None else None,
+        # Estimated from the average upstream latency seen by the same counters.
+        'latency_saved_ms': round(saved, 1) if saved is not None else None,
+    }
+
+
+_faq_index = None
+_faq_stats = None
+_faq_lock = threading.Lock()
+
+
+def get_faq_index():
+    """Return the process-wide FAQIndex, creating it on first use."""
+    global _faq_index
+    if _faq_index is None:
+        with _faq_lock:
+            if _faq_index is None:
+                _faq_index = FAQIndex()
+    return _faq_index
+
+
+def get_faq_stats():
+    """Return the process-wide FAQStats, creating it on first use."""
+    global _faq_stats
+    if _faq_stats is None:
+        with _faq_lock:
+            if _faq_stats is None:
+                _faq_stats = FAQStats()
+    return _faq_stats
+
+
+def answer_locally(question):
+    """Answer from the FAQ index, recording the outcome; None means ask Gemini."""
+    start = time.perf_counter()
+    answer = get_faq_index().answer(question)
+    if answer is not None:
+        get_faq_stats().record_local(time.perf_counter() - start)
+    return answer
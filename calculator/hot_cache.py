@@ -0,0 +1,180 @@
+"""
+Cached hot reads: calculation limits, dashboard statistics and history
+chart data.
+
+Each namespace is a TieredCache over ``HOT_CACHE_ALIAS`` with its TTL
+from ``HOT_CACHE_TTLS``. Keys include the user's cache generation: a
+global epoch and a per-user token, both kept in the shared tier. Saving
+or deleting the user, one of their results or their calculation limit
+replaces the user's token once the transaction commits, so every process
+stops using the old entries and none can cache the old rows under the
+new token. Changes to more than ``HOT_CACHE_EPOCH_THRESHOLD`` users at
+once replace the epoch instead, one write however many users changed.
+
+Each process reuses a token it has read for ``HOT_CACHE_GENERATION_TTL``
+seconds, so a hot read served from the process-local tier makes no
+shared-tier round trip at all; the process that made a change sees it
+at once, other processes within that many seconds. The TTLs bound how
+long writes that bypass model signals (queryset updates) stay invisible;
+``invalidate_users`` covers the ones this app makes.
+"""
+
+import threading
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import LRUCache, TieredCache
+from .models import ROIResult, UserCalculationLimit
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+_generations = None
+
+
+def _alias():
+    return getattr(settings, 'HOT_CACHE_ALIAS', 'default')
+
+
+def get_tiered_cache(namespace):
+    """Return the process-wide TieredCache for ``namespace``."""
+    tiered = _namespaces.get(namespace)
+    if tiered is None:
+        with _namespaces_lock:
+            tiered = _namespaces.get(namespace)
+            if tiered is None:
+                tiered = _namespaces[namespace] = TieredCache(
+                    namespace,
+                    ttl=getattr(settings, 'HOT_CACHE_TTLS', {}).get(namespace, 300),
+                    stale_ttl=getattr(settings, 'HOT_CACHE_STALE_TTL', 30),
+                    alias=_alias(),
+                    max_entries=getattr(settings, 'HOT_CACHE_MAX_ENTRIES', 10000),
+                )
+    return tiered
+
+
+def _local_generations():
+    global _generations
+    if _generations is None:
+        with _namespaces_lock:
+            if _generations is None:
+                _generations = LRUCache(
+                    max_entries=getattr(settings, 'HOT_CACHE_MAX_ENTRIES', 10000),
+                    ttl=getattr(settings, 'HOT_CACHE_GENERATION_TTL', 2),
+                )
+    return _generations
+
+
+@receiver(setting_changed)
+def _reset_namespaces(setting, **kwargs):
+    global _generations
+    if setting.startswith('HOT_CACHE_') or setting == 'CACHES':
+        with _namespaces_lock:
+            _namespaces.clear()
+            _generations = None
+
+
+_EPOCH_KEY = 'hot:generation:epoch'
+
+
+def _generation_key(user_id):
+    return f'hot:generation:user:{user_id}'
+
+
+def _token(key):
+    local = _local_generations()
+    token = local.get(key)
+    if token is not None:
+        return token
+    shared = caches[_alias()]
+    token = shared.get(key)
+    if token is None:
+        # A fresh random token: an evicted generation must never come back.
+        token = uuid.uuid4().hex[:12]
+        if not shared.add(key, token, None):
+            token = shared.get(key, token)
+    local.set(key, token)
+    return token
+
+
+def user_generation(user_id):
+    """The current cache generation of a user; also versions their fragment caches."""
+    return f'{_token(_EPOCH_KEY)}.{_token(_generation_key(user_id))}'
+
+
+def _retire(user_ids):
+    if len(user_ids) > getattr(settings, 'HOT_CACHE_EPOCH_THRESHOLD', 100):
+        # One key instead of one per user: file-based caches pay for every
+        # write with a scan of their directory.
+        keys = [_EPOCH_KEY]
+    else:
+        keys = [_generation_key(user_id) for user_id in user_ids]
+    tokens = {key: uuid.uuid4().hex[:12] for key in keys}
+    caches[_alias()].set_many(tokens, None)
+    local = _local_generations()
+    for key, token in tokens.items():
+        local.set(key, token)
+
+
+def invalidate_users(user_ids):
+    """Retire every cached entry of the given users when the current transaction commits.
+
+    Retiring them earlier would let another process cache the rows as
+    they were before the commit under the new generation.
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _retire(user_ids))
+
+
+def _user_key(user, *parts):
+    return ':'.join(str(part) for part in (user.pk, user_generation(user.pk), *parts))
+
+
+def user_limit(user):
+    """The user's UserCalculationLimit for reading.
+
+    Code that changes the limit should load it from the database instead,
+    so it never saves over a newer row.
+    """
+    return get_tiered_cache('entitlements').get_or_set(
+        _user_key(user), lambda: UserCalculationLimit.objects.get_or_create(user=user)[0]
+    )
+
+
+def user_stats(user):
+    """Counts of the user's saved results and their best ROI, from one query."""
+    def compute():
+        return ROIResult.objects.filter(user=user).aggregate(
+            total=Count('pk'),
+            quick=Count('pk', filter=Q(mode='quick')),
+            full=Count('pk', filter=Q(mode='full')),
+            best_roi=Max('roi_percent'),
+        )
+    return get_tiered_cache('user_stats').get_or_set(_user_key(user), compute)
+
+
+def history_payload(user, filter_range, build):
+    """The history chart data for ``filter_range``, computed by ``build()`` on a miss."""
+    return get_tiered_cache('history').get_or_set(_user_key(user, filter_range), build)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
+
+
+@receiver(post_save, sender=ROIResult)
+@receiver(post_delete, sender=ROIResult)
+@receiver(post_save, sender=UserCalculationLimit)
+@receiver(post_delete, sender=UserCalculationLimit)
+def _user_data_changed(sender, instance, **kwargs):
+    invalidate_users([instance.user_id])
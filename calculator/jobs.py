@@ -0,0 +1,200 @@
+"""
+A small job queue kept in the database; ``manage.py run_jobs`` is the worker.
+
+    @jobs.task('render_pdf', max_attempts=3)
+    def render_pdf(result_id):
+        ...
+
+    jobs.enqueue('render_pdf', {'result_id': result.pk}, user=request.user)
+
+The payload is passed to the task as keyword arguments and the task's
+return value, which must be JSON-serializable, is stored as the result.
+The built-in tasks live in ``calculator.tasks``.
+
+A worker claims jobs with one UPDATE that marks up to N due jobs as
+running under a fresh claim token, with a lease (``locked_until``).
+The database serializes concurrent UPDATEs (SQLite takes its write
+lock), so two workers never claim the same job and no broker is needed.
+While a job runs, its worker keeps extending the lease. If the worker
+dies, the lease runs out and the job becomes claimable again: the lease
+is the job's visibility timeout. Tasks should therefore be idempotent.
+
+A task that raises is retried after an exponential backoff with jitter
+until it has been attempted ``max_attempts`` times, and is then marked
+failed. So is one whose result cannot be stored as JSON. Writes that
+find the database locked are retried briefly; if the outcome still
+cannot be recorded it is logged, and the job runs again once its lease
+expires.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+TASKS = {}
+
+logger = logging.getLogger(__name__)
+
+
+def task(name, max_attempts=None):
+    """Register the decorated function as the task for jobs of kind ``name``."""
+    def register(fn):
+        TASKS[name] = (fn, max_attempts)
+        return fn
+    return register
+
+
+def get_task(kind):
+    from . import tasks  # noqa: F401 (registers the built-in tasks)
+
+    return TASKS.get(kind, (None, None))
+
+
+def enqueue(kind, payload=None, user=None, delay=0, max_attempts=None):
+    """Queue a job of a registered ``kind``; it may run after ``delay`` seconds."""
+    from .models import Job
+
+    fn, task_max_attempts = get_task(kind)
+    if fn is None:
+        raise ValueError(f'Unknown job kind {kind!r}')
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        user=user,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or task_max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5),
+    )
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 300))
+
+
+def claim(worker_id, limit):
+    """Claim up to ``limit`` due jobs for ``worker_id``; return them."""
+    from .models import Job
+
+    now = timezone.now()
+    # Jobs whose last attempt's lease ran out cannot be retried.
+    Job.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=now, locked_by='', locked_until=None,
+        last_error='The worker running the last attempt stopped before it finished.',
+    )
+    claimable = (
+        Q(status='queued', run_after__lte=now)
+        | Q(status='running', locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+    token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    due = Job.objects.filter(claimable).order_by('run_after', 'pk').values('pk')[:limit]
+    claimed = Job.objects.filter(claimable, pk__in=due).update(
+        status='running', locked_by=token, locked_until=now + _lease(), attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(locked_by=token)) if claimed else []
+
+
+def extend_leases(tokens):
+    """Push back the leases of the running jobs claimed under ``tokens``."""
+    from .models import Job
+
+    if tokens:
+        Job.objects.filter(status='running', locked_by__in=tokens).update(
+            locked_until=timezone.now() + _lease()
+        )
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    base = getattr(settings, 'JOB_RETRY_BASE_DELAY', 10)
+    cap = getattr(settings, 'JOB_RETRY_MAX_DELAY', 60 * 60)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    # Jitter keeps jobs that failed together from retrying together.
+    return random.uniform(delay / 2, delay)
+
+
+def init_worker():
+    # Spawned pool processes start from a fresh interpreter, and unpickle
+    # this function before Django is set up; that is why this module only
+    # imports models inside its functions.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roi_calculator.settings')
+        django.setup()
+
+
+def _retrying(call, attempts=5):
+    """``call()``, retried with a short backoff while the database is locked."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return call()
+        except OperationalError:
+            if attempt == attempts:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def _failed(error):
+    return dict(status='failed', finished_at=timezone.now(), locked_by='', locked_until=None, last_error=error)
+
+
+def execute(job_id, token):
+    """Run one claimed job and record the outcome. Runs inside a pool worker.
+
+    Every write is conditional on the claim token, so a worker whose lease
+    expired and was taken over cannot overwrite the newer attempt.
+    """
+    from .models import Job
+
+    mine = Job.objects.filter(pk=job_id, locked_by=token, status='running')
+    try:
+        job = _retrying(mine.first)
+        if job is None:
+            return
+        fn, _ = get_task(job.kind)
+        if fn is None:
+            _retrying(lambda: mine.update(**_failed(f'Unknown job kind {job.kind!r}')))
+            return
+        try:
+            result = fn(**job.payload)
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            if job.attempts >= job.max_attempts:
+                outcome = _failed(error)
+            else:
+                outcome = dict(
+                    status='queued', run_after=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+                    locked_by='', locked_until=None, last_error=error,
+                )
+        else:
+            try:
+                json.dumps(result, cls=Job._meta.get_field('result').encoder)
+            except (TypeError, ValueError) as exc:
+                # Another attempt would return the same.
+                outcome = _failed(f'The task returned a result that cannot be stored: {exc}')
+            else:
+                outcome = dict(
+                    status='succeeded', result=result, finished_at=timezone.now(), locked_by='', locked_until=None,
+                    last_error='',
+                )
+        _retrying(lambda: mine.update(**outcome))
+    except DatabaseError:
+        logger.exception('Could not record the outcome of job %s; it runs again once its lease expires.', job_id)
+
+
+def run_in_worker(job_id, token):
+    """``execute`` for pool threads and processes, which are reused between jobs."""
+    try:
+        execute(job_id, token)
+    finally:
+        connection.close()
@@ -0,0 +1,313 @@
+"""
+Process-wide client for the Gemini model behind the chatbot.
+
+The client is configured once per process and reused by every request.
+Identical concurrent prompts share one upstream call (single-flight),
+and a circuit breaker fails fast while the upstream is unhealthy instead
+of tying up workers on calls that are going to time out anyway.
+
+Two interchangeable backends are provided: the google-generativeai SDK
+and a plain REST backend that talks to the same HTTP API over a pooled
+``requests.Session`` (and can be pointed at a local stub server).
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from .caching import FlightTimeout, SingleFlight
+from .chatbot import GEMINI_MODEL_NAME
+from .perf import outbound
+
+GENERATION_CONFIG = {
+    'max_output_tokens': 500,
+    'temperature': 0.7,
+}
+
+
+class LLMError(Exception):
+    """The upstream model call failed."""
+
+    # Client-side problems (bad request, bad key) say nothing about the
+    # health of the upstream, so they do not count against the breaker.
+    trips_breaker = True
+
+
+class LLMRequestError(LLMError):
+    trips_breaker = False
+
+
+class LLMTimeout(LLMError):
+    pass
+
+
+class LLMUnavailable(LLMError):
+    """The circuit breaker is open; the upstream was not called."""
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then a single trial
+    call is let through: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    raise LLMUnavailable('The assistant is temporarily unavailable.')
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise LLMUnavailable('The assistant is temporarily unavailable.')
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def release(self):
+        """Forget a call that ended without a verdict (e.g. the client left)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class GeminiSDKBackend:
+    """Backend using the google-generativeai SDK, configured once."""
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL_NAME):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.generation_config = genai.types.GenerationConfig(**GENERATION_CONFIG)
+
+    def _call(self, prompt, timeout, stream):
+        from google.api_core import exceptions as core_exceptions
+
+        try:
+            return self.model.generate_content(
+                prompt,
+                generation_config=self.generation_config,
+                stream=stream,
+                request_options={'timeout': timeout},
+            )
+        except core_exceptions.DeadlineExceeded as exc:
+            raise LLMTimeout(str(exc)) from exc
+        except (core_exceptions.InvalidArgument, core_exceptions.PermissionDenied) as exc:
+            raise LLMRequestError(str(exc)) from exc
+
+    def generate(self, prompt, timeout):
+        return self._call(prompt, timeout, stream=False).text
+
+    def stream(self, prompt, timeout):
+        for chunk in self._call(prompt, timeout, stream=True):
+            yield chunk.text
+
+
+class GeminiRESTBackend:
+    """Backend speaking the Gemini REST API over a pooled HTTP session."""
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL_NAME, base_url=None, pool_size=None):
+        import requests
+
+        self._requests = requests
+        self.base_url = (base_url or 'https://generativelanguage.googleapis.com').rstrip('/')
+        self.model_name = model_name
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'x-goog-api-key': api_key,
+        })
+        pool_size = pool_size or getattr(settings, 'CHATBOT_LLM_POOL_SIZE', 10)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _payload(self, prompt):
+        return json.dumps({
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': {
+                'maxOutputTokens': GENERATION_CONFIG['max_output_tokens'],
+                'temperature': GENERATION_CONFIG['temperature'],
+            },
+        })
+
+    def _post(self, method, prompt, timeout, stream=False, params=None):
+        url = f'{self.base_url}/v1beta/models/{self.model_name}:{method}'
+        requests = self._requests
+        try:
+            response = self.session.post(
+                url, data=self._payload(prompt), params=params, timeout=timeout, stream=stream
+            )
+        except requests.Timeout as exc:
+            raise LLMTimeout(str(exc)) from exc
+        except requests.RequestException as exc:
+            raise LLMError(str(exc)) from exc
+        if response.status_code >= 400:
+            detail = response.text[:200]
+            response.close()
+            error_class = LLMRequestError if response.status_code < 500 and response.status_code != 429 else LLMError
+            raise error_class(f'Gemini returned HTTP {response.status_code}: {detail}')
+        return response
+
+    @staticmethod
+    def _text(payload):
+        parts = payload['candidates'][0]['content']['parts']
+        return ''.join(part.get('text', '') for part in parts)
+
+    def generate(self, prompt, timeout):
+        response = self._post('generateContent', prompt, timeout)
+        try:
+            return self._text(response.json())
+        except (ValueError, KeyError, IndexError) as exc:
+            raise LLMError(f'Unexpected Gemini response: {exc}') from exc
+
+    def stream(self, prompt, timeout):
+        response = self._post(
+            'streamGenerateContent', prompt, timeout, stream=True, params={'alt': 'sse'}
+        )
+        # Closing the response (also on GeneratorExit) drops the connection
+        # and so cancels the upstream generation.
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith('data:'):
+                        yield self._text(json.loads(line[5:]))
+            except self._requests.Timeout as exc:
+                raise LLMTimeout(str(exc)) from exc
+            except self._requests.RequestException as exc:
+                raise LLMError(str(exc)) from exc
+
+
+class LLMClient:
+    """Single-flight, circuit-broken front end to a model backend."""
+
+    def __init__(self, backend, timeout=20, breaker=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.flights = SingleFlight()
+
+    def _guarded(self, fn):
+        self.breaker.before_call()
+        try:
+            result = fn()
+        except Exception as exc:
+            if getattr(exc, 'trips_breaker', True):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def generate(self, prompt):
+        """Return the full answer; identical concurrent prompts share one call."""
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        try:
+            return self.flights.do(
+                key,
+                lambda: self._guarded(self._timed_generate(prompt)),
+                wait_timeout=self.timeout,
+            )
+        except FlightTimeout:
+            raise LLMTimeout('Timed out waiting for an identical request.') from None
+
+    def _timed_generate(self, prompt):
+        def call():
+            with outbound('gemini'):
+                return self.backend.generate(prompt, self.timeout)
+        return call
+
+    def stream(self, prompt):
+        """Yield answer fragments as the upstream produces them."""
+        self.breaker.before_call()
+        finished = False
+        try:
+            with outbound('gemini'):
+                for text in self.backend.stream(prompt, self.timeout):
+                    yield text
+            finished = True
+        except Exception as exc:
+            finished = True
+            if getattr(exc, 'trips_breaker', True):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        finally:
+            if not finished:
+                # The consumer went away mid-stream.
+                self.breaker.release()
+        self.breaker.record_success()
+
+
+def build_llm_client():
+    """Create an LLMClient from the CHATBOT_LLM_* and GEMINI_* settings."""
+    api_key = getattr(settings, 'GEMINI_API_KEY', None)
+    backend_name = getattr(settings, 'CHATBOT_LLM_BACKEND', 'sdk')
+    if backend_name == 'rest':
+        backend = GeminiRESTBackend(api_key, base_url=getattr(settings, 'GEMINI_API_BASE_URL', None))
+    else:
+        backend = GeminiSDKBackend(api_key)
+    breaker = CircuitBreaker(
+        failure_threshold=getattr(settings, 'CHATBOT_BREAKER_FAILURE_THRESHOLD', 5),
+        reset_timeout=getattr(settings, 'CHATBOT_BREAKER_RESET_TIMEOUT', 30),
+    )
+    return LLMClient(backend, timeout=getattr(settings, 'CHATBOT_LLM_TIMEOUT', 20), breaker=breaker)
+
+
+_client = None
+_client_signature = None
+_client_lock = threading.Lock()
+
+
+def _settings_signature():
+    return (
+        getattr(settings, 'GEMINI_API_KEY', None),
+        getattr(settings, 'CHATBOT_LLM_BACKEND', 'sdk'),
+        getattr(settings, 'GEMINI_API_BASE_URL', None),
+        getattr(settings, 'CHATBOT_LLM_TIMEOUT', 20),
+    )
+
+
+def get_llm_client():
+    """Return the process-wide LLMClient, (re)building it if settings changed."""
+    global _client, _client_signature
+    signature = _settings_signature()
+    if _client is None or _client_signature != signature:
+        with _client_lock:
+            if _client is None or _client_signature != signature:
+                _client = build_llm_client()
+                _client_signature = signature
+    return _client
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from calculator import admin_report
+
+
+class Command(BaseCommand):
+    help = 'Per-user activity report (calculations, payments, limits) as text, CSV or JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['text', 'csv', 'json'], default='text')
+        parser.add_argument('--output', help='Write to this file instead of stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=admin_report.CHUNK_SIZE,
+            help='Users fetched (and held in memory) per batch.',
+        )
+
+    def handle(self, *args, **options):
+        rows = admin_report.iter_user_rows(chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                self.write(output, rows, options['format'])
+        else:
+            self.write(self.stdout, rows, options['format'])
+
+    def write(self, output, rows, fmt):
+        if fmt == 'csv':
+            admin_report.write_csv(output, rows)
+        elif fmt == 'json':
+            admin_report.write_json(output, rows, admin_report.summary())
+        else:
+            admin_report.write_text(output, rows, admin_report.summary())
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh the planner statistics (ANALYZE). The admin changelists of large tables '
+        'show row counts from them; on SQLite there are none until this has run once. '
+        'Run it from cron, e.g. daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default "default").')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                tables = connection.introspection.django_table_names(only_existing=True)
+                cursor.execute('ANALYZE TABLE ' + ', '.join(connection.ops.quote_name(table) for table in tables))
+                cursor.fetchall()
+            else:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS(f'Analyzed {connection.vendor} database {options["database"]!r}.'))
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator import roi_engine
+
+
+class Command(BaseCommand):
+    help = 'Generate static/js/roi_engine.js from the ROI formulas in calculator/roi_engine.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only fail if the file is out of date.')
+
+    def handle(self, *args, **options):
+        path = Path(settings.BASE_DIR) / 'static' / 'js' / 'roi_engine.js'
+        source = roi_engine.js_source()
+        current = path.read_text(encoding='utf-8') if path.exists() else None
+        if options['check']:
+            if current != source:
+                raise CommandError(f'{path} is out of date; run `python manage.py build_roi_js`.')
+            self.stdout.write(f'{path} is up to date.')
+            return
+        if current == source:
+            self.stdout.write(f'{path} is up to date.')
+            return
+        path.write_text(source, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
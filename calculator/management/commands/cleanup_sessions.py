@@ -0,0 +1,36 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired rows from django_session in batches. Unlike clearsessions, '
+        'this never holds the SQLite write lock for more than one short batch. '
+        'Run it from cron, e.g. hourly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per DELETE (default 500).')
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Seconds to sleep between batches so requests can write (default 0.05).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        deleted = batches = 0
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            batches += 1
+            if len(keys) < batch_size:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s) in {batches} batch(es).'))
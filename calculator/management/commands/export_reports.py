@@ -0,0 +1,55 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.bulk_export import ReportExporter
+from calculator.models import ROIResult
+
+
+class Command(BaseCommand):
+    help = 'Write one ZIP of PDF reports per customer, rendering in a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Customers to export (default: every user with saved results).',
+        )
+        parser.add_argument('--output-dir', default='.', help='Directory for the ZIP files.')
+        parser.add_argument('--workers', type=int, help='Render processes (default: BULK_EXPORT_WORKERS).')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('username')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f'Unknown user(s): {", ".join(sorted(missing))}')
+        else:
+            users = users.filter(roiresult__isnull=False).distinct()
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        exporter = ReportExporter(workers=options['workers'])
+        try:
+            for user in users:
+                self.export_user(exporter, user, options['output_dir'])
+        finally:
+            exporter.close()
+
+    def export_user(self, exporter, user, output_dir):
+        results = ROIResult.objects.filter(user=user).select_related('user').order_by('-timestamp')
+        total = results.count()
+        path = os.path.join(output_dir, f'ROI_Reports_{user.username}.zip')
+
+        def report(done, total):
+            self.stderr.write(f'\r{user.username}: {done}/{total}', ending='')
+            self.stderr.flush()
+
+        # Written under a temporary name, so a download never sees half an archive.
+        with open(f'{path}.part', 'wb') as output:
+            for chunk in exporter.stream_zip(results.iterator(chunk_size=100), total=total, on_progress=report):
+                output.write(chunk)
+        os.replace(f'{path}.part', path)
+        if total:
+            self.stderr.write('')
+        self.stdout.write(self.style.SUCCESS(f'{path}: {total} report(s)'))
@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from calculator import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (calculator.jobs) in a pool of threads or processes. '
+        'Several workers, on one or more hosts, can share the queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Jobs run at once (default: JOB_WORKERS).')
+        parser.add_argument(
+            '--pool', choices=['thread', 'process'],
+            help='Run jobs in threads or in spawned processes (default: JOB_POOL).',
+        )
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls when idle (default 1).')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of polling.')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or getattr(settings, 'JOB_WORKERS', 4)
+        pool = options['pool'] or getattr(settings, 'JOB_POOL', 'thread')
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        # Leases are extended well before they can run out.
+        renew_every = getattr(settings, 'JOB_LEASE_SECONDS', 300) / 3
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        previous = signal.signal(signal.SIGTERM, stop)
+        if pool == 'process':
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=jobs.init_worker,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        running = {}  # future -> claim token
+        done = 0
+        renewed = time.monotonic()
+        self.stdout.write(f'{worker_id}: running jobs in {workers} {pool}(s)')
+        try:
+            while not stopping:
+                free = workers - len(running)
+                try:
+                    claimed = jobs.claim(worker_id, free) if free else []
+                except DatabaseError as exc:
+                    self.stderr.write(f'{worker_id}: could not claim jobs: {exc}')
+                    time.sleep(options['poll'])
+                    continue
+                for job in claimed:
+                    running[executor.submit(jobs.run_in_worker, job.pk, job.locked_by)] = job.locked_by
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                finished, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    token = running.pop(future)
+                    # execute() records task errors on the job; anything raised
+                    # here is a failure of the runner itself. The job's lease
+                    # runs out and it is claimed again.
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        self.stderr.write(f'{worker_id}: job claimed as {token} failed in the runner: {exc!r}')
+                    else:
+                        done += 1
+                if time.monotonic() - renewed >= renew_every:
+                    try:
+                        jobs.extend_leases(set(running.values()))
+                    except DatabaseError as exc:
+                        # Tried again on the next pass, well within the lease.
+                        self.stderr.write(f'{worker_id}: could not extend leases: {exc}')
+                    else:
+                        renewed = time.monotonic()
+        except KeyboardInterrupt:
+            stopping = True
+        finally:
+            # Let running jobs finish; jobs that never started are not lost,
+            # their leases simply run out.
+            executor.shutdown(wait=True, cancel_futures=True)
+            signal.signal(signal.SIGTERM, previous)
+        self.stdout.write(self.style.SUCCESS(f'{worker_id}: {done} job(s) run'))
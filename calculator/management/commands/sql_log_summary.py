@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from calculator import query_log
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'max': 'max_ms',
+    'queries': 'queries',
+    'requests': 'requests',
+    'repeat': 'max_repeat',
+}
+
+
+class Command(BaseCommand):
+    help = 'Rank the slow and repeated (N+1) SQL fingerprints recorded in the query log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=sorted(SORT_KEYS), default='total',
+            help='total: summed query time (default), max: slowest single query, '
+                 'queries/requests: how often, repeat: most repeats within one request.',
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--view', help='Only entries logged for this view name.')
+        parser.add_argument('--reason', choices=['slow', 'repeated'], help='Only slow or only repeated entries.')
+        parser.add_argument('--file', help='Log file to read (defaults to SQL_LOG_FILE and its backups).')
+        parser.add_argument('--json', action='store_true', help='Print the ranking as JSON.')
+
+    def handle(self, *args, **options):
+        log = query_log.QueryLog(options['file']) if options['file'] else query_log.get_query_log()
+        entries = (
+            entry for entry in log.read()
+            if (not options['view'] or entry['view'] == options['view'])
+            and (not options['reason'] or options['reason'] in entry['reasons'])
+        )
+        rows = query_log.summarize(entries, sort=SORT_KEYS[options['sort']])[:options['limit']]
+
+        if options['json']:
+            for row in rows:
+                row['reasons'] = sorted(row['reasons'])
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write('No slow or repeated queries logged.')
+            return
+        for rank, row in enumerate(rows, 1):
+            views = ', '.join(
+                f'{view} ({count})' for view, count in sorted(row['views'].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write(
+                f"{rank:>3}. [{row['id']}] {'/'.join(sorted(row['reasons']))}  "
+                f"requests={row['requests']} queries={row['queries']} max_repeat={row['max_repeat']} "
+                f"total={row['total_ms']:.1f}ms max={row['max_ms']:.1f}ms"
+            )
+            self.stdout.write(f'     views: {views}')
+            self.stdout.write(f"     {row['fingerprint']}")
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0003_usercalculationlimit_unlimited_access_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('razorpay_payment_id__isnull', False)), fields=['razorpay_payment_id', 'status'], name='payment_rzp_payment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0004_payment_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roiresult',
+            index=models.Index(fields=['timestamp'], name='roiresult_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roiresult',
+            index=models.Index(fields=['user', '-timestamp'], name='roiresult_user_timestamp_idx'),
+        ),
+    ]
@@ -59,6 +59,12 @@ class ROIResult(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Default ordering, admin changelist and its date_hierarchy.
+            models.Index(fields=['timestamp'], name='roiresult_timestamp_idx'),
+            # results / history views: filter(user=...).order_by('-timestamp')
+            models.Index(fields=['user', '-timestamp'], name='roiresult_user_timestamp_idx'),
+        ]
 
 
 class Payment(models.Model):
@@ -95,9 +101,23 @@ class Payment(models.Model):
     
     def __str__(self):
         return f"Payment {self.payment_id} - {self.user.username} - ₹{self.amount}"
-    
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # razorpay_webhook: filter(razorpay_payment_id=..., status='pending')
+            models.Index(
+                fields=['razorpay_payment_id', 'status'],
+                name='payment_rzp_payment_status_idx',
+                condition=models.Q(razorpay_payment_id__isnull=False),
+            ),
+            # verify_payment / payment_success filter on payment_id, which is
+            # already served by the UNIQUE index on that column.
+            # payment_history: filter(user=...).order_by('-created_at')
+            models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+            # Admin changelist ordering and date_hierarchy.
+            models.Index(fields=['created_at'], name='payment_created_idx'),
+        ]
 
 
 class UserCalculationLimit(models.Model):
@@ -141,3 +161,41 @@ class UserCalculationLimit(models.Model):
     
     class Meta:
         ordering = ['-last_reset_date']
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_jobs`` (see ``calculator.jobs``)."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Not claimed before this time; retries are pushed back by their backoff.
+    run_after = models.DateTimeField(default=timezone.now)
+    # The claiming worker's lease. A running job whose lease has expired is
+    # visible to other workers again.
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Claims: queued jobs that are due, oldest first.
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
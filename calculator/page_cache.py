@@ -0,0 +1,65 @@
+"""
+Full-page cache for anonymous visitors.
+
+``cache_anonymous_page`` stores the HTML a view returns for a visitor
+who is not logged in. Later anonymous GETs for the same path get that
+HTML back without the view or the template running. Logged-in users,
+other methods and requests with pending flash messages always reach the
+view. The CSRF token in a cached form is replaced by a placeholder. Each
+hit puts a token for the current visitor back in, which also sets the
+CSRF cookie as usual. Responses carry ``Vary: Cookie``, so a browser or
+proxy never reuses an anonymous page after login.
+"""
+
+import functools
+import re
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+
+CSRF_PLACEHOLDER = '__csrf_token__'
+_CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def _cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # Flash messages are rendered into the page (and consumed by it).
+        and not len(get_messages(request))
+    )
+
+
+def cache_anonymous_page(view):
+    """Serve ``view``'s anonymous GET responses from the cache for ``PAGE_CACHE_TTL`` seconds."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        ttl = getattr(settings, 'PAGE_CACHE_TTL', 600)
+        if not ttl or not _cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key = f'page:{request.path}'
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            if CSRF_PLACEHOLDER in content:
+                content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                content = response.content.decode(response.charset)
+                match = _CSRF_INPUT.search(content)
+                if match:
+                    content = content.replace(match.group(1), CSRF_PLACEHOLDER)
+                cache.set(key, (content, response['Content-Type']), ttl)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+    return wrapper
+
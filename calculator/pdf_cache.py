@@ -0,0 +1,184 @@
+"""
+On-disk cache of rendered PDF reports.
+
+Saved results never change, so a report only needs rendering once per
+result and report template version. Files are named
+``<result id>-<template version>.pdf``; the least recently served files
+are evicted once the directory grows past ``PDF_CACHE_MAX_BYTES``.
+Eviction scans the directory, so each process only scans when its own
+writes since the last scan could have taken the cache past the limit,
+or when ``evict_interval`` seconds have passed (other processes write
+to the same directory).
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import reports
+from .caching import SingleFlight
+
+_renders = SingleFlight()
+
+
+class PDFRenderCache:
+
+    evict_interval = 60
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Path(directory or getattr(
+            settings, 'PDF_CACHE_DIR', Path(settings.BASE_DIR) / '.cache' / 'pdf'
+        ))
+        self.max_bytes = max_bytes if max_bytes is not None else getattr(
+            settings, 'PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024
+        )
+        self._lock = threading.Lock()
+        # Bytes in the directory as of the last scan plus this process's
+        # writes since; None until the first scan.
+        self._estimated_bytes = None
+        self._scanned_at = 0.0
+
+    def path_for(self, result_id):
+        return self.directory / f'{result_id}-{reports.REPORT_TEMPLATE_VERSION}.pdf'
+
+    def open(self, result):
+        """Return an open binary file with the report, rendering it on a miss.
+
+        The file is opened before returning, so a concurrent eviction that
+        unlinks it cannot break a response that is already being served.
+        """
+        path = self.path_for(result.pk)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            # Concurrent misses for one report in this process render it once.
+            _renders.do(str(path), lambda: path.exists() or self._render(result, path))
+            try:
+                handle = open(path, 'rb')
+            except FileNotFoundError:
+                # Evicted by another request before it could be opened:
+                # render again and keep the new file open while serving it.
+                handle = self._render(result, path, keep_open=True)
+        else:
+            # Bump the mtime so eviction sees this entry as recently used.
+            os.utime(path)
+        return handle
+
+    def read(self, result_id):
+        """Return the cached report bytes, or None on a miss (never renders)."""
+        path = self.path_for(result_id)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _render(self, result, path, keep_open=False):
+        return self._write(path, lambda output: reports.build_result_pdf(result, output), keep_open)
+
+    def store(self, result_id, data):
+        """Add a report rendered elsewhere (e.g. in a worker process)."""
+        self._write(self.path_for(result_id), lambda output: output.write(data))
+
+    def _write(self, path, writer, keep_open=False):
+        """Write a report to ``path``; with ``keep_open``, return it open for reading."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename it into place so readers
+        # never see a half-written report.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        output = os.fdopen(fd, 'w+b')
+        try:
+            writer(output)
+            output.flush()
+            written = output.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            output.close()
+            os.unlink(tmp_path)
+            raise
+        # An open handle stays readable even if evict() unlinks the file.
+        self._maybe_evict(written)
+        if not keep_open:
+            output.close()
+            return None
+        output.seek(0)
+        return output
+
+    def _maybe_evict(self, written):
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += written
+            due = (
+                self._estimated_bytes is None
+                or self._estimated_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at >= self.evict_interval
+            )
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used reports until the cache fits max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._estimated_bytes = total
+            self._scanned_at = time.monotonic()
+
+    def invalidate(self, result_ids):
+        """Drop every cached report (any template version) for the given results."""
+        for result_id in result_ids:
+            for path in self.directory.glob(f'{result_id}-*.pdf'):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Return the process-wide PDFRenderCache for the current settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PDFRenderCache()
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_cache(setting, **kwargs):
+    global _cache
+    if setting.startswith('PDF_CACHE_'):
+        with _cache_lock:
+            _cache = None
@@ -0,0 +1,321 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` measures every request:
+- wall time
+- number and total time of database queries
+- time spent rendering templates
+- time spent in outbound calls (wrap them in ``outbound('<service>')``)
+
+The numbers are sent back in a ``Server-Timing`` header to staff users,
+to everyone with ``DEBUG`` or ``SERVER_TIMING_PUBLIC`` (they reveal query
+counts and timings, so not by default). They are also added to
+in-process histograms keyed by URL name, which ``metrics_view``
+exposes in the Prometheus text format. Histograms are per process; with
+several workers, scrape each one (or sum them in Prometheus).
+
+With ``SQL_OBSERVER_ENABLED`` the same database hook also fingerprints
+each query, and the slow and repeated fingerprints are written to the
+query log (see ``query_log``). ``observe_queries()`` does the same for
+code that runs outside a request, such as scripts and commands.
+"""
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+from . import query_log
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self, queries=None):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.outbound = {}
+        # query_log.QueryObserver, when the SQL observer is on
+        self.queries = queries
+
+    def add_outbound(self, service, seconds):
+        self.outbound[service] = self.outbound.get(service, 0.0) + seconds
+
+
+def current_timings():
+    """Timings of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def outbound(service):
+    """Time a call to an external service (Gemini, Razorpay, ...)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = _current.get()
+        if timings is not None:
+            timings.add_outbound(service, elapsed)
+        registry.observe('roi_outbound_seconds', {'service': service}, elapsed)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        timings.db_queries += 1
+        timings.db_time += elapsed
+        if timings.queries is not None:
+            timings.queries.record(sql, elapsed)
+
+
+def _install_db_wrapper(connection):
+    # The wrapper stays installed for the life of the connection object and
+    # is a no-op outside a request. Installing it per connection (rather
+    # than around each request with connection.execute_wrapper) also covers
+    # queries run from sync_to_async threads, which use their own
+    # connections but inherit the request's context.
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_db_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+def _activate(timings):
+    for connection in connections.all(initialized_only=True):
+        _install_db_wrapper(connection)
+    return _current.set(timings)
+
+
+@contextmanager
+def observe_queries(label):
+    """Fingerprint the queries run inside the block and log the bad ones under ``label``.
+
+    Always observes, whatever ``SQL_OBSERVER_ENABLED`` says; yields the
+    ``QueryObserver``.
+    """
+    timings = RequestTimings(queries=query_log.QueryObserver())
+    token = _activate(timings)
+    try:
+        yield timings.queries
+    finally:
+        _current.reset(token)
+        query_log.report(label, timings.queries)
+
+
+class TimedTemplate:
+    """Template proxy that adds its render time to the current request."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timings = _current.get()
+            if timings is not None:
+                timings.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose top-level renders are timed.
+
+    Includes and extended templates render inside their parent, so the
+    time is counted once per ``render()``/``TemplateResponse``.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """In-process histograms keyed by metric name and labels."""
+
+    METRICS = {
+        'roi_request_duration_seconds': ('Request wall time.', DURATION_BUCKETS),
+        'roi_request_db_seconds': ('Time spent in database queries per request.', DURATION_BUCKETS),
+        'roi_request_db_queries': ('Database queries per request.', COUNT_BUCKETS),
+        'roi_request_template_seconds': ('Time spent rendering templates per request.', DURATION_BUCKETS),
+        'roi_outbound_seconds': ('Duration of calls to external services.', DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self._histograms = {name: {} for name in self.METRICS}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = Histogram(self.METRICS[name][1])
+            histogram.observe(value)
+
+    def observe_request(self, view, timings, duration):
+        labels = {'view': view}
+        self.observe('roi_request_duration_seconds', labels, duration)
+        self.observe('roi_request_db_seconds', labels, timings.db_time)
+        self.observe('roi_request_db_queries', labels, timings.db_queries)
+        self.observe('roi_request_template_seconds', labels, timings.template_time)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {name: {} for name in self.METRICS}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in self.METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, histogram in sorted(self._histograms[name].items()):
+                    labels = ','.join(f'{label}="{_escape(value)}"' for label, value in key)
+                    for bound, total in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(float(bound))
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {total}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum!r}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def _server_timing(timings, duration):
+    parts = [
+        f'total;dur={duration * 1000:.1f}',
+        f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_queries} queries"',
+        f'tpl;dur={timings.template_time * 1000:.1f}',
+    ]
+    parts.extend(
+        f'{service};dur={seconds * 1000:.1f}' for service, seconds in sorted(timings.outbound.items())
+    )
+    return ', '.join(parts)
+
+
+def _show_timings(request):
+    if settings.DEBUG or getattr(settings, 'SERVER_TIMING_PUBLIC', False):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+class PerformanceMiddleware:
+    """Record per-request timings; works for both sync and async stacks.
+
+    Streaming responses are measured up to the point the response object
+    is returned, which is when the headers are sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        timings = RequestTimings(queries=query_log.new_observer())
+        return timings, _activate(timings)
+
+    def _finish(self, request, response, timings, token):
+        _current.reset(token)
+        duration = time.perf_counter() - timings.start
+        view = _view_name(request)
+        if _show_timings(request):
+            response['Server-Timing'] = _server_timing(timings, duration)
+        registry.observe_request(view, timings, duration)
+        if timings.queries is not None:
+            query_log.report(view, timings.queries)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = self._start()
+        response = self.get_response(request)
+        return self._finish(request, response, timings, token)
+
+    async def __acall__(self, request):
+        timings, token = self._start()
+        response = await self.get_response(request)
+        return self._finish(request, response, timings, token)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for staff users or ``METRICS_TOKEN`` bearers."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized and token and header.startswith('Bearer '):
+        authorized = hmac.compare_digest(header[7:], token)
+    if not authorized:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
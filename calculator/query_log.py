@@ -0,0 +1,204 @@
+"""
+Slow-query and N+1 log.
+
+When ``SQL_OBSERVER_ENABLED`` is on, ``PerformanceMiddleware`` gives each
+request a ``QueryObserver``. The observer reduces every statement to a
+fingerprint: literals and placeholders become ``?`` and ``IN`` lists
+collapse to ``(...)``. Queries that differ only in their parameters then
+count as the same fingerprint. When the request ends, any fingerprint
+that was slow (``SQL_SLOW_QUERY_MS``) or repeated ``SQL_REPEAT_THRESHOLD``
+times or more is appended to a rotating JSONL file, together with the
+view name. Repeats are the N+1 signature, for example a loop that reads
+``result.user`` for every row. ``manage.py sql_log_summary`` ranks what
+has been logged.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'(\(\s*(?:\?\s*,\s*)*\?\s*\))(?:\s*,\s*\(\s*(?:\?\s*,\s*)*\?\s*\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalise ``sql`` so statements differing only in literals compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint_id(fp):
+    return hashlib.sha1(fp.encode('utf-8')).hexdigest()[:12]
+
+
+class QueryObserver:
+    """Per-request tally of query fingerprints."""
+
+    def __init__(self, slow_ms=None, repeat_threshold=None):
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'SQL_SLOW_QUERY_MS', 100)
+        self.repeat_threshold = repeat_threshold if repeat_threshold is not None else getattr(
+            settings, 'SQL_REPEAT_THRESHOLD', 5
+        )
+        # fingerprint -> [count, total seconds, max seconds, first raw statement]
+        self.stats = {}
+
+    def record(self, sql, seconds):
+        fp = fingerprint(sql)
+        stat = self.stats.get(fp)
+        if stat is None:
+            self.stats[fp] = [1, seconds, seconds, sql]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    def flagged(self):
+        """Entries for the fingerprints that were slow or repeated, worst first."""
+        entries = []
+        for fp, (count, total, longest, sample) in self.stats.items():
+            reasons = []
+            if longest * 1000 >= self.slow_ms:
+                reasons.append('slow')
+            if count >= self.repeat_threshold:
+                reasons.append('repeated')
+            if reasons:
+                entries.append({
+                    'id': fingerprint_id(fp),
+                    'fingerprint': fp,
+                    'sample': sample,
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'max_ms': round(longest * 1000, 3),
+                    'reasons': reasons,
+                })
+        entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return entries
+
+
+class QueryLog:
+    """Append-only JSONL file, rotated by size like a logging handler."""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler = None
+        self._lock = threading.Lock()
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            with self._lock:
+                if self._handler is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._handler = RotatingFileHandler(
+                        self.path, maxBytes=self.max_bytes, backupCount=self.backups,
+                        encoding='utf-8', delay=True,
+                    )
+        return self._handler
+
+    def write(self, view, entries):
+        timestamp = timezone.now().isoformat()
+        for entry in entries:
+            line = json.dumps({'ts': timestamp, 'view': view, **entry})
+            self.handler.handle(logging.makeLogRecord({'msg': line}))
+
+    def files(self):
+        """Log files from oldest to newest."""
+        backups = [self.path.with_name(f'{self.path.name}.{n}') for n in range(self.backups, 0, -1)]
+        return [path for path in backups + [self.path] if path.exists()]
+
+    def read(self):
+        for path in self.files():
+            with open(path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash mid-write.
+                        continue
+
+    def close(self):
+        with self._lock:
+            if self._handler is not None:
+                self._handler.close()
+                self._handler = None
+
+
+def summarize(entries, sort='total_ms'):
+    """Aggregate log entries per fingerprint, sorted worst first by ``sort``."""
+    summary = {}
+    for entry in entries:
+        row = summary.get(entry['id'])
+        if row is None:
+            row = summary[entry['id']] = {
+                'id': entry['id'],
+                'fingerprint': entry['fingerprint'],
+                'sample': entry['sample'],
+                'requests': 0,
+                'queries': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'max_repeat': 0,
+                'reasons': set(),
+                'views': {},
+            }
+        row['requests'] += 1
+        row['queries'] += entry['count']
+        row['total_ms'] += entry['total_ms']
+        row['max_ms'] = max(row['max_ms'], entry['max_ms'])
+        row['max_repeat'] = max(row['max_repeat'], entry['count'])
+        row['reasons'].update(entry['reasons'])
+        row['views'][entry['view']] = row['views'].get(entry['view'], 0) + 1
+    return sorted(summary.values(), key=lambda row: row[sort], reverse=True)
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_query_log():
+    """Return the QueryLog for the current ``SQL_LOG_FILE``."""
+    path = str(getattr(settings, 'SQL_LOG_FILE', Path(settings.BASE_DIR) / 'logs' / 'sql.jsonl'))
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = QueryLog(
+                path,
+                max_bytes=getattr(settings, 'SQL_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backups=getattr(settings, 'SQL_LOG_BACKUPS', 5),
+            )
+    return log
+
+
+def new_observer():
+    """A QueryObserver for the next request, or None when the observer is off."""
+    enabled = getattr(settings, 'SQL_OBSERVER_ENABLED', None)
+    if enabled is None:
+        enabled = settings.DEBUG
+    if not enabled:
+        return None
+    return QueryObserver()
+
+
+def report(view, observer):
+    """Log the slow and repeated fingerprints ``observer`` saw; return them."""
+    entries = observer.flagged()
+    if entries:
+        get_query_log().write(view, entries)
+    return entries
@@ -0,0 +1,336 @@
+"""
+PDF report rendering for saved ROI results.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+
+
+def _source_hash():
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+# Any change to this module changes the version, which invalidates every
+# cached PDF rendered by the previous code.
+REPORT_TEMPLATE_VERSION = _source_hash()
+
+
+def report_filename(result):
+    """Download filename for a result's PDF report."""
+    return f'ROI_Report_{result.user.username}_{result.timestamp.strftime("%Y%m%d_%H%M")}.pdf'
+
+
+class ReportStyles:
+    """Paragraph styles, table styles and fonts shared by every report,
+    including the scenario comparison in ``calculator.comparison``.
+
+    Building ``getSampleStyleSheet()`` and the custom styles is a
+    noticeable part of rendering a short report, so it is done once per
+    process by ``get_report_styles()``. ReportLab itself is only imported
+    at that point.
+    """
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.pdfbase import pdfmetrics
+
+        # Load the font metrics up front rather than during the first layout.
+        for font_name in ('Helvetica', 'Helvetica-Bold'):
+            pdfmetrics.getFont(font_name)
+
+        styles = getSampleStyleSheet()
+        self.normal = styles['Normal']
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2E86AB')
+        )
+        self.subtitle = ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#A23B72')
+        )
+        self.section = ParagraphStyle(
+            'SectionTitle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            textColor=colors.HexColor('#2E86AB')
+        )
+        self._build_table_styles(colors)
+        self._build_comparison_styles(colors, styles)
+
+    def _build_table_styles(self, colors):
+        from reportlab.platypus import TableStyle
+
+        self.card_header_table = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F8F9FA')),
+            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#E3F2FD')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 14),
+            ('FONTSIZE', (1, 0), (1, 0), 16),
+            ('FONTSIZE', (0, 1), (-1, 1), 10),
+            ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
+            ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#1976D2')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E0E0E0'))
+        ])
+        self.metrics_table = TableStyle([
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#E3F2FD')),
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#E8F5E8')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (1, 0), 16),
+            ('FONTSIZE', (0, 1), (1, 1), 10),
+            ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor('#1976D2')),
+            ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#2E7D32')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E0E0E0'))
+        ])
+        self.breakdown_table = TableStyle([
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#E3F2FD')),
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#E8F5E8')),
+            ('BACKGROUND', (0, 2), (0, 2), colors.HexColor('#FFF3E0')),
+            ('BACKGROUND', (1, 2), (1, 2), colors.HexColor('#E1F5FE')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 2), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (1, 2), 14),
+            ('FONTSIZE', (0, 1), (1, 3), 10),
+            ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor('#1976D2')),
+            ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#2E7D32')),
+            ('TEXTCOLOR', (0, 2), (0, 2), colors.HexColor('#F57C00')),
+            ('TEXTCOLOR', (1, 2), (1, 2), colors.HexColor('#0277BD')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E0E0E0'))
+        ])
+        self.inputs_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F5F5F5')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('FONTSIZE', (0, 1), (-1, 1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E0E0E0'))
+        ])
+        self.additional_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F8F9FA')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 0), (1, -1), colors.HexColor('#E9ECEF')),
+            ('BACKGROUND', (2, 0), (3, -1), colors.HexColor('#E9ECEF')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.white),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#F8F9FA'), colors.white])
+        ])
+
+    def _build_comparison_styles(self, colors, styles):
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.platypus import TableStyle
+
+        blue = colors.HexColor('#2E86AB')
+        self.comparison_title = ParagraphStyle(
+            'ComparisonTitle', parent=styles['Heading1'], fontSize=20, spaceAfter=6,
+            alignment=TA_CENTER, textColor=blue,
+        )
+        self.comparison_subtitle = ParagraphStyle(
+            'ComparisonSubtitle', parent=styles['Normal'], fontSize=10, spaceAfter=12,
+            alignment=TA_CENTER, textColor=colors.HexColor('#6C757D'),
+        )
+        self.comparison_footer = ParagraphStyle('ComparisonFooter', parent=styles['Normal'], fontSize=8)
+        self.comparison_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), blue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#E0E0E0')),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        # The baseline row is highlighted in the first table only.
+        self.comparison_baseline = [('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#E3F2FD'))]
+        self.comparison_better = colors.HexColor('#2E7D32')
+        self.comparison_worse = colors.HexColor('#C62828')
+
+
+_report_styles = None
+_report_styles_lock = threading.Lock()
+
+
+def get_report_styles():
+    """Return the process-wide ReportStyles, building it on first use."""
+    global _report_styles
+    if _report_styles is None:
+        with _report_styles_lock:
+            if _report_styles is None:
+                _report_styles = ReportStyles()
+    return _report_styles
+
+
+def build_result_pdf(result, output, styles=None):
+    """Render the PDF report for ``result`` into the binary file-like ``output``.
+
+    ``output`` can be any object with a ``write`` method: a cache file, an
+    ``HttpResponse`` or a socket wrapper; ReportLab writes the finished
+    document to it in one call.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+
+    styles = styles or get_report_styles()
+    doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    
+    # Build the story (content)
+    story = []
+    
+    # Page 1: Card-style layout matching the results page
+    # Header
+    # Only the result's own data appears in the report: cached copies are
+    # served for every later download.
+    calculated_at = result.timestamp.strftime("%m/%d/%y, %I:%M %p")
+    story.append(Paragraph(f"{calculated_at}", styles.normal))
+    story.append(Spacer(1, 20))
+    
+    # Main title
+    story.append(Paragraph("My ROI Results", styles.title))
+    story.append(Paragraph("View and compare your saved calculations", styles.subtitle))
+    story.append(Spacer(1, 30))
+    
+    # Card-style container for the result
+    # Card header with calculation type and timestamp
+    card_header_data = [
+        [f"{'Quick Estimate' if result.mode == 'quick' else 'Full Calculator'}", f"${result.total_annual_gain:,.0f}M"],
+        [f"{result.timestamp.strftime('%b %d, %Y %H:%M')}", "Total Gain"]
+    ]
+    
+    card_header_table = Table(card_header_data, colWidths=[4*inch, 2*inch])
+    card_header_table.setStyle(styles.card_header_table)
+    
+    story.append(card_header_table)
+    story.append(Spacer(1, 20))
+    
+    # Key Metrics section (ROI and Payback)
+    story.append(Paragraph("Key Metrics", styles.section))
+    metrics_data = [
+        [f"{result.roi_percent:.0f}%", f"{result.payback_months:.1f} mo"],
+        ["ROI", "Payback"]
+    ]
+    
+    metrics_table = Table(metrics_data, colWidths=[3*inch, 3*inch])
+    metrics_table.setStyle(styles.metrics_table)
+    
+    story.append(metrics_table)
+    story.append(Spacer(1, 20))
+    
+    # Breakdown section (matching the card layout)
+    story.append(Paragraph("Breakdown", styles.section))
+    breakdown_data = [
+        [f"${result.cloud_savings:,.0f}M", f"${result.productivity_gain:,.0f}M"],
+        ["Cloud", "Productivity"],
+        [f"${result.performance_gain:,.0f}M", f"${result.availability_gain:,.0f}M"],
+        ["Performance", "Availability"]
+    ]
+    
+    breakdown_table = Table(breakdown_data, colWidths=[3*inch, 3*inch])
+    breakdown_table.setStyle(styles.breakdown_table)
+    
+    story.append(breakdown_table)
+    story.append(Spacer(1, 20))
+    
+    # Key Inputs section (matching the card layout)
+    story.append(Paragraph("Key Inputs", styles.section))
+    inputs_data = [
+        [f"${result.annual_revenue:,.0f}M", str(result.num_engineers), f"${result.annual_cloud_spend:,.0f}M"],
+        ["Revenue", "Engineers", "Cloud Spend"]
+    ]
+    
+    inputs_table = Table(inputs_data, colWidths=[2*inch, 2*inch, 2*inch])
+    inputs_table.setStyle(styles.inputs_table)
+    
+    story.append(inputs_table)
+    story.append(PageBreak())
+    
+    # Page 2: Additional Details and Summary
+    story.append(Paragraph("Additional Details", styles.section))
+    # Additional input details
+    additional_data = [
+        ['Engineer Cost/Year:', f'${result.engineer_cost_per_year:,}'],
+        ['Gross Margin:', f'{result.gross_margin:.0f}%'],
+        ['Container App Fraction:', f'{result.container_app_fraction:.0f}%'],
+        ['Compute Spend Fraction:', f'{result.compute_spend_fraction:.0f}%'],
+        ['Cost Sensitive Fraction:', f'{result.cost_sensitive_fraction:.0f}%'],
+        ['Ops Time Fraction:', f'{result.ops_time_fraction * 100:.0f}%'],
+        ['Ops Toil Fraction:', f'{result.ops_toil_fraction * 100:.0f}%'],
+        ['Response Time:', f'{result.avg_response_time_sec * 1000:.0f}ms' if result.avg_response_time_sec else 'N/A'],
+        ['Current FCI Fraction:', f'{result.current_fci_fraction * 100:.0f}%' if result.current_fci_fraction else '5%']
+    ]
+    
+    # Create additional details table
+    additional_table_data = []
+    for i in range(0, len(additional_data), 2):
+        row = []
+        if i < len(additional_data):
+            row.extend(additional_data[i])
+        else:
+            row.extend(['', ''])
+        if i + 1 < len(additional_data):
+            row.extend(additional_data[i + 1])
+        else:
+            row.extend(['', ''])
+        additional_table_data.append(row)
+    
+    additional_table = Table(additional_table_data, colWidths=[2.5*inch, 1.5*inch, 2.5*inch, 1.5*inch])
+    additional_table.setStyle(styles.additional_table)
+    
+    story.append(additional_table)
+    story.append(Spacer(1, 30))
+    
+    # Summary section
+    story.append(Paragraph("Summary", styles.section))
+    summary_text = f"""
+    This ROI analysis shows that {result.user.username} can achieve significant financial benefits through cloud optimization. 
+    The analysis indicates a total annual gain of <b>${result.total_annual_gain:,.0f}</b> with a return on investment of <b>{result.roi_percent:.1f}%</b>. 
+    The payback period is estimated at <b>{result.payback_months:.1f} months</b>.
+    
+    The breakdown shows:
+    • Cloud Savings: ${result.cloud_savings:,.0f}M
+    • Productivity Gains: ${result.productivity_gain:,.0f}M  
+    • Performance Gains: ${result.performance_gain:,.0f}M
+    • Availability Gains: ${result.availability_gain:,.0f}M
+    """
+    story.append(Paragraph(summary_text, styles.normal))
+    story.append(Spacer(1, 20))
+    
+    # Footer
+    footer_text = f"Cloud ROI Calculator | Calculated: {result.timestamp.strftime('%m/%d/%Y, %I:%M:%S %p')} | Report ID: ROI-{result.pk}"
+    story.append(Paragraph(footer_text, styles.normal))
+    
+    
+    # Build PDF
+    doc.build(story)
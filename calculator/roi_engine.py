@@ -0,0 +1,270 @@
+"""
+The ROI formulas, written once as expression trees.
+
+``FORMULAS`` holds one tree per named value, in evaluation order. Each
+tree is built from the input variables and the values named before it,
+using ordinary Python arithmetic. The same trees are emitted twice:
+
+- as Python source, compiled at import time, for ``evaluate()``, which
+  ``calculate_roi`` calls. A NumPy variant of the same source, compiled
+  on first use, backs ``evaluate_many()`` for the batch API
+- as JavaScript, written to ``static/js/roi_engine.js`` by
+  ``manage.py build_roi_js``. The calculator pages use it to update
+  results as the sliders move, without a request.
+
+Both emitters fully parenthesize every operation, so the browser runs
+the same IEEE-754 operations in the same order as the server and gets
+bit-for-bit the same results. After changing a formula, rerun
+``build_roi_js``. The test suite fails while the committed file is
+stale.
+"""
+
+import json
+
+
+class Expr:
+    def __add__(self, other):
+        return BinOp('+', self, other)
+
+    def __radd__(self, other):
+        return BinOp('+', other, self)
+
+    def __sub__(self, other):
+        return BinOp('-', self, other)
+
+    def __rsub__(self, other):
+        return BinOp('-', other, self)
+
+    def __mul__(self, other):
+        return BinOp('*', self, other)
+
+    def __rmul__(self, other):
+        return BinOp('*', other, self)
+
+    def __truediv__(self, other):
+        return BinOp('/', self, other)
+
+    def __rtruediv__(self, other):
+        return BinOp('/', other, self)
+
+    def __gt__(self, other):
+        return BinOp('>', self, other)
+
+
+def _node(value):
+    return value if isinstance(value, Expr) else Const(value)
+
+
+class Const(Expr):
+    def __init__(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f'Unsupported constant {value!r}')
+        self.value = value
+
+    def emit(self, language):
+        return repr(self.value)
+
+
+class Var(Expr):
+    def __init__(self, name):
+        self.name = name
+
+    def emit(self, language):
+        return self.name
+
+
+class BinOp(Expr):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = _node(left)
+        self.right = _node(right)
+
+    def emit(self, language):
+        return f'({self.left.emit(language)} {self.op} {self.right.emit(language)})'
+
+
+class Where(Expr):
+    """``then`` if ``test`` holds, else ``otherwise``."""
+
+    def __init__(self, test, then, otherwise):
+        self.test = _node(test)
+        self.then = _node(then)
+        self.otherwise = _node(otherwise)
+
+    def emit(self, language):
+        test, then, otherwise = (part.emit(language) for part in (self.test, self.then, self.otherwise))
+        if language == 'js':
+            return f'({test} ? {then} : {otherwise})'
+        if language == 'numpy':
+            return f'where({test}, {then}, {otherwise})'
+        return f'({then} if {test} else {otherwise})'
+
+
+INPUTS = (
+    'annual_revenue', 'gross_margin', 'container_app_fraction',
+    'annual_cloud_spend', 'compute_spend_fraction', 'cost_sensitive_fraction',
+    'num_engineers', 'engineer_cost_per_year', 'ops_time_fraction',
+    'ops_toil_fraction', 'toil_reduction_fraction', 'avg_response_time_sec',
+    'exec_time_influence_fraction', 'lat_red_container', 'lat_red_serverless',
+    'revenue_lift_per_100ms', 'current_fci_fraction', 'fci_reduction_fraction',
+    'cost_per_1pct_fci',
+)
+
+# Used for every input the quick estimate does not ask for, and for the
+# full-calculator inputs that have no slider.
+DEFAULTS = {
+    'gross_margin': 80,
+    'container_app_fraction': 90,
+    'compute_spend_fraction': 60,
+    'cost_sensitive_fraction': 50,
+    'engineer_cost_per_year': 150_000,
+    'ops_time_fraction': 15,
+    'ops_toil_fraction': 50,
+    'toil_reduction_fraction': 45,
+    'avg_response_time_sec': 2,
+    'exec_time_influence_fraction': 33,
+    'lat_red_container': 28,
+    'lat_red_serverless': 50,
+    'revenue_lift_per_100ms': 1,
+    'current_fci_fraction': 2,
+    'fci_reduction_fraction': 75,
+    'cost_per_1pct_fci': 1,
+}
+
+OUTPUTS = (
+    'cloud_savings', 'productivity_gain', 'performance_gain', 'availability_gain',
+    'total_annual_gain', 'roi_percent', 'payback_months',
+)
+
+
+def _build():
+    x = {name: Var(name) for name in INPUTS}
+    formulas = {}
+
+    def define(name, expr):
+        formulas[name] = expr
+        return Var(name)
+
+    compute_spend = define('compute_spend', x['annual_cloud_spend'] * (x['compute_spend_fraction'] / 100))
+    cost_sensitive_spend = define('cost_sensitive_spend', compute_spend * (x['cost_sensitive_fraction'] / 100))
+    cloud_savings = define('cloud_savings', cost_sensitive_spend * (
+        (x['container_app_fraction'] / 100) * 0.5 +
+        (1 - x['container_app_fraction'] / 100) * 0.2
+    ))
+
+    productivity_gain = define('productivity_gain', (
+        x['num_engineers'] * x['engineer_cost_per_year'] *
+        (x['ops_time_fraction'] / 100) *
+        (x['ops_toil_fraction'] / 100) *
+        (x['toil_reduction_fraction'] / 100)
+    ))
+
+    weighted_lat_red = define('weighted_lat_red', (
+        (x['container_app_fraction'] / 100) * (x['lat_red_container'] / 100) +
+        (1 - x['container_app_fraction'] / 100) * (x['lat_red_serverless'] / 100)
+    ))
+    time_saved_sec = define('time_saved_sec', x['avg_response_time_sec'] * weighted_lat_red)
+    rev_gain_pct = define('rev_gain_pct', (time_saved_sec / 0.1) * (x['revenue_lift_per_100ms'] / 100))
+    performance_gain = define('performance_gain', (
+        x['annual_revenue'] * rev_gain_pct *
+        (x['gross_margin'] / 100) *
+        (x['exec_time_influence_fraction'] / 100)
+    ))
+
+    fci_cost_fraction = define(
+        'fci_cost_fraction', (x['cost_per_1pct_fci'] / 100) * ((x['current_fci_fraction'] / 100) / 0.01)
+    )
+    fci_cost = define('fci_cost', x['annual_revenue'] * fci_cost_fraction * (x['gross_margin'] / 100))
+    availability_gain = define('availability_gain', fci_cost * (x['fci_reduction_fraction'] / 100))
+
+    total_annual_gain = define(
+        'total_annual_gain', cloud_savings + productivity_gain + performance_gain + availability_gain
+    )
+    estimated_cost = define('estimated_cost', x['annual_cloud_spend'] / 10)
+    define('roi_percent', (
+        total_annual_gain / (estimated_cost + (x['num_engineers'] * x['engineer_cost_per_year']))
+    ) * 100)
+    define('payback_months', Where(total_annual_gain > 0, (12 * estimated_cost) / total_annual_gain, 0))
+    return formulas
+
+
+FORMULAS = _build()
+
+
+def python_source(language='python'):
+    """``evaluate()``; with ``language='numpy'`` it takes arrays and needs ``where`` in scope."""
+    lines = [f'def evaluate({", ".join(INPUTS)}):']
+    lines += [f'    {name} = {expr.emit(language)}' for name, expr in FORMULAS.items()]
+    lines.append('    return {' + ', '.join(f'{name!r}: {name}' for name in OUTPUTS) + '}')
+    return '\n'.join(lines) + '\n'
+
+
+def js_source():
+    """The browser module: ``ROIEngine.compute(inputs)``, or ``module.exports`` under Node."""
+    body = [f'    const {name} = {expr.emit("js")};' for name, expr in FORMULAS.items()]
+    result = ', '.join(f'{name}: {name}' for name in OUTPUTS)
+    return '\n'.join([
+        '// Generated from calculator/roi_engine.py by `python manage.py build_roi_js`. Do not edit.',
+        '(function (root) {',
+        "  'use strict';",
+        f'  const INPUTS = {json.dumps(list(INPUTS))};',
+        f'  const DEFAULTS = {json.dumps(DEFAULTS)};',
+        f'  const OUTPUTS = {json.dumps(list(OUTPUTS))};',
+        '',
+        '  // Missing inputs take DEFAULTS; every input must end up a finite number.',
+        '  function compute(inputs) {',
+        '    const values = Object.assign({}, DEFAULTS, inputs);',
+        '    for (const name of INPUTS) {',
+        "      if (typeof values[name] !== 'number' || !isFinite(values[name])) {",
+        "        throw new TypeError('ROIEngine: ' + name + ' must be a finite number');",
+        '      }',
+        '    }',
+        f'    const {{{", ".join(INPUTS)}}} = values;',
+        *body,
+        f'    return {{{result}}};',
+        '  }',
+        '',
+        '  const engine = {INPUTS, DEFAULTS, OUTPUTS, compute};',
+        "  if (typeof module === 'object' && module.exports) {",
+        '    module.exports = engine;',
+        '  } else {',
+        '    root.ROIEngine = engine;',
+        '  }',
+        '})(this);',
+        '',
+    ])
+
+
+_namespace = {}
+exec(compile(python_source(), '<roi_engine>', 'exec'), _namespace)
+_evaluate = _namespace['evaluate']
+
+
+def evaluate(inputs):
+    """Unrounded OUTPUTS for ``inputs``; missing inputs take DEFAULTS."""
+    values = {**DEFAULTS, **inputs}
+    return _evaluate(*(values[name] for name in INPUTS))
+
+
+_evaluate_many = None
+
+
+def evaluate_many(columns):
+    """Unrounded OUTPUTS, as arrays, for many scenarios at once.
+
+    ``columns`` maps input names to equal-length NumPy arrays; missing
+    inputs take DEFAULTS. Element for element the results equal
+    ``evaluate()``'s, since the operations and their order are the same.
+    """
+    import numpy
+
+    global _evaluate_many
+    if _evaluate_many is None:
+        namespace = {'where': numpy.where}
+        exec(compile(python_source('numpy'), '<roi_engine numpy>', 'exec'), namespace)
+        _evaluate_many = namespace['evaluate']
+    values = {**DEFAULTS, **columns}
+    # where() evaluates both branches, so payback divides by zero where
+    # there is no gain before the zero is selected.
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return _evaluate_many(*(values[name] for name in INPUTS))
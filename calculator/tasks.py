@@ -0,0 +1,56 @@
+"""
+Built-in background tasks (see ``calculator.jobs``).
+
+Each task is safe to run twice: a job whose worker dies is run again once
+its lease expires.
+"""
+
+import io
+
+from django.conf import settings
+from django.core.management import call_command
+
+from . import jobs
+from .models import ROIResult
+
+
+@jobs.task('render_pdf', max_attempts=3)
+def render_pdf(result_id):
+    """Render a saved result's report into the PDF cache ahead of its download."""
+    from .pdf_cache import get_pdf_cache
+
+    result = ROIResult.objects.filter(pk=result_id).first()
+    if result is None:
+        # Deleted since it was queued; nothing to render.
+        return {'result_id': result_id, 'rendered': False}
+    get_pdf_cache().open(result).close()
+    return {'result_id': result_id, 'rendered': True}
+
+
+def prerender_pdf(result):
+    """Queue ``render_pdf`` for a newly saved result if JOB_PRERENDER_PDFS is on."""
+    if getattr(settings, 'JOB_PRERENDER_PDFS', False):
+        return jobs.enqueue('render_pdf', {'result_id': result.pk}, user=result.user)
+    return None
+
+
+@jobs.task('cleanup_sessions', max_attempts=1)
+def cleanup_sessions(batch_size=500):
+    out = io.StringIO()
+    call_command('cleanup_sessions', batch_size=batch_size, stdout=out)
+    return {'output': out.getvalue().strip()}
+
+
+@jobs.task('analyze_tables', max_attempts=1)
+def analyze_tables():
+    out = io.StringIO()
+    call_command('analyze_tables', stdout=out)
+    return {'output': out.getvalue().strip()}
+
+
+@jobs.task('export_reports')
+def export_reports(usernames=(), output_dir='.'):
+    out = io.StringIO()
+    # The command's progress lines are for terminals.
+    call_command('export_reports', *usernames, output_dir=output_dir, stdout=out, stderr=io.StringIO())
+    return {'output': out.getvalue().strip()}
@@ -0,0 +1,51 @@
+"""
+``{% smooth_slider %}``: a labelled range slider with a linked number input.
+
+    {% load smooth_slider %}
+    {% smooth_slider "Annual Revenue" "annualRevenue" 100000000 1000000 1000000000 1000000 is_currency=True icon="💰" %}
+
+The slider gets the element id ``id``, the number input ``<id>Input``
+and the value shown in the label ``<id>Label``, which is what the full
+calculator's script looks up. The markup lives in
+``calculator/includes/smooth_slider.html`` and is rendered with
+autoescaping. The full calculator renders the same 19 slider
+configurations on every request, so the output is memoized per argument
+tuple in a bounded LRU; that is why this is a simple tag that renders
+the template itself rather than an inclusion tag.
+"""
+
+from functools import lru_cache
+
+from django import template
+from django.template.loader import get_template
+
+register = template.Library()
+
+RENDER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=None)
+def _template():
+    return get_template('calculator/includes/smooth_slider.html')
+
+
+# typed=True keeps a SafeString label apart from an equal plain string,
+# which renders differently.
+@lru_cache(maxsize=RENDER_CACHE_SIZE, typed=True)
+def render_slider(label, id, value, min_val, max_val, step, is_currency, is_percentage, icon, show_range):
+    return _template().render({
+        'label': label, 'id': id, 'value': value, 'min_val': min_val, 'max_val': max_val,
+        'step': step, 'is_currency': is_currency, 'is_percentage': is_percentage,
+        'icon': icon, 'show_range': show_range,
+    })
+
+
+@register.simple_tag
+def smooth_slider(label, id, value, min_val, max_val, step, is_currency=False, is_percentage=False, icon="", show_range=False):
+    args = (label, id, value, min_val, max_val, step, is_currency, is_percentage, icon, show_range)
+    try:
+        hash(args)
+    except TypeError:
+        # An unhashable argument; render without the cache.
+        return render_slider.__wrapped__(*args)
+    return render_slider(*args)
@@ -1,3 +1,2063 @@
-from django.test import TestCase
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk_export import ExportProgress, ReportExporter, archive_name
+from .caching import LRUCache, TieredCache
+from . import admin_report, comparison, hot_cache, jobs, roi_engine, user_limits
+from .admin import EstimatedCountPaginator, estimated_row_count
+from .api import serializers as api_serializers
+from .chatbot import AnswerCache, get_answer_cache, normalize_question, stream_limiter
+from .faq import FAQIndex, get_faq_stats, prompt_entries
+from .llm import (
+    CircuitBreaker, GeminiRESTBackend, LLMClient, LLMRequestError, LLMTimeout,
+    LLMUnavailable,
+)
+from .models import Job, Payment, ROIResult, UserCalculationLimit
+from .page_cache import CSRF_PLACEHOLDER
+from .perf import observe_queries, registry as perf_registry
+from .pdf_cache import PDFRenderCache, get_pdf_cache
+from .query_log import QueryLog, fingerprint, get_query_log
+from .reports import build_result_pdf, get_report_styles
+from .templatetags.smooth_slider import render_slider
+from .views import calculate_roi
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'chatbot': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'chatbot-tests',
+    },
+    'hot': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hot-tests',
+    },
+}
+
+
+def make_result(user, **overrides):
+    """Create a saved full-calculator ROIResult with realistic values."""
+    values = dict(
+        user=user, mode='full',
+        annual_revenue=100_000_000, gross_margin=80, container_app_fraction=90,
+        annual_cloud_spend=10_000_000, compute_spend_fraction=60, cost_sensitive_fraction=50,
+        num_engineers=100, engineer_cost_per_year=150_000, ops_time_fraction=15,
+        ops_toil_fraction=50, toil_reduction_fraction=45, avg_response_time_sec=2,
+        exec_time_influence_fraction=33, lat_red_container=28, lat_red_serverless=50,
+        revenue_lift_per_100ms=1, current_fci_fraction=2, fci_reduction_fraction=75,
+        cost_per_1pct_fci=1,
+        cloud_savings=1_410_000, productivity_gain=506_250, performance_gain=1_627_440,
+        availability_gain=1_200_000, total_annual_gain=4_743_690, roi_percent=31.5,
+        payback_months=0.3,
+    )
+    values.update(overrides)
+    return ROIResult.objects.create(**values)
+
+
+class QueryRecorder:
+    """Collect (sql, params) for every statement run inside the block."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+def full_table_scans(queries):
+    """Return (sql, plan line) for every query whose plan scans a whole table.
+
+    SQLite reports an unindexed scan as ``SCAN <table>``; index-driven
+    access shows up as ``SEARCH ... USING INDEX`` or ``SCAN ... USING INDEX``.
+    Scans of a derived table (``SCAN subquery``) read rows that an inner,
+    separately planned query produced and are not reported.
+    """
+    scans = []
+    with connection.cursor() as cursor:
+        for sql, params in queries:
+            if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                if detail.startswith('SCAN ') and 'USING' not in detail and detail != 'SCAN subquery':
+                    scans.append((sql, detail))
+    return scans
+
+
+class PaymentQueryPlanTests(TestCase):
+    """Every ORM query issued by the payment views must be index-driven."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='payer', password='secret123')
+        UserCalculationLimit.objects.create(user=cls.user, full_calculations_used=5)
+        # A few unrelated rows so the planner has something to choose between.
+        other = User.objects.create_user(username='other', password='secret123')
+        for i in range(20):
+            Payment.objects.create(
+                user=other,
+                payment_id=str(uuid.uuid4()),
+                razorpay_payment_id=f'pay_other_{i}' if i % 2 else None,
+                status='completed' if i % 3 else 'pending',
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertNoTableScans(self, recorder):
+        self.assertTrue(recorder.queries)
+        scans = full_table_scans(recorder.queries)
+        self.assertEqual(scans, [], 'Full table scans:\n' + '\n'.join(
+            f'{detail}: {sql}' for sql, detail in scans
+        ))
+
+    def make_pending(self, **kwargs):
+        return Payment.objects.create(
+            user=self.user, payment_id=str(uuid.uuid4()), status='pending', **kwargs
+        )
+
+    def test_create_payment(self):
+        with QueryRecorder() as recorder:
+            response = self.client.post(reverse('create_payment'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScans(recorder)
+
+    def test_verify_payment(self):
+        payment = self.make_pending()
+        body = json.dumps({
+            'payment_id': payment.payment_id,
+            'razorpay_payment_id': 'pay_123',
+            'razorpay_signature': 'sig',
+        })
+        with QueryRecorder() as recorder:
+            response = self.client.post(
+                reverse('verify_payment'), body, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScans(recorder)
+
+    def test_payment_success(self):
+        payment = self.make_pending()
+        with QueryRecorder() as recorder:
+            response = self.client.get(reverse('payment_success'), {
+                'payment_id': payment.payment_id,
+                'razorpay_payment_id': 'pay_456',
+                'razorpay_signature': 'sig',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertNoTableScans(recorder)
+
+    def test_payment_history(self):
+        self.make_pending()
+        with QueryRecorder() as recorder:
+            response = self.client.get(reverse('payment_history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScans(recorder)
+
+    def test_razorpay_webhook(self):
+        self.make_pending(razorpay_payment_id='pay_webhook')
+        body = json.dumps({
+            'event': 'payment.captured',
+            'payload': {'payment': {'entity': {'id': 'pay_webhook', 'amount': 100}}},
+        })
+        self.client.logout()
+        with QueryRecorder() as recorder:
+            response = self.client.post(
+                reverse('razorpay_webhook'), body, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScans(recorder)
+
+
+class LRUCacheTests(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        cache = LRUCache(max_entries=2, ttl=10)
+        cache.set('a', 1)
+        with mock.patch('calculator.caching.time.monotonic', return_value=time.monotonic() + 11):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class NormalizeQuestionTests(TestCase):
+
+    def test_folds_case_whitespace_punctuation_and_stopwords(self):
+        variants = ['What is FCI?', "what's   fci", '  what is the FCI!! ']
+        self.assertEqual({normalize_question(v) for v in variants}, {'what fci'})
+        self.assertEqual(normalize_question('FCI'), 'fci')
+
+    def test_interrogatives_stay_in_the_key(self):
+        self.assertNotEqual(normalize_question('Why is FCI high?'), normalize_question('What is FCI high?'))
+        self.assertNotEqual(normalize_question('Why is FCI high'), normalize_question('what is FCI'))
+
+    def test_distinct_questions_stay_distinct(self):
+        self.assertNotEqual(
+            normalize_question('How is cloud savings calculated?'),
+            normalize_question('How is productivity gain calculated?'),
+        )
+
+    def test_stopword_only_question_keeps_words(self):
+        self.assertEqual(normalize_question('What is it?'), 'what is it')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GEMINI_API_KEY='test-key')
+class ChatbotAnswerCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='asker', password='secret123')
+
+    def setUp(self):
+        caches['chatbot'].clear()
+        get_answer_cache().clear()
+        get_faq_stats().reset()
+        self.client.force_login(self.user)
+        self.llm = mock.Mock()
+        self.llm.generate.return_value = 'It depends on your workloads.'
+        patcher = mock.patch('calculator.views.chatbot.get_llm_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ask(self, message):
+        response = self.client.post(
+            reverse('chatbot_api'), json.dumps({'message': message}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_near_identical_questions_hit_cache(self):
+        first = self.ask('Should we migrate to Kubernetes?')
+        second = self.ask('should  we migrate to kubernetes')
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['response'], first['response'])
+        self.assertEqual(self.llm.generate.call_count, 1)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.ask('Should we migrate to Kubernetes?')
+        # Simulate another worker: nothing in the local tier.
+        get_answer_cache().local.clear()
+        self.assertTrue(self.ask('SHOULD WE MIGRATE TO KUBERNETES')['cached'])
+        self.assertEqual(self.llm.generate.call_count, 1)
+
+    def test_clear_drops_answers_from_the_shared_tier(self):
+        self.ask('Should we migrate to Kubernetes?')
+        get_answer_cache().clear()
+        self.assertFalse(self.ask('Should we migrate to Kubernetes?')['cached'])
+        self.assertEqual(self.llm.generate.call_count, 2)
+
+        other_process = AnswerCache()
+        other_process.set('What is FCI?', 'old answer')
+        get_answer_cache().clear()
+        # Served until its generation token expires, then gone from both tiers.
+        self.assertEqual(other_process.get('What is FCI?'), 'old answer')
+        other_process.generations.clear()
+        self.assertIsNone(other_process.get('What is FCI?'))
+
+    def test_hit_is_fast(self):
+        answer_cache = get_answer_cache()
+        answer_cache.set('What is FCI?', 'cached answer')
+        start = time.perf_counter()
+        for _ in range(100):
+            answer_cache.get('what is fci')
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
+
+    def test_counters_are_flushed_to_the_shared_cache_in_batches(self):
+        counters = get_answer_cache().counters
+        for _ in range(3):
+            get_answer_cache().get('Is this cached?')
+        self.assertIsNone(caches['chatbot'].get(counters._key('misses')))
+        self.assertEqual(counters.shared()['misses'], 3)
+        self.assertEqual(caches['chatbot'].get(counters._key('misses')), 3)
+
+    def test_stats_endpoint(self):
+        self.ask('Should we migrate to Kubernetes?')
+        self.ask('Should we migrate to Kubernetes?')
+        self.assertEqual(self.client.get(reverse('chatbot_cache_stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get(reverse('chatbot_cache_stats')).json()
+        self.assertEqual(stats['process'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+        self.assertEqual(stats['shared']['hits'], 1)
+        self.assertEqual(stats['shared']['misses'], 1)
+
+
+class FAQIndexTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = FAQIndex(threshold=0.6)
+
+    def test_prompt_inputs_and_formulas_are_indexed(self):
+        questions = [q for entry in prompt_entries() for q in entry['questions']]
+        self.assertIn('What is gross margin?', questions)
+        self.assertIn('How is cloud savings calculated?', questions)
+
+    def test_answers_known_questions(self):
+        self.assertIn('Failure Cost Index', self.index.answer('what does FCI mean'))
+        self.assertIn('cloudSavings =', self.index.answer('How are cloud savings calculated?'))
+        self.assertIn('80%', self.index.answer('What is the gross margin?'))
+
+    def test_unrelated_questions_fall_through(self):
+        self.assertIsNone(self.index.answer('Write me a poem about cats'))
+        self.assertIsNone(self.index.answer('Should we migrate to Kubernetes?'))
+
+    def test_questions_beyond_the_faq_fall_through(self):
+        # Each shares a word or two with an entry but asks something else.
+        for question in [
+            'How do I reduce toil in Kubernetes?',
+            'Why is my FCI so high?',
+            'How do I pay with UPI?',
+            'What is the payback period for a company with 10 engineers?',
+        ]:
+            with self.subTest(question=question):
+                self.assertIsNone(self.index.answer(question))
+        self.assertIsNotNone(self.index.answer('How do I pay?'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GEMINI_API_KEY='test-key')
+class ChatbotFAQTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='faq-admin', password='secret123', is_staff=True
+        )
+
+    def setUp(self):
+        caches['chatbot'].clear()
+        get_answer_cache().clear()
+        get_faq_stats().reset()
+        self.client.force_login(self.user)
+        self.llm = mock.Mock()
+        self.llm.generate.return_value = 'It depends.'
+        patcher = mock.patch('calculator.views.chatbot.get_llm_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ask(self, message):
+        return self.client.post(
+            reverse('chatbot_api'), json.dumps({'message': message}),
+            content_type='application/json',
+        ).json()
+
+    def test_faq_answers_without_network_call(self):
+        reply = self.ask('What is FCI?')
+        self.assertEqual(reply['source'], 'faq')
+        self.llm.generate.assert_not_called()
+
+    def test_stats_report_local_fraction_and_savings(self):
+        self.ask('What is FCI?')
+        self.ask('How is productivity gain calculated?')
+        self.ask('Should we migrate to Kubernetes?')
+        faq = self.client.get(reverse('chatbot_cache_stats')).json()['faq']['process']
+        self.assertEqual(faq['local'], 2)
+        self.assertEqual(faq['upstream'], 1)
+        self.assertAlmostEqual(faq['local_fraction'], 0.6667)
+        self.assertIsNotNone(faq['latency_saved_ms'])
+
+
+def parse_sse(body):
+    """Split a text/event-stream body into (event, data) pairs."""
+    events = []
+    for block in body.decode('utf-8').strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GEMINI_API_KEY='test-key')
+class ChatbotStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='streamer', password='secret123')
+
+    def setUp(self):
+        caches['chatbot'].clear()
+        get_answer_cache().clear()
+        self.llm = mock.Mock()
+        self.llm.stream.side_effect = lambda prompt: iter(['It ', 'depends.'])
+        patcher = mock.patch('calculator.views.chatbot.get_llm_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, message):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('chatbot_stream'), json.dumps({'message': message}),
+            content_type='application/json',
+        )
+        if not response.streaming:
+            return response, None
+        body = b''.join(response.streaming_content)
+        return response, parse_sse(body)
+
+    def test_streams_tokens_and_caches_answer(self):
+        response, events = self.stream('Should we migrate to Kubernetes?')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(events, [
+            ('start', {}),
+            ('token', {'text': 'It '}),
+            ('token', {'text': 'depends.'}),
+            ('done', {'source': 'gemini'}),
+        ])
+
+        _, events = self.stream('should we migrate to kubernetes')
+        self.assertEqual(events, [('token', {'text': 'It depends.'}), ('done', {'source': 'cache'})])
+        self.assertEqual(self.llm.stream.call_count, 1)
+
+    def test_events_are_produced_one_at_a_time(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('chatbot_stream'), json.dumps({'message': 'Should we migrate to Kubernetes?'}),
+            content_type='application/json',
+        )
+        content = iter(response.streaming_content)
+        self.assertIn(b'event: start', next(content))
+        # Nothing has been asked upstream until the body is read past the start event.
+        self.llm.stream.assert_not_called()
+        self.assertIn(b'It ', next(content))
+        response.close()
+
+    def test_faq_questions_do_not_call_upstream(self):
+        _, events = self.stream('What is FCI?')
+        self.assertEqual(events[-1], ('done', {'source': 'faq'}))
+        self.llm.stream.assert_not_called()
+
+    def test_upstream_error_is_reported_in_stream(self):
+        self.llm.stream.side_effect = RuntimeError('quota exceeded')
+        _, events = self.stream('Should we migrate to Kubernetes?')
+        self.assertEqual(events[-1][0], 'error')
+        self.assertIn('quota exceeded', events[-1][1]['error'])
+
+    @override_settings(CHATBOT_STREAM_MAX_CONCURRENCY=1, CHATBOT_STREAM_QUEUE_TIMEOUT=0.01)
+    def test_concurrency_cap_reports_busy(self):
+        with stream_limiter.slot(1) as acquired:
+            self.assertTrue(acquired)
+            _, events = self.stream('Should we migrate to Kubernetes?')
+        self.assertEqual(events[-1], ('error', {'error': 'The assistant is busy. Please try again.', 'retry_after': 1}))
+        self.llm.stream.assert_not_called()
+
+    @override_settings(CHATBOT_STREAM_MAX_CONCURRENCY=1, CHATBOT_STREAM_QUEUE_TIMEOUT=0.01)
+    def test_unread_and_abandoned_streams_release_their_slot(self):
+        self.client.force_login(self.user)
+        url = reverse('chatbot_stream')
+        payload = json.dumps({'message': 'Should we migrate to Kubernetes?'})
+        # Never iterated, e.g. the client went away before the body was sent.
+        self.client.post(url, payload, content_type='application/json').close()
+        # Abandoned mid-stream.
+        response = self.client.post(url, payload, content_type='application/json')
+        content = iter(response.streaming_content)
+        next(content)
+        next(content)
+        response.close()
+        _, events = self.stream('Should we migrate to Kubernetes?')
+        self.assertEqual(events[-1], ('done', {'source': 'gemini'}))
+
+
+class StubGeminiServer:
+    """Local stand-in for the Gemini REST API with injectable latency and errors."""
+
+    def __init__(self):
+        self.latency = 0.0
+        self.status = 200
+        self.requests = 0
+        self.client_ports = set()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub.lock:
+                    stub.requests += 1
+                    stub.client_ports.add(self.client_address[1])
+                time.sleep(stub.latency)
+                prompt = body['contents'][0]['parts'][0]['text']
+                if stub.status != 200:
+                    payload = b'{"error": "injected"}'
+                    self.send_response(stub.status)
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                elif ':streamGenerateContent' in self.path:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Connection', 'close')
+                    self.end_headers()
+                    for word in ['echo: ', prompt]:
+                        chunk = {'candidates': [{'content': {'parts': [{'text': word}]}}]}
+                        self.wfile.write(f'data: {json.dumps(chunk)}\r\n\r\n'.encode())
+                        self.wfile.flush()
+                    self.close_connection = True
+                else:
+                    payload = json.dumps({
+                        'candidates': [{'content': {'parts': [{'text': f'echo: {prompt}'}]}}],
+                    }).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # Clients that time out hang up mid-response; that is expected.
+                pass
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LLMClientTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubGeminiServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.stub.latency = 0.0
+        self.stub.status = 200
+        self.stub.requests = 0
+        self.stub.client_ports = set()
+        self.now = 1000.0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: self.now)
+        self.client = LLMClient(
+            GeminiRESTBackend('test-key', base_url=self.stub.url), timeout=2, breaker=self.breaker
+        )
+
+    def test_generate_reuses_one_connection(self):
+        for i in range(5):
+            self.assertEqual(self.client.generate(f'q{i}'), f'echo: q{i}')
+        self.assertEqual(self.stub.requests, 5)
+        self.assertEqual(len(self.stub.client_ports), 1)
+
+    def test_identical_concurrent_prompts_are_coalesced(self):
+        self.stub.latency = 0.3
+        results = []
+
+        def ask(prompt):
+            results.append(self.client.generate(prompt))
+
+        threads = [threading.Thread(target=ask, args=('same',)) for _ in range(8)]
+        threads.append(threading.Thread(target=ask, args=('different',)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), ['echo: different'] + ['echo: same'] * 8)
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_slow_upstream_times_out(self):
+        self.stub.latency = 1.0
+        self.client.timeout = 0.2
+        start = time.monotonic()
+        with self.assertRaises(LLMTimeout):
+            self.client.generate('slow')
+        self.assertLess(time.monotonic() - start, 0.9)
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.stub.status = 503
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.client.generate('outage')
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.stub.latency = 1.0
+        start = time.monotonic()
+        with self.assertRaises(LLMUnavailable):
+            self.client.generate('outage')
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_breaker_half_open_trial_recovers(self):
+        self.stub.status = 500
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.client.generate('outage')
+        self.stub.status = 200
+        self.now += 31
+        self.assertEqual(self.client.generate('recovered'), 'echo: recovered')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_client_errors_do_not_trip_breaker(self):
+        self.stub.status = 400
+        for _ in range(3):
+            with self.assertRaises(LLMRequestError):
+                self.client.generate('bad request')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_stream(self):
+        self.assertEqual(list(self.client.stream('hello')), ['echo: ', 'hello'])
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_abandoned_stream_releases_half_open_trial(self):
+        self.stub.status = 500
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.client.generate('outage')
+        self.stub.status = 200
+        self.now += 31
+        stream = self.client.stream('hello')
+        next(stream)
+        stream.close()
+        # The abandoned trial must not wedge the breaker half-open forever.
+        self.assertEqual(list(self.client.stream('again')), ['echo: ', 'again'])
+
+
+class PDFRenderCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reporter', password='secret123')
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(PDF_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.user)
+        self.result = make_result(self.user)
+
+    def download(self, result_id):
+        response = self.client.get(reverse('export_pdf', args=[result_id]))
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        response.close()
+        return response, body
+
+    def test_second_download_is_served_from_cache(self):
+        with mock.patch('calculator.reports.build_result_pdf', wraps=build_result_pdf) as build:
+            first, first_body = self.download(self.result.id)
+            second, second_body = self.download(self.result.id)
+        self.assertEqual(build.call_count, 1)
+        self.assertTrue(first_body.startswith(b'%PDF'))
+        self.assertEqual(first_body, second_body)
+        self.assertIn('attachment; filename="ROI_Report_reporter_', second['Content-Disposition'])
+        self.assertEqual(second['Content-Type'], 'application/pdf')
+
+    def test_one_cache_per_process_and_eviction_scans_only_when_due(self):
+        self.assertIs(get_pdf_cache(), get_pdf_cache())
+        cache = PDFRenderCache(self.cache_dir, max_bytes=250)
+        with mock.patch('calculator.pdf_cache.os.scandir', wraps=os.scandir) as scandir:
+            cache.store(1, b'x' * 100)
+            cache.store(2, b'x' * 100)
+            self.assertEqual(scandir.call_count, 1)
+            # Past max_bytes: scanned again, and the oldest report evicted.
+            cache.store(3, b'x' * 100)
+            self.assertEqual(scandir.call_count, 2)
+            with mock.patch('calculator.pdf_cache.time.monotonic', return_value=time.monotonic() + 61):
+                cache.store(4, b'')
+            self.assertEqual(scandir.call_count, 3)
+        self.assertFalse(cache.path_for(1).exists())
+        self.assertTrue(cache.path_for(2).exists())
+
+    def test_template_version_is_part_of_the_key(self):
+        self.download(self.result.id)
+        with mock.patch('calculator.reports.REPORT_TEMPLATE_VERSION', 'next'), \
+                mock.patch('calculator.reports.build_result_pdf', wraps=build_result_pdf) as build:
+            self.download(self.result.id)
+        self.assertEqual(build.call_count, 1)
+
+    def test_delete_result_invalidates(self):
+        self.download(self.result.id)
+        self.client.post(reverse('delete_result', args=[self.result.id]))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_delete_all_results_invalidates(self):
+        other = make_result(self.user)
+        self.download(self.result.id)
+        self.download(other.id)
+        self.client.post(reverse('delete_all_results'))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_report_evicted_before_it_is_opened_is_still_served(self):
+        cache = PDFRenderCache(self.cache_dir)
+        render = cache._render
+
+        def render_then_evict(result, path, keep_open=False):
+            handle = render(result, path, keep_open)
+            if not keep_open:
+                # Another request's evict() runs between the render and the open.
+                path.unlink()
+            return handle
+
+        with mock.patch.object(cache, '_render', side_effect=render_then_evict) as rendered:
+            with cache.open(self.result) as handle:
+                self.assertTrue(handle.read().startswith(b'%PDF'))
+        self.assertEqual(rendered.call_count, 2)
+
+    def test_evicts_least_recently_used(self):
+        results = [make_result(self.user) for _ in range(3)]
+        cache = PDFRenderCache(self.cache_dir)
+        for result in results:
+            cache.open(result).close()
+        # Make the first report the most recently used, then shrink the
+        # bound so only two reports fit.
+        now = time.time()
+        for age, result in zip((0, 20, 10), results):
+            os.utime(cache.path_for(result.id), (now - age, now - age))
+        cache.max_bytes = sum(
+            os.path.getsize(cache.path_for(result.id)) for result in (results[0], results[2])
+        )
+        cache.evict()
+        self.assertTrue(cache.path_for(results[0].id).exists())
+        self.assertFalse(cache.path_for(results[1].id).exists())
+        self.assertTrue(cache.path_for(results[2].id).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='exporter', password='secret123')
+        cls.other = User.objects.create_user(username='bystander', password='secret123')
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(PDF_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        caches['default'].clear()
+        self.results = [make_result(self.user, roi_percent=10 + i) for i in range(3)]
+        make_result(self.other)
+
+    def queryset(self):
+        return ROIResult.objects.filter(user=self.user).select_related('user')
+
+    def test_stream_zip_contains_every_report(self):
+        progress = []
+        exporter = ReportExporter(workers=0)
+        chunks = list(exporter.stream_zip(
+            self.queryset(), total=3, on_progress=lambda done, total: progress.append((done, total))
+        ))
+        # The archive is produced incrementally, not as one final blob.
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 3)
+        with zipfile.ZipFile(BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(archive.testzip(), None)
+            self.assertEqual(
+                sorted(archive.namelist()), sorted(archive_name(result) for result in self.queryset())
+            )
+            for name in archive.namelist():
+                self.assertTrue(archive.read(name).startswith(b'%PDF'))
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+
+    def test_process_pool_renders_into_pdf_cache(self):
+        exporter = ReportExporter(workers=2)
+        self.addCleanup(exporter.close)
+        body = b''.join(exporter.stream_zip(self.queryset()))
+        with zipfile.ZipFile(BytesIO(body)) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+        cache = PDFRenderCache(self.cache_dir)
+        for result in self.results:
+            self.assertTrue(cache.path_for(result.id).exists())
+
+        # A second export is served from the cache without rendering.
+        with mock.patch('calculator.bulk_export.render_report') as render:
+            b''.join(ReportExporter(workers=0).stream_zip(self.queryset()))
+        render.assert_not_called()
+
+    def test_broken_pool_is_replaced_without_touching_its_replacement(self):
+        exporter = ReportExporter(workers=1)
+        broken, replacement = mock.Mock(), mock.Mock()
+        exporter._pool = broken
+        exporter._discard(broken)
+        self.assertIsNone(exporter._pool)
+        broken.shutdown.assert_called_once_with(wait=False)
+
+        # Another export already started the replacement before this one
+        # noticed the break.
+        exporter._pool = replacement
+        exporter._discard(broken)
+        self.assertIs(exporter._pool, replacement)
+        replacement.shutdown.assert_not_called()
+
+    def test_export_all_view_streams_own_results_with_progress(self):
+        self.client.force_login(self.user)
+        with mock.patch('calculator.bulk_export.get_exporter', return_value=ReportExporter(workers=0)):
+            response = self.client.get(reverse('export_all_results'), {'progress': 'tok-1'})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/zip')
+            body = b''.join(response.streaming_content)
+        with zipfile.ZipFile(BytesIO(body)) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+            self.assertTrue(all('_exporter_' in name for name in archive.namelist()))
+
+        state = self.client.get(reverse('export_progress', args=['tok-1'])).json()
+        self.assertEqual(state, {'done': 3, 'total': 3, 'finished': True})
+        # Kept in the cache every worker process shares.
+        self.assertEqual(caches['hot'].get(ExportProgress(self.user.id, 'tok-1').key), state)
+        # Progress is scoped to the user who started the export.
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(reverse('export_progress', args=['tok-1'])).status_code, 404)
+
+    def test_export_reports_command_writes_one_zip_per_user(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        call_command('export_reports', output_dir=output_dir, workers=0, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            sorted(os.listdir(output_dir)), ['ROI_Reports_bystander.zip', 'ROI_Reports_exporter.zip']
+        )
+        with zipfile.ZipFile(os.path.join(output_dir, 'ROI_Reports_exporter.zip')) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+
+
+class ComparisonReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='comparer', password='secret123')
+        cls.baseline = make_result(cls.user)
+        cls.better = make_result(cls.user, cloud_savings=2_000_000, payback_months=0.2, roi_percent=40)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def compare(self, ids, **params):
+        return self.client.get(reverse('compare_results'), {'ids': ','.join(map(str, ids)), **params})
+
+    def test_results_are_loaded_in_one_query_in_request_order(self):
+        with self.assertNumQueries(1):
+            results = comparison.load_results(self.user, [self.better.id, self.baseline.id])
+            # The user is selected along with the results.
+            [result.user.username for result in results]
+        self.assertEqual([result.id for result in results], [self.better.id, self.baseline.id])
+
+    def test_deltas_are_relative_to_the_first_result(self):
+        rows = comparison.comparison_rows([self.baseline, self.better])
+        cells = {cell['field']: cell for cell in rows[1]['cells']}
+        self.assertEqual(cells['cloud_savings']['delta_text'], '+$590,000')
+        self.assertTrue(cells['cloud_savings']['better'])
+        # A shorter payback is an improvement.
+        self.assertTrue(cells['payback_months']['better'])
+        self.assertEqual(cells['productivity_gain']['delta_text'], '-')
+        self.assertTrue(all(cell['delta'] == 0 for cell in rows[0]['cells']))
+
+    def test_html_comparison(self):
+        response = self.compare([self.baseline.id, self.better.id], format='html')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '+$590,000')
+        self.assertContains(response, '+8.5pp')
+
+    def test_pdf_comparison_chunks_large_sets_into_fixed_size_tables(self):
+        extra = ROIResult.objects.bulk_create([
+            ROIResult(**{
+                field.name: getattr(self.baseline, field.name)
+                for field in ROIResult._meta.concrete_fields if field.name not in ('id', 'timestamp')
+            } | {'roi_percent': index})
+            for index in range(118)
+        ])
+        ids = [self.baseline.id, self.better.id] + [result.id for result in extra]
+        with mock.patch('calculator.comparison.Table', wraps=comparison.Table) as table, \
+                mock.patch('calculator.comparison.get_report_styles', wraps=comparison.get_report_styles) as styles:
+            response = self.compare(ids)
+        styles.assert_called_once_with()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(table.call_count, 5)
+        self.assertTrue(all(len(call.args[0]) <= comparison.ROWS_PER_TABLE + 1 for call in table.call_args_list))
+
+    def test_rejects_foreign_or_missing_results(self):
+        other = User.objects.create_user(username='outsider', password='secret123')
+        foreign = make_result(other)
+        response = self.compare([self.baseline.id, foreign.id])
+        self.assertRedirects(response, reverse('results'))
+        response = self.compare([self.baseline.id])
+        self.assertRedirects(response, reverse('results'))
+
+
+class ReportStylesTests(TestCase):
+
+    def test_styles_are_built_once_per_process(self):
+        self.assertIs(get_report_styles(), get_report_styles())
+
+    def test_importing_reports_does_not_load_reportlab(self):
+        code = 'import sys, calculator.reports; print(any(m.startswith("reportlab") for m in sys.modules))'
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        self.assertEqual(output.strip(), 'False')
+
+    def test_renders_straight_into_a_response(self):
+        user = User.objects.create_user(username='direct', password='secret123')
+        response = HttpResponse(content_type='application/pdf')
+        build_result_pdf(make_result(user), response)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_report_text_depends_only_on_the_result(self):
+        from PyPDF2 import PdfReader
+
+        result = make_result(User.objects.create_user(username='stable', password='secret123'))
+        texts = []
+        for _ in range(2):
+            output = BytesIO()
+            build_result_pdf(result, output)
+            texts.append(''.join(page.extract_text() for page in PdfReader(output).pages))
+        self.assertEqual(texts[0], texts[1])
+        self.assertIn(f'Report ID: ROI-{result.pk}', texts[0])
+
+
+class AdminReportTests(TestCase):
+
+    def add_user(self, username, calculations=0, payments=()):
+        user = User.objects.create(username=username)
+        for index in range(calculations):
+            make_result(user, roi_percent=index)
+        for amount, status in payments:
+            Payment.objects.create(user=user, amount=amount, status=status, payment_id=str(uuid.uuid4()))
+        return user
+
+    def rows(self):
+        return {row['username']: row for row in admin_report.iter_user_rows()}
+
+    def test_totals_and_recent_items(self):
+        user = self.add_user('busy', calculations=5, payments=[(1, 'completed'), (2, 'completed'), (4, 'failed')])
+        UserCalculationLimit.objects.create(user=user, full_calculations_used=2)
+        self.add_user('idle')
+        rows = self.rows()
+        busy = rows['busy']
+        self.assertEqual(busy['calculation_count'], 5)
+        self.assertEqual(busy['payment_count'], 3)
+        self.assertEqual(busy['total_paid'], '3.00')
+        self.assertEqual(len(busy['recent_calculations']), 3)
+        self.assertEqual(len(busy['recent_payments']), 2)
+        self.assertEqual(busy['full_calculations_used'], 2)
+        idle = rows['idle']
+        self.assertEqual((idle['calculation_count'], idle['payment_count']), (0, 0))
+        self.assertEqual(idle['recent_calculations'], [])
+        self.assertIsNone(idle['full_calculations_used'])
+
+    def test_query_count_does_not_grow_with_users(self):
+        def count_queries():
+            with QueryRecorder() as recorder:
+                list(admin_report.iter_user_rows())
+                admin_report.summary()
+            return len(recorder.queries)
+
+        for index in range(3):
+            self.add_user(f'first{index}', calculations=4, payments=[(1, 'completed')] * 3)
+        baseline = count_queries()
+        for index in range(10):
+            self.add_user(f'second{index}', calculations=4, payments=[(1, 'completed')] * 3)
+        self.assertEqual(count_queries(), baseline)
+
+    def test_command_formats(self):
+        user = self.add_user('csvuser', calculations=2, payments=[(1, 'completed')])
+        UserCalculationLimit.objects.create(user=user)
+        self.add_user('nolimit')
+        output = StringIO()
+        call_command('admin_report', format='csv', stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0].split(','), admin_report.CSV_FIELDS)
+        self.assertIn('csvuser', lines[1])
+
+        output = StringIO()
+        call_command('admin_report', format='json', stdout=output)
+        data = json.loads(output.getvalue())
+        self.assertEqual(data['summary']['payments']['total_revenue'], '1.00')
+        self.assertEqual(data['summary']['users']['total'], 2)
+        self.assertEqual(data['summary']['calculation_limits'], 1)
+        self.assertEqual(data['users'][0]['calculation_count'], 2)
+
+        output = StringIO()
+        call_command('admin_report', stdout=output)
+        self.assertIn('USER: csvuser', output.getvalue())
+        self.assertIn('Total Calculation Limits: 1\n', output.getvalue())
+
+
+class UserLimitsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([User(username=f'bulk{index}') for index in range(6)])
+        cls.users = list(User.objects.filter(username__startswith='bulk').order_by('username'))
+        UserCalculationLimit.objects.create(user=cls.users[0], full_calculations_used=4)
+        UserCalculationLimit.objects.create(user=cls.users[1], full_calculations_used=7)
+
+    def statements(self, recorder, verb):
+        return [sql for sql, _ in recorder.queries if sql.lstrip().upper().startswith(verb)]
+
+    def test_grant_unlimited_is_one_insert_and_one_update(self):
+        users = User.objects.filter(username__startswith='bulk')
+        with QueryRecorder() as recorder:
+            updated = user_limits.grant_unlimited_access(users)
+        self.assertEqual(updated, 6)
+        self.assertEqual(len(self.statements(recorder, 'INSERT')), 1)
+        self.assertEqual(len(self.statements(recorder, 'UPDATE')), 1)
+        self.assertEqual(UserCalculationLimit.objects.filter(unlimited_access=True).count(), 6)
+
+    def test_grant_keeps_existing_purchase_date(self):
+        purchased = timezone.now() - timedelta(days=30)
+        UserCalculationLimit.objects.filter(user=self.users[0]).update(
+            unlimited_access=True, unlimited_access_purchased_at=purchased
+        )
+        updated = user_limits.grant_unlimited_access(user_limits.users_by_username(['bulk0', 'bulk2']))
+        self.assertEqual(updated, 1)
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.users[0]).unlimited_access_purchased_at, purchased)
+
+    def test_reset_and_add_free_calculations(self):
+        user_limits.reset_calculations(user_limits.users_by_username(['bulk0', 'bulk3']))
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.users[0]).full_calculations_used, 0)
+        self.assertTrue(UserCalculationLimit.objects.filter(user=self.users[3]).exists())
+
+        user_limits.add_free_calculations(UserCalculationLimit.objects.filter(user__in=self.users[:2]))
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.users[0]).full_calculations_used, 0)
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.users[1]).full_calculations_used, 2)
+
+    def test_admin_actions_update_in_one_statement(self):
+        admin = User.objects.create_superuser(username='root', password='secret123')
+        self.client.force_login(admin)
+        pending = Payment.objects.create(user=self.users[0], payment_id='p1')
+        paid_at = timezone.now() - timedelta(days=1)
+        paid = Payment.objects.create(user=self.users[1], payment_id='p2', paid_at=paid_at)
+        with QueryRecorder() as recorder:
+            self.client.post(reverse('admin:calculator_payment_changelist'), {
+                'action': 'mark_as_completed', '_selected_action': [pending.pk, paid.pk],
+            })
+        self.assertEqual(len(self.statements(recorder, 'UPDATE')), 1)
+        pending.refresh_from_db()
+        paid.refresh_from_db()
+        self.assertEqual((pending.status, paid.status), ('completed', 'completed'))
+        self.assertIsNotNone(pending.paid_at)
+        self.assertEqual(paid.paid_at, paid_at)
+
+
+class AdminChangelistTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='root', password='secret123')
+        cls.owners = User.objects.bulk_create([User(username=f'owner{index}') for index in range(5)])
+        cls.owners = list(User.objects.filter(username__startswith='owner'))
+        for index, owner in enumerate(cls.owners):
+            make_result(owner)
+            Payment.objects.create(user=owner, payment_id=f'pay-{index}', razorpay_payment_id=f'rzp_{index}')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, **params):
+        with QueryRecorder() as recorder:
+            response = self.client.get(reverse(f'admin:calculator_{model}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, recorder
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, recorder = self.changelist('roiresult')
+        baseline = len(recorder.queries)
+        for owner in self.owners:
+            make_result(owner)
+            Payment.objects.create(user=owner, payment_id=str(uuid.uuid4()))
+        for model in ('roiresult', 'payment'):
+            _, recorder = self.changelist(model)
+            self.assertLessEqual(len(recorder.queries), baseline, model)
+
+    def test_changelist_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        for model, params in [
+            ('roiresult', {}),
+            ('roiresult', {'q': 'owner1'}),
+            ('roiresult', {'timestamp__year': timezone.now().year}),
+            ('payment', {}),
+            ('payment', {'q': 'rzp_3'}),
+        ]:
+            _, recorder = self.changelist(model, **params)
+            # The row estimate reads SQLite's own (tiny) catalog tables.
+            queries = [query for query in recorder.queries if 'sqlite_' not in query[0]]
+            self.assertEqual(full_table_scans(queries), [], f'{model} {params}')
+
+    def test_prefix_search(self):
+        response, _ = self.changelist('payment', q='pay-')
+        self.assertEqual(response.context['cl'].result_count, 5)
+        response, _ = self.changelist('payment', q='rzp_2')
+        self.assertEqual([p.payment_id for p in response.context['cl'].result_list], ['pay-2'])
+        # Prefixes only: a substring in the middle does not match.
+        response, _ = self.changelist('roiresult', q='wner')
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_estimated_count_paginator(self):
+        self.assertIsNone(estimated_row_count(ROIResult))
+        call_command('analyze_tables', stdout=StringIO())
+        self.assertEqual(estimated_row_count(ROIResult), 5)
+        make_result(self.owners[0])
+        paginator = EstimatedCountPaginator(ROIResult.objects.all(), 100)
+        paginator.exact_count_below = 0
+        # Statistics are stale until the next ANALYZE, which is the point.
+        self.assertEqual(paginator.count, 5)
+        paginator = EstimatedCountPaginator(ROIResult.objects.filter(mode='full'), 100)
+        paginator.count_cap = 3
+        self.assertEqual(paginator.count, 3)
+
+    def test_streaming_csv_export(self):
+        response = self.client.post(reverse('admin:calculator_payment_changelist'), {
+            'action': 'export_as_csv',
+            '_selected_action': list(Payment.objects.values_list('pk', flat=True)),
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['payment_id', 'user__username'])
+        self.assertEqual(len(lines), 6)
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {name: (duration ms, description)}."""
+    metrics = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(values['dur']), values.get('desc', '').strip('"'))
+    return metrics
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GEMINI_API_KEY='test-key', METRICS_TOKEN='scrape-me')
+class PerformanceMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='timed', password='secret123')
+        cls.staff = User.objects.create_user(username='ops', password='secret123', is_staff=True)
+
+    def setUp(self):
+        perf_registry.reset()
+        self.client.force_login(self.staff)
+
+    def test_server_timing_header(self):
+        make_result(self.staff)
+        response = self.client.get(reverse('results'))
+        timing = server_timing(response)
+        self.assertGreater(timing['total'][0], 0)
+        self.assertGreater(timing['tpl'][0], 0)
+        # Session, user and results queries at least.
+        self.assertGreaterEqual(int(timing['db'][1].split()[0]), 3)
+        self.assertLessEqual(timing['db'][0] + timing['tpl'][0], timing['total'][0] + 0.1)
+
+    def test_server_timing_is_only_sent_to_staff(self):
+        self.client.force_login(self.user)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('results')))
+        self.client.logout()
+        self.assertNotIn('Server-Timing', self.client.get(reverse('landing')))
+        with override_settings(SERVER_TIMING_PUBLIC=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('landing')))
+
+    def test_outbound_gemini_time(self):
+        backend = mock.Mock()
+        backend.generate.side_effect = lambda prompt, timeout: time.sleep(0.02) or 'Slow answer.'
+        caches['chatbot'].clear()
+        get_answer_cache().clear()
+        with mock.patch('calculator.views.chatbot.get_llm_client', return_value=LLMClient(backend)):
+            response = self.client.post(
+                reverse('chatbot_api'), json.dumps({'message': 'Tell me a joke about latency'}),
+                content_type='application/json',
+            )
+        self.assertGreaterEqual(server_timing(response)['gemini'][0], 20)
+
+    def test_metrics_endpoint(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('results'))
+        self.client.get(reverse('results'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.client.force_login(self.staff)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE roi_request_duration_seconds histogram', body)
+        self.assertIn('roi_request_duration_seconds_count{view="results"} 2', body)
+        self.assertIn('roi_request_db_queries_bucket{view="results",le="+Inf"} 2', body)
+
+        self.client.logout()
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+
+    def test_streaming_view_is_timed(self):
+        llm = mock.Mock()
+        llm.stream.side_effect = lambda prompt: iter(['It ', 'depends.'])
+        with mock.patch('calculator.views.chatbot.get_llm_client', return_value=llm):
+            response = self.client.post(
+                reverse('chatbot_stream'), json.dumps({'message': 'Should we rewrite in Rust?'}),
+                content_type='application/json',
+            )
+            b''.join(response.streaming_content)
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+
+class QueryLogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='dba', is_staff=True, is_superuser=True)
+        for i in range(6):
+            make_result(User.objects.create(username=f'owner{i}'))
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        settings_override = override_settings(
+            SQL_OBSERVER_ENABLED=True, SQL_REPEAT_THRESHOLD=5, SQL_SLOW_QUERY_MS=10_000,
+            SQL_LOG_FILE=os.path.join(self.log_dir, 'sql.jsonl'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(lambda: get_query_log().close())
+
+    def test_fingerprint_strips_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE name = 'O''Brien' AND id IN (1, 2, 3) LIMIT 21"),
+            'SELECT * FROM t WHERE name = ? AND id IN (...) LIMIT ?',
+        )
+        self.assertEqual(
+            fingerprint('SELECT "t1"."id" FROM "t1" WHERE "t1"."id" = %s'),
+            fingerprint('SELECT "t1"."id"  FROM "t1"\nWHERE "t1"."id" = 42'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (?, ?), ...',
+        )
+
+    def test_flags_n_plus_one(self):
+        with observe_queries('listing') as observer:
+            for result in ROIResult.objects.all():
+                str(result)  # __str__ reads result.user
+        entries = [entry for entry in observer.flagged() if 'repeated' in entry['reasons']]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['count'], 6)
+        self.assertIn('FROM "auth_user"', entries[0]['fingerprint'])
+
+        logged = list(get_query_log().read())
+        self.assertEqual([entry['view'] for entry in logged], ['listing'])
+
+        with observe_queries('listing') as observer:
+            for result in ROIResult.objects.select_related('user'):
+                str(result)
+        self.assertEqual(observer.flagged(), [])
+
+    def test_slow_queries_logged(self):
+        with override_settings(SQL_SLOW_QUERY_MS=0):
+            with observe_queries('slow') as observer:
+                list(User.objects.all())
+        self.assertEqual(observer.flagged()[0]['reasons'], ['slow'])
+
+    def test_requests_are_observed(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:calculator_roiresult_changelist'))
+        self.assertEqual(response.status_code, 200)
+        # list_select_related keeps the changelist free of per-row queries.
+        self.assertEqual(list(get_query_log().read()), [])
+
+        with override_settings(SQL_REPEAT_THRESHOLD=1):
+            self.client.get(reverse('admin:calculator_roiresult_changelist'))
+        views = {entry['view'] for entry in get_query_log().read()}
+        self.assertEqual(views, {'admin:calculator_roiresult_changelist'})
+
+    def test_summary_command(self):
+        for _ in range(2):
+            with observe_queries('listing'):
+                for result in ROIResult.objects.all():
+                    str(result)
+        out = StringIO()
+        call_command('sql_log_summary', '--json', stdout=out)
+        (row,) = json.loads(out.getvalue())
+        self.assertEqual((row['requests'], row['queries'], row['max_repeat']), (2, 12, 6))
+        self.assertEqual(row['views'], {'listing': 2})
+
+        out = StringIO()
+        call_command('sql_log_summary', '--reason', 'slow', stdout=out)
+        self.assertIn('No slow or repeated queries logged.', out.getvalue())
+
+    def test_log_rotates(self):
+        log = QueryLog(os.path.join(self.log_dir, 'rotating.jsonl'), max_bytes=400, backups=2)
+        self.addCleanup(log.close)
+        entry = {'id': 'x', 'fingerprint': 'SELECT ?', 'sample': 'SELECT 1', 'count': 5,
+                 'total_ms': 1.0, 'max_ms': 0.5, 'reasons': ['repeated']}
+        for _ in range(20):
+            log.write('view', [entry])
+        self.assertEqual(len(log.files()), 3)
+        self.assertTrue(all(row['view'] == 'view' for row in log.read()))
+
+
+class LoadTestHarnessTests(TestCase):
+
+    def test_short_run_reports_every_endpoint(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for server in ('wsgi', 'asgi'):
+            output = subprocess.run(
+                [sys.executable, os.path.join('benchmarks', 'loadtest.py'), '--server', server,
+                 '--users', '4', '--concurrency', '2', '--duration', '1.5', '--gemini-latency', '0'],
+                capture_output=True, text=True, check=True, cwd=root,
+            ).stdout
+            report = json.loads(output)
+            self.assertEqual(report['total']['errors'], 0)
+            self.assertLessEqual({'login', 'quick_estimate', 'results'}, set(report['endpoints']))
+            for stats in report['endpoints'].values():
+                self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+                self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+
+
+class StartupImportTests(TestCase):
+
+    def test_cold_start_within_budget(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run(
+            [sys.executable, os.path.join('benchmarks', 'bench_startup.py'), '--json', '--repeat', '2'],
+            capture_output=True, text=True, cwd=root,
+        )
+        report = json.loads(completed.stdout)
+        self.assertEqual(report['eager_lazy_modules'], [])
+        self.assertLessEqual(report['total_ms'], report['budget_ms'])
+        self.assertEqual(completed.returncode, 0)
+
+
+
+class StaticAssetsTests(TestCase):
+
+    def test_pages_use_self_hosted_assets(self):
+        self.client.force_login(User.objects.create(username='offline'))
+        for name in ('quick_estimate', 'full_calculator'):
+            html = self.client.get(reverse(name)).content.decode()
+            self.assertIn('/static/css/base.css', html)
+            self.assertIn('/static/vendor/chart.js/4.4.0/chart.umd.min.js', html)
+            self.assertNotIn('cdn.jsdelivr.net', html)
+            self.assertNotIn('cdnjs.cloudflare.com', html)
+            self.assertNotIn('<style>', html.split('</head>')[0])
+
+    def test_collectstatic_serves_hashed_compressed_files(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        with override_settings(STATIC_ROOT=static_root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(os.path.join(static_root, 'staticfiles.json')) as manifest_file:
+                hashed = json.load(manifest_file)['paths']['css/base.css']
+            self.assertRegex(hashed, r'^css/base\.[0-9a-f]{12}\.css$')
+            self.assertTrue(os.path.exists(os.path.join(static_root, hashed + '.gz')))
+
+            # The middleware chain (and WhiteNoise's file index) is built on first request.
+            client = self.client_class()
+            response = client.get('/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=315360000', response['Cache-Control'])
+            b''.join(response.streaming_content)
+            response.close()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TTL=600)
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_anonymous_landing_is_served_from_cache(self):
+        first = self.client.get(reverse('landing'))
+        self.assertTemplateUsed(first, 'calculator/landing.html')
+        second = self.client.get(reverse('landing'))
+        self.assertEqual(second.templates, [])
+        self.assertEqual(second.content, first.content)
+        self.assertIn('Cookie', second['Vary'])
+
+        self.client.force_login(User.objects.create(username='member'))
+        self.assertRedirects(self.client.get(reverse('landing')), reverse('dashboard_home'))
+
+    def test_cached_contact_form_gets_a_fresh_csrf_token(self):
+        self.client.get(reverse('contact'))
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(reverse('contact'))
+        self.assertEqual(response.templates, [])
+        html = response.content.decode()
+        self.assertNotIn(CSRF_PLACEHOLDER, html)
+        token = html.split('name="csrfmiddlewaretoken" value="')[1].split('"')[0]
+
+        response = visitor.post(reverse('contact'), {
+            'csrfmiddlewaretoken': token, 'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hi',
+        }, follow=True)
+        self.assertEqual(response.status_code, 200)
+        # The flash message bypasses the cache, and the page with it is not stored.
+        self.assertContains(response, 'Thank you Ada!')
+        self.assertNotContains(self.client.get(reverse('contact')), 'Thank you Ada!')
+
+    def test_results_fragments_follow_the_data_version(self):
+        user = User.objects.create(username='fragments')
+        self.client.force_login(user)
+        for _ in range(3):
+            make_result(user)
+        for name in ('dashboard_home', 'results'):
+            with CaptureQueriesContext(connection) as cold:
+                self.client.get(reverse(name))
+            with CaptureQueriesContext(connection) as warm:
+                self.client.get(reverse(name))
+            self.assertLess(len(warm), len(cold))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_result(user, roi_percent=999)
+        self.assertContains(self.client.get(reverse('dashboard_home')), '999%')
+        with self.captureOnCommitCallbacks(execute=True):
+            ROIResult.objects.filter(user=user).delete()
+        self.assertContains(self.client.get(reverse('results')), 'No Results Yet')
+
+
+class SmoothSliderTagTests(TestCase):
+
+    def render(self, source, **context):
+        from django.template import engines
+
+        return engines.all()[0].from_string('{% load smooth_slider %}' + source).render(context)
+
+    def setUp(self):
+        render_slider.cache_clear()
+
+    def test_label_and_icon_are_escaped(self):
+        html = self.render(
+            '{% smooth_slider label "margin" 80 0 100 1 is_percentage=True icon=icon show_range=True %}',
+            label='<script>alert(1)</script>', icon='<img src=x>',
+        )
+        self.assertNotIn('<script>', html)
+        self.assertIn('&lt;img src=x&gt; &lt;script&gt;alert(1)&lt;/script&gt;: <span id="marginLabel">80%</span>', html)
+        self.assertIn('id="marginInput" value="80"', html)
+        self.assertIn('<span>0</span><span>100</span>', html)
+
+    def test_repeated_configurations_come_from_the_cache(self):
+        source = '{% smooth_slider "Engineers" "numEngineers" 100 1 1000 1 %}'
+        first = self.render(source)
+        self.assertEqual(self.render(source), first)
+        info = render_slider.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+        self.render('{% smooth_slider label "x" 1 0 2 1 %}', label=['unhashable'])
+        self.assertEqual(render_slider.cache_info().misses, 1)
+
+    def test_full_calculator_renders_its_sliders_with_the_tag(self):
+        self.client.force_login(User.objects.create(username='sliders'))
+        response = self.client.get(reverse('full_calculator'))
+        self.assertContains(response, 'class="form-range smooth-slider"', count=19)
+        self.assertContains(response, '<span id="annualRevenueLabel">$100000000</span>')
+        self.assertEqual(render_slider.cache_info().currsize, 19)
+
+class ROIEngineTests(TestCase):
+
+    def random_inputs(self, rng):
+        return {
+            'annual_revenue': rng.randrange(1_000_000, 1_000_000_001, 1_000_000),
+            'annual_cloud_spend': rng.randrange(100_000, 100_000_001, 100_000),
+            'num_engineers': rng.randint(1, 1000),
+            'engineer_cost_per_year': rng.randrange(50_000, 500_001, 5_000),
+            'avg_response_time_sec': round(rng.uniform(0.1, 10), 1),
+            'revenue_lift_per_100ms': round(rng.uniform(0, 10), 2),
+            'current_fci_fraction': round(rng.uniform(0, 20), 1),
+            'cost_per_1pct_fci': rng.uniform(0, 10),
+            **{
+                name: rng.randint(0, 100) for name in (
+                    'gross_margin', 'container_app_fraction', 'compute_spend_fraction',
+                    'cost_sensitive_fraction', 'ops_time_fraction', 'ops_toil_fraction',
+                    'toil_reduction_fraction', 'exec_time_influence_fraction',
+                    'lat_red_container', 'lat_red_serverless', 'fci_reduction_fraction',
+                )
+            },
+        }
+
+    def test_generated_js_is_up_to_date(self):
+        call_command('build_roi_js', '--check', stdout=StringIO())
+
+    def test_calculate_roi_rounds_engine_output(self):
+        result = calculate_roi({'annual_revenue': 100_000_000, 'annual_cloud_spend': 10_000_000, 'num_engineers': 100})
+        self.assertEqual(result, {
+            'cloud_savings': 1_410_000.0, 'productivity_gain': 506_250.0, 'performance_gain': 1_594_560.0,
+            'availability_gain': 1_200_000.0, 'total_annual_gain': 4_710_810.0, 'roi_percent': 29.44,
+            'payback_months': 2.5,
+        })
+        zero = dict.fromkeys(roi_engine.INPUTS, 0) | {'num_engineers': 1, 'engineer_cost_per_year': 1}
+        self.assertEqual(calculate_roi(zero, mode='full')['payback_months'], 0)
+
+    @skipUnless(shutil.which('node'), 'needs Node.js')
+    def test_js_engine_matches_python_exactly(self):
+        rng = random.Random(45)
+        cases = [self.random_inputs(rng) for _ in range(5000)]
+        cases.append(dict.fromkeys(roi_engine.INPUTS, 0) | {'num_engineers': 1, 'engineer_cost_per_year': 1})
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "const engine = require(process.argv[1]);"
+            "const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+            "process.stdout.write(JSON.stringify(cases.map(engine.compute)));"
+        )
+        output = subprocess.run(
+            ['node', '-e', script, os.path.join(root, 'static', 'js', 'roi_engine.js')],
+            input=json.dumps(cases), capture_output=True, text=True, check=True,
+        ).stdout
+        for inputs, js_result in zip(cases, json.loads(output), strict=True):
+            self.assertEqual(js_result, roi_engine.evaluate(inputs), inputs)
+
+
+class SessionTests(TestCase):
+
+    def test_cached_db_sessions_skip_the_session_table(self):
+        caches_with_sessions = {**LOCMEM_CACHES, 'sessions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'session-tests',
+        }}
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', CACHES=caches_with_sessions):
+            client = Client()
+            client.force_login(User.objects.create(username='cached'))
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(client.get(reverse('results')).status_code, 200)
+            self.assertFalse([query for query in captured if 'django_session' in query['sql']])
+
+    def test_cleanup_deletes_expired_sessions_in_batches(self):
+        from django.contrib.sessions.models import Session
+
+        now = timezone.now()
+        for index in range(7):
+            Session.objects.create(session_key=f'expired{index}', session_data='', expire_date=now - timedelta(hours=1))
+        for index in range(2):
+            Session.objects.create(session_key=f'live{index}', session_data='', expire_date=now + timedelta(hours=1))
+        out = StringIO()
+        call_command('cleanup_sessions', '--batch-size', '3', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 7 expired session(s) in 3 batch(es).', out.getvalue())
+        self.assertEqual(sorted(Session.objects.values_list('session_key', flat=True)), ['live0', 'live1'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HotCacheTests(TestCase):
+
+    def setUp(self):
+        caches['hot'].clear()
+        self.user = User.objects.create(username='hot')
+        self.client.force_login(self.user)
+
+    def test_soft_expiry_serves_stale_while_one_caller_recomputes(self):
+        tiered = TieredCache('test', ttl=60, stale_ttl=60, alias='hot')
+        tiered.set('key', 'old')
+        with mock.patch('calculator.caching.time.time', return_value=time.time() + 90):
+            release = threading.Event()
+            calls = []
+
+            def compute():
+                calls.append(1)
+                release.wait(5)
+                return 'new'
+
+            refresher = threading.Thread(target=tiered.get_or_set, args=('key', compute))
+            refresher.start()
+            while not calls:
+                time.sleep(0.001)
+            self.assertEqual(tiered.get_or_set('key', compute), 'old')
+            release.set()
+            refresher.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(tiered.get('key'), 'new')
+
+    def test_concurrent_misses_compute_once(self):
+        tiered = TieredCache('test', ttl=60, alias='hot')
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        barrier = threading.Barrier(8)
+        values = []
+
+        def worker():
+            barrier.wait()
+            values.append(tiered.get_or_set('key', compute))
+
+        workers = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.assertEqual(values, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_history_data_is_cached_until_a_result_is_saved(self):
+        url = reverse('history_analysis_data') + '?range=1y'
+        make_result(self.user)
+        self.assertEqual(len(self.client.get(url).json()['dates']), 1)
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(url)
+        self.assertFalse([query for query in warm if 'calculator_roiresult' in query['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_result(self.user)
+        self.assertEqual(len(self.client.get(url).json()['dates']), 2)
+
+    def test_warm_reads_skip_the_shared_tier(self):
+        make_result(self.user)
+        self.assertEqual(hot_cache.user_stats(self.user)['total'], 1)
+        with mock.patch.object(caches['hot'], 'get', wraps=caches['hot'].get) as shared_get:
+            self.assertEqual(hot_cache.user_stats(self.user)['total'], 1)
+        shared_get.assert_not_called()
+
+    def test_other_processes_invalidations_are_seen_within_the_generation_ttl(self):
+        make_result(self.user)
+        self.assertEqual(hot_cache.user_stats(self.user)['quick'], 0)
+        # Another process changes the results: it replaces the shared token only.
+        ROIResult.objects.filter(user=self.user).update(mode='quick')
+        caches['hot'].set(hot_cache._generation_key(self.user.pk), 'elsewhere', None)
+        self.assertEqual(hot_cache.user_stats(self.user)['quick'], 0)
+        later = time.monotonic() + settings.HOT_CACHE_GENERATION_TTL + 1
+        with mock.patch('calculator.caching.time.monotonic', return_value=later):
+            self.assertEqual(hot_cache.user_stats(self.user)['quick'], 1)
+
+    def test_set_based_limit_updates_invalidate_cached_limits(self):
+        UserCalculationLimit.objects.create(user=self.user, full_calculations_used=5)
+        self.assertRedirects(self.client.get(reverse('full_calculator')), reverse('payment_required'))
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(reverse('payment_required'))
+        self.assertFalse([query for query in warm if 'usercalculationlimit' in query['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user_limits.reset_calculations(User.objects.filter(pk=self.user.pk))
+        self.assertEqual(self.client.get(reverse('full_calculator')).status_code, 200)
+
+    def test_invalidation_waits_for_the_commit(self):
+        generation = hot_cache.user_generation(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            make_result(self.user)
+            self.assertEqual(hot_cache.user_generation(self.user.pk), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(hot_cache.user_generation(self.user.pk), generation)
+
+    def test_bulk_invalidation_replaces_the_epoch_only(self):
+        other = User.objects.create(username='other')
+        before = {user.pk: hot_cache.user_generation(user.pk) for user in (self.user, other)}
+        with override_settings(HOT_CACHE_EPOCH_THRESHOLD=1), \
+                mock.patch.object(caches['hot'], 'set_many', wraps=caches['hot'].set_many) as set_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            hot_cache.invalidate_users([self.user.pk, other.pk])
+        self.assertEqual(list(set_many.call_args.args[0]), [hot_cache._EPOCH_KEY])
+        for user in (self.user, other):
+            self.assertNotEqual(hot_cache.user_generation(user.pk), before[user.pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class APITests(TestCase):
+
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.user = User.objects.create_user(username='api', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.api = Client(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def post(self, name, payload, **kwargs):
+        return self.api.post(reverse(name, kwargs={'version': 'v1', **kwargs}), payload, content_type='application/json')
+
+    def test_token_is_required_and_issued_for_credentials(self):
+        url = reverse('api_calculations', kwargs={'version': 'v1'})
+        self.assertEqual(Client().get(url).status_code, 401)
+        response = Client().post(reverse('api_token', kwargs={'version': 'v1'}), {'username': 'api', 'password': 'secret'})
+        self.assertEqual(response.json()['token'], self.token.key)
+        self.assertEqual(self.api.get(reverse('api_calculations', kwargs={'version': 'v2'})).status_code, 404)
+
+    def test_create_list_retrieve_and_delete(self):
+        inputs = {'annual_revenue': 50_000_000, 'annual_cloud_spend': 2_000_000, 'num_engineers': 40, 'gross_margin': 70}
+        response = self.post('api_calculations', inputs)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual(created['roi_percent'], calculate_roi({**roi_engine.DEFAULTS, **inputs}, mode='full')['roi_percent'])
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.user).full_calculations_used, 1)
+        self.assertEqual(self.post('api_calculations', {**inputs, 'gross_margin': 101}).status_code, 400)
+
+        for _ in range(3):
+            make_result(self.user)
+        url = reverse('api_calculations', kwargs={'version': 'v1'})
+        first = self.api.get(url, {'page_size': 3}).json()
+        self.assertEqual(len(first['results']), 3)
+        second = self.api.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']], [created['id']])
+
+        detail = reverse('api_calculation', kwargs={'version': 'v1', 'pk': created['id']})
+        self.assertEqual(self.api.get(detail).json()['gross_margin'], 70)
+        self.assertEqual(self.api.delete(detail).status_code, 204)
+        self.assertEqual(self.api.get(detail).status_code, 404)
+
+    def test_full_calculations_need_a_remaining_free_calculation(self):
+        UserCalculationLimit.objects.create(user=self.user, full_calculations_used=5)
+        inputs = {'annual_revenue': 50_000_000, 'annual_cloud_spend': 2_000_000, 'num_engineers': 40}
+        self.assertEqual(self.post('api_calculations', inputs).status_code, 402)
+        self.assertEqual(self.post('api_calculations', {**inputs, 'mode': 'quick'}).status_code, 201)
+
+    def test_batch_matches_single_calculations_and_streams(self):
+        rng = random.Random(7)
+        scenarios = [
+            {name: rng.randint(int(low), int(high)) if whole else round(rng.uniform(low, high), 2)
+             for name, (low, high, whole) in api_serializers.INPUT_BOUNDS.items()}
+            for _ in range(2500)
+        ]
+        response = self.post('api_calculate_batch', {'scenarios': scenarios})
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['count'], 2500)
+        for scenario, row in zip(scenarios[:200], body['results']):
+            self.assertEqual(row, calculate_roi(scenario, mode='full'))
+
+        response = self.post('api_calculate_batch', {'scenarios': [{'annual_revenue': 'x'}, {'gross_margin': 101}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Scenario 0: annual_revenue must be a number.', response.json()['scenarios'])
+        with override_settings(API_BATCH_MAX_SCENARIOS=10):
+            self.assertEqual(self.post('api_calculate_batch', {'scenarios': scenarios[:11]}).status_code, 400)
+
+    def test_batch_saves_with_bulk_create(self):
+        scenarios = [{'annual_revenue': 10_000_000 * (i + 1), 'annual_cloud_spend': 1_000_000, 'num_engineers': 10}
+                     for i in range(3)]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post('api_calculate_batch', {'mode': 'full', 'save': True, 'scenarios': scenarios})
+            body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(sum(query['sql'].startswith('INSERT INTO "calculator_roiresult"') for query in captured), 1)
+        saved = ROIResult.objects.in_bulk([row['id'] for row in body['results']])
+        self.assertEqual([saved[row['id']].annual_revenue for row in body['results']], [10_000_000, 20_000_000, 30_000_000])
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.user).full_calculations_used, 3)
+        self.assertEqual(
+            self.post('api_calculate_batch', {'mode': 'full', 'save': True, 'scenarios': scenarios}).status_code, 402
+        )
+
+    def test_create_cannot_overspend_after_a_concurrent_save(self):
+        inputs = {'annual_revenue': 50_000_000, 'annual_cloud_spend': 2_000_000, 'num_engineers': 40}
+        # The limit is read with one left; another request then uses it.
+        limit = UserCalculationLimit.objects.create(user=self.user, full_calculations_used=4)
+        UserCalculationLimit.objects.filter(pk=limit.pk).update(full_calculations_used=5)
+        with mock.patch('calculator.api.views.get_or_create_user_limit', return_value=limit):
+            self.assertEqual(self.post('api_calculations', inputs).status_code, 402)
+        self.assertEqual(UserCalculationLimit.objects.get(pk=limit.pk).full_calculations_used, 5)
+        self.assertFalse(ROIResult.objects.filter(user=self.user).exists())
+
+    def test_batch_cannot_overspend_after_a_concurrent_save(self):
+        scenarios = [{'annual_revenue': 10_000_000, 'annual_cloud_spend': 1_000_000, 'num_engineers': 10}] * 2
+        # The limit is read with three left; another request then uses two.
+        limit = UserCalculationLimit.objects.create(user=self.user, full_calculations_used=2)
+        UserCalculationLimit.objects.filter(pk=limit.pk).update(full_calculations_used=4)
+        with mock.patch('calculator.api.views.get_or_create_user_limit', return_value=limit):
+            response = self.post('api_calculate_batch', {'mode': 'full', 'save': True, 'scenarios': scenarios})
+        self.assertEqual(response.status_code, 402)
+        self.assertEqual(UserCalculationLimit.objects.get(pk=limit.pk).full_calculations_used, 4)
+        self.assertFalse(ROIResult.objects.filter(user=self.user).exists())
+
+    def test_ndjson_ingest_commits_in_batches_with_per_line_statuses(self):
+        UserCalculationLimit.objects.create(user=self.user, full_calculations_used=3)
+        quick = {'mode': 'quick', 'annual_revenue': 20_000_000, 'annual_cloud_spend': 500_000, 'num_engineers': 5}
+        full = {**quick, 'mode': 'full'}
+        lines = [
+            json.dumps({**full, 'client_id': 'a', 'roi_percent': 1e9}),
+            '{not json',
+            '',
+            json.dumps({**full, 'num_engineers': 0}),
+            json.dumps(quick),
+            json.dumps(full),
+            json.dumps({**full, 'client_id': 'f'}),
+        ]
+        with override_settings(API_INGEST_BATCH_SIZE=2), CaptureQueriesContext(connection) as captured:
+            response = self.api.post(
+                reverse('api_ingest_calculations', kwargs={'version': 'v1'}),
+                '\n'.join(lines) + '\n', content_type='application/x-ndjson',
+            )
+            statuses = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        summary = statuses.pop()['summary']
+        self.assertEqual(
+            [(status['line'], status['status']) for status in statuses],
+            [(1, 'created'), (2, 'invalid'), (4, 'invalid'), (5, 'created'), (6, 'created'), (7, 'payment_required')],
+        )
+        self.assertEqual(summary, {'created': 3, 'invalid': 2, 'payment_required': 1})
+        self.assertEqual((statuses[0]['client_id'], statuses[-1]['client_id']), ('a', 'f'))
+        self.assertIn('num_engineers', statuses[2]['errors'])
+        # The client's outputs are ignored; the server recomputes them.
+        saved = ROIResult.objects.get(pk=statuses[0]['id'])
+        self.assertEqual(saved.roi_percent, calculate_roi({**roi_engine.DEFAULTS, **full}, mode='full')['roi_percent'])
+        self.assertEqual(UserCalculationLimit.objects.get(user=self.user).full_calculations_used, 5)
+        inserts = [query for query in captured if query['sql'].startswith('INSERT INTO "calculator_roiresult"')]
+        self.assertEqual(len(inserts), 3)  # lines 1-2, 4-5 and 6-7
+
+    def test_ingest_checks_the_limit_when_each_batch_is_saved(self):
+        from .api.ingest import Ingest
+
+        limit = UserCalculationLimit.objects.create(user=self.user, full_calculations_used=2)
+        full = json.dumps({'mode': 'full', 'annual_revenue': 20_000_000, 'annual_cloud_spend': 500_000,
+                           'num_engineers': 5}).encode()
+
+        def upload():
+            yield full
+            # Another request uses two of the three calculations left.
+            UserCalculationLimit.objects.filter(pk=limit.pk).update(full_calculations_used=4)
+            yield full
+
+        statuses = [json.loads(line) for line in Ingest(self.user, upload(), batch_size=10)]
+        self.assertEqual([status.get('status') for status in statuses[:-1]], ['created', 'payment_required'])
+        self.assertEqual(statuses[-1]['summary'], {'created': 1, 'payment_required': 1})
+        self.assertEqual(UserCalculationLimit.objects.get(pk=limit.pk).full_calculations_used, 5)
+        self.assertEqual(ROIResult.objects.filter(user=self.user).count(), 1)
+
+
+@jobs.task('test_flaky')
+def flaky_task(fail_times=0, key='flaky'):
+    """Fails its first ``fail_times`` attempts (counted per ``key``)."""
+    seen = flaky_task.calls.setdefault(key, 0) + 1
+    flaky_task.calls[key] = seen
+    if seen <= fail_times:
+        raise RuntimeError(f'attempt {seen} failed')
+    return {'attempt': seen}
+
+
+flaky_task.calls = {}
+
+
+@jobs.task('test_unserializable')
+def unserializable_task():
+    return {'ids': {1, 2}}
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        flaky_task.calls.clear()
+        self.user = User.objects.create_user(username='jobs', password='secret')
+
+    def run_claimed(self, worker='w1'):
+        claimed = jobs.claim(worker, 10)
+        for job in claimed:
+            jobs.execute(job.pk, job.locked_by)
+        return claimed
+
+    def test_claim_and_execute(self):
+        job = jobs.enqueue('test_flaky', {'key': 'ok'}, user=self.user)
+        self.assertRaises(ValueError, jobs.enqueue, 'no_such_task')
+        self.assertEqual([claimed.pk for claimed in self.run_claimed()], [job.pk])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result, job.locked_by), ('succeeded', 1, {'attempt': 1}, ''))
+        self.assertEqual(jobs.claim('w1', 10), [])
+
+    def test_failures_are_retried_with_backoff_then_failed(self):
+        job = jobs.enqueue('test_flaky', {'fail_times': 5, 'key': 'retry'}, max_attempts=2)
+        self.run_claimed()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('attempt 1 failed', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+        # Not due until its backoff has passed.
+        self.assertEqual(jobs.claim('w1', 10), [])
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.run_claimed()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_results_that_cannot_be_stored_fail_the_job(self):
+        job = jobs.enqueue('test_unserializable')
+        self.run_claimed()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), ('failed', None, ''))
+        self.assertIn('cannot be stored', job.last_error)
+
+    def test_locked_database_writes_are_retried_then_left_to_the_lease(self):
+        job = jobs.enqueue('test_flaky', {'key': 'locked'})
+        [claimed] = jobs.claim('w1', 10)
+        update, attempts = QuerySet.update, []
+
+        def locked_twice(queryset, **fields):
+            attempts.append(fields)
+            if len(attempts) <= 2:
+                raise OperationalError('database is locked')
+            return update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, 'update', locked_twice), mock.patch('calculator.jobs.time.sleep'):
+            jobs.execute(job.pk, claimed.locked_by)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'succeeded')
+
+        job = jobs.enqueue('test_flaky', {'key': 'still locked'})
+        [claimed] = jobs.claim('w1', 10)
+        with mock.patch.object(QuerySet, 'update', side_effect=OperationalError('database is locked')), \
+                mock.patch('calculator.jobs.time.sleep'), self.assertLogs('calculator.jobs', 'ERROR'):
+            jobs.execute(job.pk, claimed.locked_by)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', claimed.locked_by))
+
+    def test_backoff_grows_and_is_capped(self):
+        with override_settings(JOB_RETRY_BASE_DELAY=10, JOB_RETRY_MAX_DELAY=60):
+            self.assertTrue(5 <= jobs.backoff(1) <= 10)
+            self.assertTrue(20 <= jobs.backoff(3) <= 40)
+            self.assertTrue(30 <= jobs.backoff(10) <= 60)
+
+    def test_claims_do_not_overlap_and_expired_leases_are_reclaimed(self):
+        for _ in range(5):
+            jobs.enqueue('test_flaky')
+        first, second = jobs.claim('w1', 3), jobs.claim('w2', 3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+
+        # w1 dies: once its lease expires its jobs are visible again, and its
+        # late writes no longer apply.
+        Job.objects.filter(pk__in=[job.pk for job in first]).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = jobs.claim('w3', 10)
+        self.assertEqual({job.pk for job in reclaimed}, {job.pk for job in first})
+        self.assertTrue(all(job.attempts == 2 for job in reclaimed))
+        jobs.execute(first[0].pk, first[0].locked_by)
+        self.assertEqual(Job.objects.get(pk=first[0].pk).status, 'running')
+
+    def test_expired_lease_on_last_attempt_fails_the_job(self):
+        job = jobs.enqueue('test_flaky', max_attempts=1)
+        jobs.claim('w1', 1)
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.claim('w2', 1), [])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'failed')
+
+    def test_render_pdf_task_fills_the_pdf_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        result = make_result(self.user)
+        job = jobs.enqueue('render_pdf', {'result_id': result.pk}, user=self.user)
+        self.assertEqual(job.max_attempts, 3)
+        with override_settings(PDF_CACHE_DIR=cache_dir):
+            self.run_claimed()
+            self.assertIsNotNone(PDFRenderCache().read(result.pk))
+        self.assertEqual(Job.objects.get(pk=job.pk).result, {'result_id': result.pk, 'rendered': True})
+
+    def test_saved_full_results_can_queue_their_pdf(self):
+        self.client.force_login(self.user)
+        payload = json.dumps({'inputs': {'annualRevenue': 10_000_000, 'annualCloudSpend': 500_000}, 'results': {}})
+        self.client.post(reverse('save_full_results'), payload, content_type='application/json')
+        self.assertFalse(Job.objects.exists())
+        with override_settings(JOB_PRERENDER_PDFS=True):
+            response = self.client.post(reverse('save_full_results'), payload, content_type='application/json')
+        job = Job.objects.get()
+        self.assertEqual(
+            (job.kind, job.payload, job.user), ('render_pdf', {'result_id': response.json()['result_id']}, self.user)
+        )
+
+    def test_queued_export_is_written_for_download(self):
+        export_dir, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        make_result(self.user)
+        self.client.force_login(self.user)
+        with override_settings(EXPORT_DIR=export_dir, PDF_CACHE_DIR=cache_dir, BULK_EXPORT_WORKERS=0):
+            self.assertEqual(self.client.get(reverse('download_export')).status_code, 404)
+            response = self.client.post(reverse('queue_export'))
+            self.assertEqual(response.status_code, 202)
+            urls = response.json()
+            self.assertEqual(self.client.get(urls['status_url']).json()['status'], 'queued')
+            self.run_claimed()
+            self.assertEqual(self.client.get(urls['status_url']).json()['status'], 'succeeded')
+            response = self.client.get(urls['download_url'])
+            body = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="ROI_Reports_jobs.zip"')
+        with zipfile.ZipFile(BytesIO(body)) as archive:
+            self.assertEqual(len(archive.namelist()), 1)
+
+    def test_status_endpoint_shows_own_jobs_only(self):
+        job = jobs.enqueue('test_flaky', {'fail_times': 1}, user=self.user)
+        self.run_claimed()
+        url = reverse('job_status', args=[job.pk])
+        self.assertEqual(Client().get(url).status_code, 302)
+
+        self.client.force_login(self.user)
+        data = self.client.get(url).json()
+        self.assertEqual((data['kind'], data['status'], data['attempts']), ('test_flaky', 'queued', 1))
+        self.assertIs(data['last_error'], True)
+
+        other = User.objects.create_user(username='other', password='secret')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        other.is_staff = True
+        other.save()
+        self.assertIn('attempt 1 failed', self.client.get(url).json()['last_error'])
+
+
+class RunJobsCommandTests(TransactionTestCase):
+    # Jobs run on pool threads, which cannot see a TestCase's uncommitted rows.
+
+    def test_once_runs_due_jobs_in_a_thread_pool(self):
+        flaky_task.calls.clear()
+        due = [jobs.enqueue('test_flaky', {'key': str(n)}) for n in range(4)]
+        later = jobs.enqueue('test_flaky', delay=60)
+        out = StringIO()
+        call_command('run_jobs', once=True, workers=2, pool='thread', poll=0.01, stdout=out)
+        self.assertIn('4 job(s) run', out.getvalue())
+        self.assertEqual(set(Job.objects.filter(pk__in=[job.pk for job in due]).values_list('status', flat=True)), {'succeeded'})
+        self.assertEqual(Job.objects.get(pk=later.pk).status, 'queued')
+
+    def test_runner_errors_are_reported_and_leave_the_job_to_its_lease(self):
+        job = jobs.enqueue('test_flaky')
+        out, err = StringIO(), StringIO()
+        with mock.patch('calculator.jobs.execute', side_effect=RuntimeError('worker broke')):
+            call_command('run_jobs', once=True, workers=1, pool='thread', poll=0.01, stdout=out, stderr=err)
+        self.assertIn('0 job(s) run', out.getvalue())
+        self.assertIn("RuntimeError('worker broke')", err.getvalue())
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
 
-# Create your tests here.
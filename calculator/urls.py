@@ -23,6 +23,11 @@ urlpatterns = [
     
     # Export PDF (protected)
     path('results/export/<int:result_id>/', login_required(views.export_pdf), name='export_pdf'),
+    path('results/compare/', login_required(views.compare_results), name='compare_results'),
+    path('results/export-all/', login_required(views.export_all_results), name='export_all_results'),
+    path('results/export-all/progress/<str:token>/', login_required(views.export_progress), name='export_progress'),
+    path('results/export-all/queue/', login_required(views.queue_export), name='queue_export'),
+    path('results/export-all/download/', login_required(views.download_export), name='download_export'),
     
     # Payment routes (protected)
     path('payment-required/', login_required(views.payment_required), name='payment_required'),
@@ -38,4 +43,9 @@ urlpatterns = [
     # Chatbot routes (protected)
     path('chatbot/', login_required(views.chatbot_view), name='chatbot'),
     path('chatbot/api/', login_required(views.chatbot_api), name='chatbot_api'),
+    path('chatbot/stream/', login_required(views.chatbot_stream), name='chatbot_stream'),
+    path('chatbot/cache-stats/', login_required(views.chatbot_cache_stats), name='chatbot_cache_stats'),
+
+    # Background job status (protected)
+    path('jobs/<int:job_id>/', login_required(views.job_status), name='job_status'),
 ] 
\ No newline at end of file
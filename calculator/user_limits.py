@@ -0,0 +1,105 @@
+"""
+Set-based operations on users' calculation limits.
+
+Every operation takes a ``User`` queryset (any filter) and runs as one
+``UPDATE`` over ``UserCalculationLimit``. Users without a limit row yet
+get one from a single ``bulk_create``. Long username lists are processed
+in batches so each statement stays within the database's parameter
+limit (999 on older SQLite builds). Queryset updates send no model
+signals, so each operation retires the affected users' hot-cache entries
+itself.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import hot_cache
+from .models import UserCalculationLimit
+
+BATCH_SIZE = 500
+FREE_CALCULATIONS = 5
+
+
+def users_by_username(usernames):
+    return User.objects.filter(username__in=usernames)
+
+
+def ensure_limits(users):
+    """Create the missing UserCalculationLimit rows for ``users``; return how many."""
+    missing = users.filter(usercalculationlimit__isnull=True).values_list('pk', flat=True)
+    created = UserCalculationLimit.objects.bulk_create(
+        [UserCalculationLimit(user_id=user_id) for user_id in missing],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(created)
+
+
+def _limits(users):
+    # A subquery keeps the UPDATE to one statement regardless of how many
+    # users the queryset matches.
+    return UserCalculationLimit.objects.filter(user__in=users.values('pk'))
+
+
+@transaction.atomic
+def grant_unlimited_access(users):
+    """Grant unlimited access; users who already have it keep their purchase date."""
+    ensure_limits(users)
+    updated = _limits(users).filter(unlimited_access=False).update(
+        unlimited_access=True, unlimited_access_purchased_at=timezone.now()
+    )
+    hot_cache.invalidate_users(users.values_list('pk', flat=True))
+    return updated
+
+
+@transaction.atomic
+def reset_calculations(users):
+    """Set full_calculations_used back to 0."""
+    ensure_limits(users)
+    updated = _limits(users).update(full_calculations_used=0)
+    hot_cache.invalidate_users(users.values_list('pk', flat=True))
+    return updated
+
+
+def add_free_calculations(limits, count=FREE_CALCULATIONS):
+    """Give ``count`` calculations back to each of the ``limits`` rows (floored at 0 used)."""
+    updated = limits.update(full_calculations_used=Greatest(F('full_calculations_used') - count, 0))
+    hot_cache.invalidate_users(limits.values_list('user_id', flat=True))
+    return updated
+
+
+def spend_free_calculations(limits, count):
+    """Use up ``count`` free calculations on each of the ``limits`` rows that has that many left.
+
+    The check and the increment are one conditional ``UPDATE``, so
+    concurrent requests cannot spend the same calculation twice. Returns
+    the number of rows updated; rows without enough left are unchanged.
+    """
+    return limits.filter(full_calculations_used__lte=FREE_CALCULATIONS - count).update(
+        full_calculations_used=F('full_calculations_used') + count
+    )
+
+
+def mark_payments(payments, status):
+    """Set the status of ``payments``; completing one stamps paid_at if unset."""
+    if status == 'completed':
+        return payments.update(
+            status=status,
+            paid_at=Coalesce(F('paid_at'), Value(timezone.now(), output_field=DateTimeField())),
+        )
+    return payments.update(status=status)
+
+
+def batched(iterable, size=BATCH_SIZE):
+    """Yield lists of up to ``size`` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
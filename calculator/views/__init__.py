@@ -0,0 +1,32 @@
+"""
+Views of the calculator app, one module per area:
+
+- ``pages``: landing, contact, registration, dashboard home, logout
+- ``calculations``: quick estimate, full calculator, saving results
+- ``results``: saved results, PDF export, comparison, bulk export
+- ``history``: history analysis page and chart data
+- ``payments``: calculation limits, Razorpay checkout, payment history
+- ``chatbot``: chatbot page and answer endpoints
+- ``jobs``: background job status
+
+Everything is re-exported here, so ``from calculator import views`` and
+``views.<name>`` keep working. Heavy dependencies (the Gemini SDK,
+ReportLab, the export process pool) are imported inside the code that
+needs them, not by these modules.
+"""
+
+from .calculations import (
+    calculate_roi, full_calculator, quick_estimate, save_full_results, save_quick_results,
+)
+from .chatbot import chatbot_api, chatbot_cache_stats, chatbot_stream, chatbot_view
+from .history import history_analysis, history_analysis_data
+from .jobs import job_status
+from .pages import contact_page, custom_logout, dashboard_home, home_page, register
+from .payments import (
+    create_payment, get_or_create_user_limit, payment_failure, payment_history,
+    payment_required, payment_success, razorpay_webhook, verify_payment,
+)
+from .results import (
+    compare_results, delete_all_results, delete_result, download_export, export_all_results,
+    export_pdf, export_progress, queue_export, results,
+)
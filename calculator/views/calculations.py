@@ -0,0 +1,294 @@
+"""Quick estimate and full calculator, and saving their results."""
+
+import json
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+
+from .. import hot_cache, roi_engine
+from ..forms import FullCalculatorForm
+from ..models import ROIResult
+from ..tasks import prerender_pdf
+from .payments import get_or_create_user_limit
+
+
+@login_required
+def quick_estimate(request):
+    # Default values
+    annual_revenue = int(request.GET.get('annualRevenue', 100000000))
+    annual_cloud_spend = int(request.GET.get('annualCloudSpend', 10000000))
+    num_engineers = int(request.GET.get('numEngineers', 100))
+
+    # The page recalculates in the browser with the same formulas
+    # (static/js/roi_engine.js); this is the first paint.
+    result = calculate_roi({
+        'annual_revenue': annual_revenue,
+        'annual_cloud_spend': annual_cloud_spend,
+        'num_engineers': num_engineers,
+    })
+
+    context = {
+        "annual_revenue": annual_revenue,
+        "annual_cloud_spend": annual_cloud_spend,
+        "num_engineers": num_engineers,
+        "total_annual_gain": result['total_annual_gain'],
+        "roi_percent": result['roi_percent'],
+        "payback_months": result['payback_months'],
+        "cloud_savings": result['cloud_savings'],
+    }
+    return render(request, "calculator/quick_estimate.html", context)
+
+
+@login_required
+def full_calculator(request):
+    # Check if user can make calculation. A POST saves the limit, so it
+    # reads the row from the database rather than the hot cache.
+    if request.method == 'POST':
+        user_limit = get_or_create_user_limit(request.user)
+    else:
+        user_limit = hot_cache.user_limit(request.user)
+    
+    # Check for payment success messages
+    if request.GET.get('payment_success') == 'true':
+        if request.GET.get('unlimited_access') == 'true' and user_limit.unlimited_access:
+            messages.success(request, '🎉 Payment successful! You now have unlimited access to the Full Calculator!')
+        else:
+            messages.success(request, '🎉 Payment successful! You can now make additional calculations.')
+    
+    if not user_limit.can_make_calculation():
+        # User has exceeded free limit, redirect to payment page
+        messages.warning(request, 'You have used all 5 free calculations. Please make a payment to continue.')
+        return redirect('payment_required')
+    
+    if request.method == 'POST':
+        form = FullCalculatorForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            result = calculate_roi(data, mode='full')
+
+            # Check if this calculation requires payment
+            payment_required = not user_limit.can_make_calculation()
+            
+            roi_result = ROIResult.objects.create(
+                user=request.user,
+                mode='full',
+                annual_revenue=data['annual_revenue'],
+                gross_margin=data['gross_margin'],
+                container_app_fraction=data['container_app_fraction'],
+                annual_cloud_spend=data['annual_cloud_spend'],
+                compute_spend_fraction=data['compute_spend_fraction'],
+                cost_sensitive_fraction=data['cost_sensitive_fraction'],
+                num_engineers=data['num_engineers'],
+                engineer_cost_per_year=data['engineer_cost_per_year'],
+                ops_time_fraction=data['ops_time_fraction'],
+                ops_toil_fraction=data['ops_toil_fraction'],
+                toil_reduction_fraction=data['toil_reduction_fraction'],
+                avg_response_time_sec=data['avg_response_time_sec'],
+                exec_time_influence_fraction=data['exec_time_influence_fraction'],
+                lat_red_container=data['lat_red_container'],
+                lat_red_serverless=data['lat_red_serverless'],
+                revenue_lift_per_100ms=data['revenue_lift_per_100ms'],
+                current_fci_fraction=data['current_fci_fraction'],
+                fci_reduction_fraction=data['fci_reduction_fraction'],
+                cost_per_1pct_fci=data['cost_per_1pct_fci'],
+                # Results
+                cloud_savings=result['cloud_savings'],
+                productivity_gain=result['productivity_gain'],
+                performance_gain=result['performance_gain'],
+                availability_gain=result['availability_gain'],
+                total_annual_gain=result['total_annual_gain'],
+                roi_percent=result['roi_percent'],
+                payback_months=result['payback_months'],
+                # Payment tracking
+                payment_required=payment_required,
+                payment_completed=not payment_required,  # If no payment required, mark as completed
+            )
+            
+            # Increment calculation count
+            user_limit.increment_calculation_count()
+            
+            if payment_required:
+                messages.warning(request, 'Calculation completed, but payment is required to view results.')
+                return redirect('payment_required')
+            else:
+                messages.success(request, 'Full calculator calculation saved successfully!')
+                return render(request, 'calculator/full_calculator.html', {'form': form, 'result': result})
+    else:
+        form = FullCalculatorForm()
+    
+    # Add user limit info to context
+    context = {
+        'form': form,
+        'user_limit': user_limit,
+        'remaining_calculations': user_limit.get_remaining_free_calculations(),
+        'is_admin': request.user.is_staff or request.user.is_superuser,
+        'has_unlimited_access': user_limit.unlimited_access,
+        'unlimited_access_purchased_at': user_limit.unlimited_access_purchased_at,
+    }
+    return render(request, 'calculator/full_calculator.html', context)
+
+
+@require_POST
+@login_required
+def save_quick_results(request):
+    """Save quick calculator results"""
+    try:
+        data = json.loads(request.body)
+        inputs = data.get('inputs', {})
+        results = data.get('results', {})
+        
+        # Create ROIResult object
+        roi_result = ROIResult.objects.create(
+            user=request.user,
+            mode='quick',
+            annual_revenue=inputs.get('annualRevenue', 0),
+            annual_cloud_spend=inputs.get('annualCloudSpend', 0),
+            num_engineers=inputs.get('numEngineers', 0),
+            total_annual_gain=results.get('totalAnnualGain', 0),
+            roi_percent=results.get('roiPercent', 0),
+            payback_months=results.get('paybackMonths', 0),
+            cloud_savings=results.get('cloudSavings', 0),
+            productivity_gain=results.get('productivityGain', 0),
+            performance_gain=results.get('performanceGain', 0),
+            availability_gain=results.get('availabilityGain', 0),
+            # Set default values for required fields
+            gross_margin=80,
+            container_app_fraction=90,
+            compute_spend_fraction=60,
+            cost_sensitive_fraction=50,
+            engineer_cost_per_year=150000,
+            ops_time_fraction=15,
+            ops_toil_fraction=50
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Results saved successfully!',
+            'result_id': roi_result.id
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'Error saving results: {str(e)}'
+        }, status=400)
+
+
+@require_POST
+@login_required
+def save_full_results(request):
+    """Save full calculator results"""
+    try:
+        data = json.loads(request.body)
+        inputs = data.get('inputs', {})
+        # Extract all the values from the full calculator
+        annual_revenue = inputs.get('annualRevenue', 0)
+        gross_margin = inputs.get('grossMargin', 80)
+        container_app_fraction = inputs.get('containerAppFraction', 90)
+        annual_cloud_spend = inputs.get('annualCloudSpend', 0)
+        compute_spend_fraction = inputs.get('computeSpendFraction', 60)
+        cost_sensitive_fraction = inputs.get('costSensitiveFraction', 50)
+        num_engineers = inputs.get('numEngineers', 0)
+        engineer_cost_per_year = inputs.get('engineerCostPerYear', 150000)
+        ops_time_fraction = inputs.get('opsTimeFraction', 15)
+        ops_toil_fraction = inputs.get('opsToilFraction', 50)
+        avg_response_time_sec = inputs.get('avgResponseTimeSec', 2)
+        revenue_lift_per_100ms = inputs.get('revenueLiftPer100ms', 1)
+        current_fci_fraction = inputs.get('currentFCIFraction', 2)
+        cost_per_1pct_fci = inputs.get('costPer1PctFCI', 1)
+        toil_reduction_fraction = inputs.get('toilReductionFraction', 45)
+        exec_time_influence_fraction = inputs.get('execTimeInfluenceFraction', 33)
+        lat_red_container = inputs.get('latRedContainer', 28)
+        lat_red_serverless = inputs.get('latRedServerless', 50)
+        fci_reduction_fraction = inputs.get('fciReductionFraction', 75)
+        
+        # Get calculated results
+        results = data.get('results', {})
+        
+        # Get user limit and check if they can make calculation
+        user_limit = get_or_create_user_limit(request.user)
+        
+        # Create ROIResult object
+        roi_result = ROIResult.objects.create(
+            user=request.user,
+            mode='full',
+            annual_revenue=annual_revenue,
+            gross_margin=gross_margin,
+            container_app_fraction=container_app_fraction,
+            annual_cloud_spend=annual_cloud_spend,
+            compute_spend_fraction=compute_spend_fraction,
+            cost_sensitive_fraction=cost_sensitive_fraction,
+            num_engineers=num_engineers,
+            engineer_cost_per_year=engineer_cost_per_year,
+            ops_time_fraction=ops_time_fraction,
+            ops_toil_fraction=ops_toil_fraction,
+            toil_reduction_fraction=toil_reduction_fraction,
+            avg_response_time_sec=avg_response_time_sec,
+            exec_time_influence_fraction=exec_time_influence_fraction,
+            lat_red_container=lat_red_container,
+            lat_red_serverless=lat_red_serverless,
+            revenue_lift_per_100ms=revenue_lift_per_100ms,
+            current_fci_fraction=current_fci_fraction,
+            fci_reduction_fraction=fci_reduction_fraction,
+            cost_per_1pct_fci=cost_per_1pct_fci,
+            # Results
+            cloud_savings=results.get('cloudSavings', 0),
+            productivity_gain=results.get('productivityGain', 0),
+            performance_gain=results.get('performanceGain', 0),
+            availability_gain=results.get('availabilityGain', 0),
+            total_annual_gain=results.get('totalAnnualGain', 0),
+            roi_percent=results.get('roiPercent', 0),
+            payback_months=results.get('paybackMonths', 0),
+        )
+        
+        # Increment calculation count (this was missing!)
+        user_limit.increment_calculation_count()
+        prerender_pdf(roi_result)
+        
+        # Prepare response message based on user type
+        is_admin = request.user.is_staff or request.user.is_superuser
+        remaining = user_limit.get_remaining_free_calculations()
+        # Convert Infinity to a JSON-safe value
+        if remaining == float('inf'):
+            remaining_calculations = "unlimited"
+        else:
+            remaining_calculations = remaining
+
+        if is_admin:
+            message = 'Full calculator results saved successfully! (Admin: Unlimited calculations)'
+        else:
+            message = f'Full calculator results saved successfully! ({remaining_calculations} free calculations remaining)'
+
+        return JsonResponse({
+            'success': True,
+            'message': message,
+            'result_id': roi_result.id,
+            'remaining_calculations': remaining_calculations,
+            'is_admin': is_admin
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'Error saving results: {str(e)}'
+        }, status=400)
+
+
+def calculate_roi(data, mode='quick'):
+    """
+    ROI calculation for both Quick and Full modes
+    - Quick mode uses default values
+    - Full mode uses form-provided values
+
+    The formulas live in roi_engine, which also generates the browser copy.
+    """
+    if mode == 'quick':
+        inputs = {name: data[name] for name in ('annual_revenue', 'annual_cloud_spend', 'num_engineers')}
+    else:
+        inputs = {name: data[name] for name in roi_engine.INPUTS}
+    result = roi_engine.evaluate(inputs)
+    return {
+        name: round(value, 1 if name == 'payback_months' else 2)
+        for name, value in result.items()
+    }
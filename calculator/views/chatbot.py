@@ -0,0 +1,207 @@
+"""Chatbot page, JSON and streaming answer endpoints.
+
+``get_llm_client()`` builds the Gemini client on the first question that
+reaches the model, so the SDK is never imported by processes that only
+serve cached or FAQ answers.
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from ..chatbot import (
+    SYSTEM_PROMPT, get_answer_cache, sse_event, stream_limiter,
+)
+from ..faq import answer_locally, get_faq_stats
+from ..llm import LLMUnavailable, get_llm_client
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def chatbot_api(request):
+    """Handle chatbot API requests with OpenAI integration"""
+    try:
+        data = json.loads(request.body)
+        user_message = data.get('message', '').strip()
+        
+        if not user_message:
+            return JsonResponse({
+                'success': False,
+                'error': 'Message cannot be empty'
+            }, status=400)
+        
+        # Serve repeated questions from the answer cache
+        answer_cache = get_answer_cache()
+        cached_response = answer_cache.get(user_message)
+        if cached_response is not None:
+            return JsonResponse({
+                'success': True,
+                'response': cached_response,
+                'cached': True,
+                'source': 'cache',
+                'timestamp': timezone.now().isoformat()
+            })
+        
+        # Answer from the local FAQ index when it is confident enough
+        faq_response = answer_locally(user_message)
+        if faq_response is not None:
+            return JsonResponse({
+                'success': True,
+                'response': faq_response,
+                'cached': False,
+                'source': 'faq',
+                'timestamp': timezone.now().isoformat()
+            })
+        
+        # Get the shared Gemini client (configured once per process)
+        api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        if not api_key:
+            return JsonResponse({
+                'success': False,
+                'error': 'Gemini API key not configured'
+            }, status=500)
+        
+        try:
+            client = get_llm_client()
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Failed to initialize Gemini: {str(e)}'
+            }, status=500)
+        
+        # Create the full prompt
+        full_prompt = f"{SYSTEM_PROMPT}\n\nUser question: {user_message}"
+        
+        # Make API call to Gemini
+        try:
+            started = time.perf_counter()
+            bot_response = client.generate(full_prompt)
+            get_faq_stats().record_upstream(time.perf_counter() - started)
+        except LLMUnavailable as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=503)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Failed to generate response: {str(e)}'
+            }, status=500)
+        
+        answer_cache.set(user_message, bot_response)
+        
+        return JsonResponse({
+            'success': True,
+            'response': bot_response,
+            'cached': False,
+            'source': 'gemini',
+            'timestamp': timezone.now().isoformat()
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON data'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        }, status=500)
+
+
+@login_required
+@require_POST
+def chatbot_stream(request):
+    """Stream chatbot answers to the browser as server-sent events"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data'}, status=400)
+    user_message = str(data.get('message', '')).strip()
+    if not user_message:
+        return JsonResponse({'success': False, 'error': 'Message cannot be empty'}, status=400)
+    
+    # Cached and FAQ answers are complete already; send them as one event
+    answer_cache = get_answer_cache()
+    local_response = answer_cache.get(user_message)
+    source = 'cache'
+    if local_response is None:
+        local_response = answer_locally(user_message)
+        source = 'faq'
+    if local_response is not None:
+        def local_events():
+            yield sse_event('token', {'text': local_response})
+            yield sse_event('done', {'source': source})
+        return _sse_response(local_events())
+    
+    api_key = getattr(settings, 'GEMINI_API_KEY', None)
+    if not api_key:
+        return JsonResponse({'success': False, 'error': 'Gemini API key not configured'}, status=500)
+    
+    # A plain generator: the WSGI server sends each event as it is yielded,
+    # and closes the generator when the client disconnects.
+    def upstream_events():
+        # Flush headers straight away so time-to-first-byte does not
+        # depend on the upstream model or on waiting for a slot.
+        yield sse_event('start', {})
+        # The slot is taken and released in here, so a response whose
+        # body is never iterated cannot hold one.
+        with stream_limiter.slot(getattr(settings, 'CHATBOT_STREAM_QUEUE_TIMEOUT', 2)) as acquired:
+            if not acquired:
+                yield sse_event('error', {'error': 'The assistant is busy. Please try again.', 'retry_after': 1})
+                return
+            started = time.perf_counter()
+            parts = []
+            chunks = None
+            try:
+                chunks = get_llm_client().stream(f"{SYSTEM_PROMPT}\n\nUser question: {user_message}")
+                for text in chunks:
+                    parts.append(text)
+                    yield sse_event('token', {'text': text})
+            except Exception as e:
+                yield sse_event('error', {'error': f'Failed to generate response: {str(e)}'})
+                return
+            finally:
+                # Abandon the upstream call if the client went away mid-stream.
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+            get_faq_stats().record_upstream(time.perf_counter() - started)
+            answer_cache.set(user_message, ''.join(parts))
+            yield sse_event('done', {'source': 'gemini'})
+    
+    return _sse_response(upstream_events())
+
+
+def _sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@require_GET
+def chatbot_cache_stats(request):
+    """Return chatbot answer cache and local FAQ counters (admin only)"""
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({'error': 'Admin access required'}, status=403)
+    stats = get_answer_cache().stats()
+    stats['faq'] = get_faq_stats().stats()
+    return JsonResponse(stats)
+
+
+@login_required
+def chatbot_view(request):
+    """Render the chatbot interface"""
+    return render(request, 'calculator/chatbot.html')
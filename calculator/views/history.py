@@ -0,0 +1,98 @@
+"""History analysis page and its chart data."""
+
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.db.models.functions import TruncDay, TruncMonth
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .. import hot_cache
+from ..models import ROIResult
+
+HISTORY_RANGES = ('10d', '1m', '2m', '3m', '6m', '1y')
+
+
+@login_required
+@require_GET
+def history_analysis_data(request):
+    """Return historical ROIResult data for charts, filtered by time range."""
+    filter_range = request.GET.get('range', '2m')  # default: last 2 months
+    if filter_range not in HISTORY_RANGES:
+        filter_range = '2m'
+    data = hot_cache.history_payload(
+        request.user, filter_range, lambda: build_history_payload(request.user, filter_range)
+    )
+    return JsonResponse(data)
+
+
+def build_history_payload(user, filter_range):
+    """The chart data for ``user``'s results in ``filter_range``."""
+    now = timezone.now()
+    # Calculate start date based on filter
+    if filter_range == '10d':
+        start_date = now - timedelta(days=10)
+        group_by = TruncDay('timestamp')
+        group_type = 'day'
+    elif filter_range == '1m':
+        start_date = now - timedelta(days=30)
+        group_by = TruncDay('timestamp')
+        group_type = 'day'
+    elif filter_range == '3m':
+        start_date = now - timedelta(days=90)
+        group_by = TruncMonth('timestamp')
+        group_type = 'month'
+    elif filter_range == '6m':
+        start_date = now - timedelta(days=180)
+        group_by = TruncMonth('timestamp')
+        group_type = 'month'
+    elif filter_range == '1y':
+        start_date = now - timedelta(days=365)
+        group_by = TruncMonth('timestamp')
+        group_type = 'month'
+    else:  # default 2 months
+        start_date = now - timedelta(days=60)
+        group_by = TruncMonth('timestamp')
+        group_type = 'month'
+
+    # Query ROIResult for user in range
+    results = ROIResult.objects.filter(user=user, timestamp__gte=start_date).order_by('timestamp')
+
+    # Prepare time series data
+    data = {
+        'dates': [],
+        'roi_percent': [],
+        'availability_gain': [],
+        'performance_gain': [],
+        'cloud_savings': [],
+        'productivity_gain': [],
+    }
+    for r in results:
+        data['dates'].append(r.timestamp.strftime('%Y-%m-%d'))
+        data['roi_percent'].append(float(r.roi_percent))
+        data['availability_gain'].append(float(r.availability_gain))
+        data['performance_gain'].append(float(r.performance_gain))
+        data['cloud_savings'].append(float(r.cloud_savings))
+        data['productivity_gain'].append(float(r.productivity_gain))
+
+    # Calculations per period (Python-side grouping for Djongo/MongoDB)
+    from collections import Counter
+    if group_type == 'day':
+        group_format = '%Y-%m-%d'
+    else:
+        group_format = '%Y-%m'
+    period_counts = Counter()
+    for r in results:
+        period = r.timestamp.strftime(group_format)
+        period_counts[period] += 1
+    data['calculations_per_period'] = dict(period_counts)
+    return data
+
+
+# Analysis page view
+@login_required
+def history_analysis(request):
+    """Render the analysis page with chart placeholders and filter options."""
+    return render(request, 'calculator/history_analysis.html')
@@ -0,0 +1,32 @@
+"""Status of background jobs (see ``calculator.jobs``)."""
+
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from ..models import Job
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+@require_GET
+def job_status(request, job_id):
+    """Return one job's status as JSON. Users only see their own jobs; staff see all."""
+    jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(user=request.user)
+    job = jobs.filter(pk=job_id).first()
+    if job is None:
+        raise Http404('No such job.')
+    return JsonResponse({
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'run_after': _isoformat(job.run_after),
+        'result': job.result,
+        # Tracebacks are for operators, not customers.
+        'last_error': job.last_error if request.user.is_staff else bool(job.last_error),
+        'created_at': _isoformat(job.created_at),
+        'finished_at': _isoformat(job.finished_at),
+    })
@@ -0,0 +1,91 @@
+"""Public pages, registration and the dashboard home."""
+
+from django.contrib import messages
+from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.forms import UserCreationForm
+from django.db import IntegrityError
+from django.shortcuts import redirect, render
+
+from .. import hot_cache
+from ..models import ROIResult
+from ..page_cache import cache_anonymous_page
+
+
+def register(request):
+    if request.user.is_authenticated:
+        return redirect('dashboard_home')
+    
+    if request.method == 'POST':
+        form = UserCreationForm(request.POST)
+        if form.is_valid():
+            try:
+                user = form.save()
+                # Auto-login after registration
+                username = form.cleaned_data.get('username')
+                password = form.cleaned_data.get('password1')
+                user = authenticate(username=username, password=password)
+                login(request, user)
+                messages.success(request, 'Account created successfully! Welcome to ROI Calculator.')
+                return redirect('dashboard_home')
+            except IntegrityError:
+                messages.error(request, 'Username already exists. Please choose a different username.')
+        else:
+            for field, errors in form.errors.items():
+                for error in errors:
+                    messages.error(request, f'{field}: {error}')
+    else:
+        form = UserCreationForm()
+    return render(request, 'registration/register.html', {'form': form})
+
+
+@cache_anonymous_page
+def home_page(request):
+    """Landing page for non-authenticated users"""
+    if request.user.is_authenticated:
+        return redirect('dashboard_home')
+    return render(request, 'calculator/landing.html')
+
+
+@cache_anonymous_page
+def contact_page(request):
+    """Contact page with form"""
+    if request.method == 'POST':
+        name = request.POST.get('name', '')
+        email = request.POST.get('email', '')
+        message = request.POST.get('message', '')
+        messages.success(request, f'Thank you {name}! Your message has been sent successfully. We\'ll get back to you soon.')
+        return redirect('contact')
+    return render(request, 'calculator/contact.html')
+
+
+@login_required
+def dashboard_home(request):
+    """Dashboard home page for authenticated users"""
+    results = ROIResult.objects.filter(user=request.user)
+    # Limits and statistics come from the hot cache; the recent results are
+    # only queried when the template's {% cache %} block misses.
+    user_limit = hot_cache.user_limit(request.user)
+    stats = hot_cache.user_stats(request.user)
+    is_admin = request.user.is_staff or request.user.is_superuser
+
+    context = {
+        'results_version': hot_cache.user_generation(request.user.pk),
+        'recent_results': results.order_by('-timestamp')[:5],
+        'total_calculations': stats['total'],
+        'quick_calculations': stats['quick'],
+        'full_calculations': stats['full'],
+        'best_roi': stats['best_roi'],
+        'user_limit': user_limit,
+        'remaining_calculations': user_limit.get_remaining_free_calculations(),
+        'is_admin': is_admin,
+        'has_unlimited_access': user_limit.unlimited_access,
+        'unlimited_access_purchased_at': user_limit.unlimited_access_purchased_at,
+    }
+    return render(request, 'calculator/dashboard_home.html', context)
+
+
+def custom_logout(request):
+    logout(request)
+    messages.success(request, 'You have been successfully logged out!')
+    return redirect('landing')
@@ -0,0 +1,295 @@
+"""Calculation limits, Razorpay checkout and payment history."""
+
+import json
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .. import hot_cache
+from ..models import Payment, UserCalculationLimit
+
+
+def get_or_create_user_limit(user):
+    """Get or create UserCalculationLimit for a user"""
+    limit, created = UserCalculationLimit.objects.get_or_create(user=user)
+    return limit
+
+
+@login_required
+def payment_required(request):
+    """Show payment required page"""
+    user_limit = hot_cache.user_limit(request.user)
+    remaining = user_limit.get_remaining_free_calculations()
+    
+    context = {
+        'remaining_calculations': remaining,
+        'total_used': user_limit.full_calculations_used,
+        'is_admin': request.user.is_staff or request.user.is_superuser,
+    }
+    return render(request, 'calculator/payment_required.html', context)
+
+
+@login_required
+def create_payment(request):
+    """Create a payment order for Razorpay"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    
+    try:
+        # Check if user can make calculation
+        user_limit = get_or_create_user_limit(request.user)
+        if user_limit.can_make_calculation():
+            return JsonResponse({'error': 'You still have free calculations remaining'}, status=400)
+        
+        # Create payment record
+        payment = Payment.objects.create(
+            user=request.user,
+            amount=Decimal('1.00'),
+            currency='INR',
+            payment_id=str(uuid.uuid4()),
+            status='pending'
+        )
+        
+        # Get Razorpay configuration
+        razorpay_key_id = getattr(settings, 'RAZORPAY_KEY_ID', 'rzp_test_demo_key')
+        razorpay_payment_button_id = getattr(settings, 'RAZORPAY_PAYMENT_BUTTON_ID', 'pl_RDhRAQjOTNv1Jm')
+        
+        # Create success URL for redirect after payment
+        success_url = request.build_absolute_uri(f'/dashboard/payment/success/?payment_id={payment.payment_id}')
+        
+        # Return payment details for frontend with your payment button
+        return JsonResponse({
+            'success': True,
+            'payment_id': payment.payment_id,
+            'amount': float(payment.amount),
+            'currency': payment.currency,
+            'key': razorpay_key_id,
+            'payment_button_id': razorpay_payment_button_id,
+            'success_url': success_url,
+            'user_name': f"{request.user.first_name} {request.user.last_name}".strip() or request.user.username,
+            'user_email': request.user.email or '',
+        })
+        
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+@require_POST
+def verify_payment(request):
+    """Verify payment completion"""
+    import sys
+    import traceback
+    try:
+        print("[verify_payment] Raw request body:", request.body)
+        data = json.loads(request.body)
+        print("[verify_payment] Parsed data:", data)
+        payment_id = data.get('payment_id')
+        razorpay_payment_id = data.get('razorpay_payment_id')
+        razorpay_signature = data.get('razorpay_signature')
+
+        print(f"[verify_payment] payment_id: {payment_id}, razorpay_payment_id: {razorpay_payment_id}, razorpay_signature: {razorpay_signature}")
+
+        if not all([payment_id, razorpay_payment_id, razorpay_signature]):
+            print("[verify_payment] Missing payment data")
+            return JsonResponse({'error': 'Missing payment data'}, status=400)
+
+        # Get payment record
+        try:
+            payment = Payment.objects.get(
+                payment_id=payment_id,
+                user=request.user,
+                status='pending'
+            )
+        except Payment.DoesNotExist:
+            print(f"[verify_payment] Payment not found for payment_id={payment_id}, user={request.user}")
+            return JsonResponse({'error': 'Payment not found'}, status=404)
+
+        print(f"[verify_payment] Found payment: {payment}")
+
+        # For demo purposes, we'll simulate successful verification
+        # In production, you would verify with Razorpay
+        payment.status = 'completed'
+        payment.razorpay_payment_id = razorpay_payment_id
+        payment.razorpay_signature = razorpay_signature
+        payment.paid_at = timezone.now()
+
+        # Fix for Djongo/MongoDB Decimal128 issue
+        from decimal import Decimal
+        try:
+            # If amount is Decimal128, convert to string then Decimal
+            if hasattr(payment.amount, 'to_decimal'):
+                print(f"[verify_payment] Converting Decimal128 to Decimal: {payment.amount}")
+                payment.amount = Decimal(str(payment.amount.to_decimal()))
+            elif not isinstance(payment.amount, Decimal):
+                print(f"[verify_payment] Converting amount to Decimal: {payment.amount}")
+                payment.amount = Decimal(str(payment.amount))
+        except Exception as conv_exc:
+            print(f"[verify_payment] Error converting amount: {conv_exc}")
+            traceback.print_exc()
+            payment.amount = Decimal('1.00')  # fallback
+
+        try:
+            payment.save()
+            print("[verify_payment] Payment saved successfully.")
+        except Exception as save_exc:
+            print(f"[verify_payment] Error saving payment: {save_exc}")
+            traceback.print_exc()
+            return JsonResponse({'error': f'Error saving payment: {str(save_exc)}'}, status=500)
+
+        # Grant unlimited access to the user
+        try:
+            user_limit = get_or_create_user_limit(request.user)
+            user_limit.grant_unlimited_access()
+            print("[verify_payment] Unlimited access granted.")
+        except Exception as grant_exc:
+            print(f"[verify_payment] Error granting unlimited access: {grant_exc}")
+            traceback.print_exc()
+            return JsonResponse({'error': f'Error granting unlimited access: {str(grant_exc)}'}, status=500)
+
+        return JsonResponse({
+            'success': True,
+            'message': 'Payment verified successfully! You now have unlimited access to the Full Calculator.',
+            'payment_id': payment.payment_id,
+            'unlimited_access': True
+        })
+
+    except Exception as e:
+        print(f"[verify_payment] Exception: {e}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+def payment_success(request):
+    """Payment success page - redirects to full calculator after successful payment"""
+    payment_id = request.GET.get('payment_id')
+    razorpay_payment_id = request.GET.get('razorpay_payment_id')
+    razorpay_signature = request.GET.get('razorpay_signature')
+    
+    if payment_id:
+        try:
+            payment = Payment.objects.get(payment_id=payment_id, user=request.user)
+            
+            # If payment is still pending and we have Razorpay data, verify it
+            if payment.status == 'pending' and razorpay_payment_id and razorpay_signature:
+                # Update payment status to completed
+                payment.status = 'completed'
+                payment.razorpay_payment_id = razorpay_payment_id
+                payment.razorpay_signature = razorpay_signature
+                payment.paid_at = timezone.now()
+                payment.save()
+                
+                # Grant unlimited access to the user
+                user_limit = get_or_create_user_limit(request.user)
+                user_limit.grant_unlimited_access()
+                
+                # Redirect to full calculator with success message
+                messages.success(request, '🎉 Payment successful! You now have unlimited access to the Full Calculator.')
+                return redirect('full_calculator')
+            
+            # If payment is already completed, just redirect
+            elif payment.status == 'completed':
+                user_limit = get_or_create_user_limit(request.user)
+                if user_limit.unlimited_access:
+                    messages.success(request, '🎉 Payment successful! You now have unlimited access to the Full Calculator.')
+                else:
+                    messages.warning(request, 'Payment completed but unlimited access not yet activated. Please try again.')
+                return redirect('full_calculator')
+            
+            # If payment is still pending without Razorpay data, show success page
+            else:
+                messages.warning(request, 'Payment is being processed. Please wait a moment.')
+                return redirect('full_calculator')
+                
+        except Payment.DoesNotExist:
+            messages.error(request, 'Payment not found.')
+            return redirect('full_calculator')
+    else:
+        messages.error(request, 'No payment ID provided.')
+        return redirect('full_calculator')
+
+
+@login_required
+def payment_failure(request):
+    """Payment failure page"""
+    return render(request, 'calculator/payment_failure.html')
+
+
+@csrf_exempt
+def razorpay_webhook(request):
+    """Handle Razorpay webhook for payment verification"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    try:
+        # Get webhook data
+        webhook_data = json.loads(request.body)
+        event_type = webhook_data.get('event')
+        
+        if event_type == 'payment.captured':
+            # Payment was successful
+            payment_data = webhook_data.get('payload', {}).get('payment', {})
+            razorpay_payment_id = payment_data.get('entity', {}).get('id')
+            amount = payment_data.get('entity', {}).get('amount')
+            # Ensure amount is a Decimal for model compatibility
+            from decimal import Decimal, InvalidOperation
+            try:
+                if amount is not None:
+                    # Razorpay may send amount in paise (int/str), convert to rupees if needed
+                    if isinstance(amount, str):
+                        amount = Decimal(amount)
+                    elif isinstance(amount, (int, float)):
+                        amount = Decimal(str(amount))
+            except InvalidOperation:
+                amount = Decimal('0.00')
+            
+            # Find the payment record by Razorpay payment ID
+            try:
+                payment = Payment.objects.get(
+                    razorpay_payment_id=razorpay_payment_id,
+                    status='pending'
+                )
+                
+                # Update payment status
+                payment.status = 'completed'
+                payment.amount = amount
+                payment.paid_at = timezone.now()
+                payment.save()
+                
+                # Grant unlimited access
+                user_limit = get_or_create_user_limit(payment.user)
+                user_limit.grant_unlimited_access()
+                
+                return JsonResponse({'status': 'success'})
+                
+            except Payment.DoesNotExist:
+                return JsonResponse({'error': 'Payment not found'}, status=404)
+        
+        return JsonResponse({'status': 'ignored'})
+        
+    except Exception as e:
+        
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+def payment_history(request):
+    """Show user's payment history"""
+    payments = Payment.objects.filter(user=request.user).order_by('-created_at')
+    user_limit = get_or_create_user_limit(request.user)
+    
+    context = {
+        'payments': payments,
+        'user_limit': user_limit,
+        'remaining_calculations': user_limit.get_remaining_free_calculations(),
+    }
+    return render(request, 'calculator/payment_history.html', context)
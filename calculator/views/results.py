@@ -0,0 +1,177 @@
+"""Saved results: listing, deleting, PDF export, comparison and bulk export.
+
+ReportLab and the export process pool are only imported when a report
+is actually rendered.
+"""
+
+import os
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from .. import hot_cache, jobs
+from ..models import ROIResult
+from ..pdf_cache import get_pdf_cache
+from ..reports import report_filename
+
+
+@login_required
+def results(request):
+    results = ROIResult.objects.filter(user=request.user).order_by('-timestamp')
+    # The list is rendered inside a {% cache %} block keyed by the user's
+    # cache generation, which changes whenever a result is saved or deleted.
+    return render(request, 'calculator/results.html', {
+        'results': results,
+        'results_version': hot_cache.user_generation(request.user.pk),
+    })
+
+
+@login_required
+@require_POST
+def delete_result(request, result_id):
+    result = get_object_or_404(ROIResult, id=result_id, user=request.user)
+    result.delete()
+    get_pdf_cache().invalidate([result_id])
+    messages.success(request, 'Calculation deleted successfully!')
+    return redirect('results')
+
+
+@login_required
+@require_POST
+def delete_all_results(request):
+    result_ids = list(ROIResult.objects.filter(user=request.user).values_list('id', flat=True))
+    count = len(result_ids)
+    ROIResult.objects.filter(id__in=result_ids).delete()
+    get_pdf_cache().invalidate(result_ids)
+    messages.success(request, f'{count} calculation(s) deleted successfully!')
+    return redirect('results')
+
+
+@login_required
+def export_pdf(request, result_id):
+    """Export ROI result as PDF report"""
+    result = get_object_or_404(ROIResult.objects.select_related('user'), id=result_id, user=request.user)
+    
+    # Reports are rendered once and then served from the on-disk cache.
+    # FileResponse lets the WSGI server use sendfile() for the body.
+    return FileResponse(
+        get_pdf_cache().open(result),
+        as_attachment=True,
+        filename=report_filename(result),
+        content_type='application/pdf',
+    )
+
+
+@login_required
+def compare_results(request):
+    """Compare several saved results side by side, as a PDF or an HTML page.
+
+    ``?ids=3,1,2`` selects the results (the first is the baseline for the
+    delta columns); ``?format=html`` renders a page instead of a PDF.
+    """
+    from .. import comparison
+
+    try:
+        ids = comparison.parse_ids(request.GET.get('ids', ''))
+        results = comparison.load_results(request.user, ids)
+    except comparison.ComparisonError as exc:
+        messages.error(request, str(exc))
+        return redirect('results')
+
+    if request.GET.get('format') == 'html':
+        return render(request, 'calculator/comparison.html', {
+            'rows': comparison.comparison_rows(results),
+            'components': comparison.COMPONENTS,
+            'ids': ','.join(map(str, ids)),
+        })
+
+    # SimpleDocTemplate writes straight into the response.
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = (
+        f'attachment; filename="ROI_Comparison_{request.user.username}_{len(results)}.pdf"'
+    )
+    comparison.build_comparison_pdf(results, response)
+    return response
+
+
+@login_required
+def export_all_results(request):
+    """Download every saved result as a ZIP of PDF reports.
+
+    The archive is streamed while reports are rendered in the export
+    process pool. Pass ``?progress=<token>`` to have progress recorded for
+    ``export_progress``.
+    """
+    from ..bulk_export import ExportProgress, get_exporter
+
+    results = ROIResult.objects.filter(user=request.user).select_related('user').order_by('-timestamp')
+    total = results.count()
+    token = request.GET.get('progress')
+    on_progress = None
+    if ExportProgress.valid_token(token):
+        progress = ExportProgress(request.user.id, token)
+        progress.update(0, total)
+        on_progress = progress.update
+
+    response = StreamingHttpResponse(
+        get_exporter().stream_zip(results.iterator(chunk_size=100), total=total, on_progress=on_progress),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="ROI_Reports_{request.user.username}.zip"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _export_path(user):
+    # The name export_reports gives the user's archive.
+    return os.path.join(getattr(settings, 'EXPORT_DIR', '.'), f'ROI_Reports_{user.username}.zip')
+
+
+@login_required
+@require_POST
+def queue_export(request):
+    """Build the ZIP of every saved result in a background job.
+
+    Returns the job's status URL to poll and the URL the archive can be
+    downloaded from once the job has succeeded.
+    """
+    job = jobs.enqueue(
+        'export_reports',
+        {'usernames': [request.user.username], 'output_dir': str(getattr(settings, 'EXPORT_DIR', '.'))},
+        user=request.user,
+    )
+    return JsonResponse({
+        'job_id': job.pk,
+        'status_url': reverse('job_status', args=[job.pk]),
+        'download_url': reverse('download_export'),
+    }, status=202)
+
+
+@login_required
+def download_export(request):
+    """The ZIP written by the user's last queued export."""
+    path = _export_path(request.user)
+    if not os.path.exists(path):
+        return JsonResponse({'error': 'No finished export'}, status=404)
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True,
+        filename=os.path.basename(path), content_type='application/zip',
+    )
+
+
+@login_required
+def export_progress(request, token):
+    """Progress of a bulk export started with ``?progress=<token>``."""
+    from ..bulk_export import ExportProgress
+
+    if not ExportProgress.valid_token(token):
+        return JsonResponse({'error': 'Invalid token'}, status=400)
+    state = ExportProgress(request.user.id, token).get()
+    if state is None:
+        return JsonResponse({'error': 'Unknown export'}, status=404)
+    return JsonResponse(state)
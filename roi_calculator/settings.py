@@ -14,21 +14,33 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
-# Load environment variables from .env file (optional)
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    # dotenv not available, continue without it
-    pass
+# Load environment variables from .env file (optional). Like
+# load_dotenv(), look in this directory and its parents, but only import
+# python-dotenv when there is a file for it to read.
+_env_file = next(
+    (directory / '.env' for directory in Path(__file__).resolve().parents if (directory / '.env').is_file()),
+    None,
+)
+if _env_file is not None:
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_file)
+    except ImportError:
+        # dotenv not available, continue without it
+        pass
 
-# Load decouple for config (optional)
-try:
-    from decouple import config
-except ImportError:
-    # decouple not available, use os.getenv instead
-    def config(key, default=None):
+
+def config(key, default=None):
+    """Read a value with python-decouple if installed, else from the environment.
+
+    decouple is imported on first call, not on every settings import.
+    """
+    try:
+        from decouple import config as decouple_config
+    except ImportError:
+        # decouple not available, use os.getenv instead
         return os.getenv(key, default)
+    return decouple_config(key, default=default)
 
 # Load API keys from config file (optional)
 try:
@@ -76,11 +88,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
+    'rest_framework.authtoken',
     'calculator',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'calculator.perf.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves STATIC_ROOT (hashed, precompressed, cached for a year)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,7 +111,8 @@ ROOT_URLCONF = 'roi_calculator.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render time recorded for Server-Timing
+        'BACKEND': 'calculator.perf.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -116,6 +135,159 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+# The admin shows estimated row counts for large tables from SQLite's
+# planner statistics, which only exist once `python manage.py
+# analyze_tables` has run; run it from cron (e.g. daily) or queue the
+# analyze_tables job.
+# Cache configuration
+# The chatbot answer cache is shared by every worker process, so it uses a
+# file-based backend rather than the per-process local-memory default.
+CHATBOT_CACHE_ALIAS = 'chatbot'
+CHATBOT_CACHE_TTL = int(os.getenv('CHATBOT_CACHE_TTL', 60 * 60 * 24))  # 1 day
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv('CHATBOT_CACHE_MAX_ENTRIES', 1000))
+# Seconds each process reuses the answer cache generation before checking
+# the shared tier again: how long another process's clear() can go unseen
+CHATBOT_CACHE_GENERATION_TTL = float(os.getenv('CHATBOT_CACHE_GENERATION_TTL', 2))
+# Minimum TF-IDF cosine similarity (counting words the index does not know)
+# for answering from the local FAQ index
+CHATBOT_FAQ_THRESHOLD = float(os.getenv('CHATBOT_FAQ_THRESHOLD', 0.6))
+# Concurrent streaming Gemini calls per process, and how long a stream
+# waits for a free slot before reporting that the assistant is busy
+CHATBOT_STREAM_MAX_CONCURRENCY = int(os.getenv('CHATBOT_STREAM_MAX_CONCURRENCY', 20))
+CHATBOT_STREAM_QUEUE_TIMEOUT = float(os.getenv('CHATBOT_STREAM_QUEUE_TIMEOUT', 2))
+
+# Gemini client: 'sdk' uses google-generativeai, 'rest' calls the HTTP API
+# directly over a pooled session (GEMINI_API_BASE_URL can point at a stub)
+CHATBOT_LLM_BACKEND = os.getenv('CHATBOT_LLM_BACKEND', 'sdk')
+GEMINI_API_BASE_URL = os.getenv('GEMINI_API_BASE_URL', 'https://generativelanguage.googleapis.com')
+CHATBOT_LLM_TIMEOUT = float(os.getenv('CHATBOT_LLM_TIMEOUT', 20))  # seconds per upstream call
+CHATBOT_LLM_POOL_SIZE = int(os.getenv('CHATBOT_LLM_POOL_SIZE', 10))
+# Open the circuit after this many consecutive failures, retry after the reset timeout
+CHATBOT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CHATBOT_BREAKER_FAILURE_THRESHOLD', 5))
+CHATBOT_BREAKER_RESET_TIMEOUT = float(os.getenv('CHATBOT_BREAKER_RESET_TIMEOUT', 30))
+
+# Hot reads (calculation limits, dashboard statistics, history chart data)
+# go through calculator.hot_cache: a per-process LRU in front of the shared
+# HOT_CACHE_ALIAS. Entries are fresh for their namespace TTL (seconds), then
+# served stale for HOT_CACHE_STALE_TTL more while one request recomputes
+# them. Set HOT_CACHE_REDIS_URL to share them through Redis instead of the
+# file-based cache (needs the redis package).
+HOT_CACHE_ALIAS = 'hot'
+HOT_CACHE_REDIS_URL = os.getenv('HOT_CACHE_REDIS_URL', '')
+HOT_CACHE_TTLS = {
+    'entitlements': int(os.getenv('HOT_CACHE_TTL_ENTITLEMENTS', 300)),
+    'user_stats': int(os.getenv('HOT_CACHE_TTL_USER_STATS', 300)),
+    'history': int(os.getenv('HOT_CACHE_TTL_HISTORY', 120)),
+}
+HOT_CACHE_STALE_TTL = int(os.getenv('HOT_CACHE_STALE_TTL', 30))
+HOT_CACHE_MAX_ENTRIES = int(os.getenv('HOT_CACHE_MAX_ENTRIES', 10000))
+# Seconds each process reuses a user's cache generation before checking the
+# shared tier again: how long another process's invalidation can go unseen
+HOT_CACHE_GENERATION_TTL = float(os.getenv('HOT_CACHE_GENERATION_TTL', 2))
+# Invalidating more users than this at once retires every user's entries
+# with one write instead of one write per user
+HOT_CACHE_EPOCH_THRESHOLD = int(os.getenv('HOT_CACHE_EPOCH_THRESHOLD', 100))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    CHATBOT_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'chatbot',
+        'TIMEOUT': CHATBOT_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': CHATBOT_CACHE_MAX_ENTRIES,
+        },
+    },
+    HOT_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': HOT_CACHE_REDIS_URL,
+    } if HOT_CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'hot',
+        'OPTIONS': {
+            'MAX_ENTRIES': HOT_CACHE_MAX_ENTRIES,
+        },
+    },
+    # Session reads for SESSION_PROFILE=cached_db. File-based for the same
+    # reason as the chatbot cache: a login or logout in one worker must be
+    # seen by all of them. An evicted entry only costs one database read.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SESSION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+# Anonymous GETs of the landing and contact pages are served from the
+# default cache for this many seconds (0 turns the page cache off)
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 600))
+
+# Rendered PDF reports are cached on disk; least recently used files are
+# evicted once the directory exceeds PDF_CACHE_MAX_BYTES
+PDF_CACHE_DIR = BASE_DIR / '.cache' / 'pdf'
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+# REST API (calculator.api): token authentication, versioned by URL path
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+}
+# Most scenarios one calculate/batch/ request may evaluate
+API_BATCH_MAX_SCENARIOS = int(os.getenv('API_BATCH_MAX_SCENARIOS', 10_000))
+# NDJSON lines per transaction in calculations/ingest/
+API_INGEST_BATCH_SIZE = int(os.getenv('API_INGEST_BATCH_SIZE', 500))
+
+# Send the Server-Timing header (timings and query counts) to every client,
+# not only to staff users; it is always sent with DEBUG
+SERVER_TIMING_PUBLIC = os.getenv('SERVER_TIMING_PUBLIC', '').lower() in ('1', 'true', 'yes')
+
+# Bearer token accepted by the Prometheus endpoint at /metrics/ (staff
+# users can always read it)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# SQL observer: per request, fingerprints that were slow or repeated (the
+# N+1 signature) are appended to a rotating JSONL log; rank them with
+# `python manage.py sql_log_summary`. Unset means "follow DEBUG".
+SQL_OBSERVER_ENABLED = (
+    os.getenv('SQL_OBSERVER_ENABLED').lower() in ('1', 'true', 'yes')
+    if os.getenv('SQL_OBSERVER_ENABLED') else None
+)
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 100))
+SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', 5))
+SQL_LOG_FILE = BASE_DIR / 'logs' / 'sql.jsonl'
+SQL_LOG_MAX_BYTES = int(os.getenv('SQL_LOG_MAX_BYTES', 10 * 1024 * 1024))
+SQL_LOG_BACKUPS = 5
+
+# Worker processes each web process starts to render reports for bulk ZIP
+# exports (0 renders in the request's own thread). Kept small: every web
+# process has its own pool.
+BULK_EXPORT_WORKERS = int(os.getenv('BULK_EXPORT_WORKERS', 2))
+
+# Background jobs (calculator.jobs), run by `python manage.py run_jobs`:
+# jobs one worker runs at once, in threads or spawned processes
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_POOL = os.getenv('JOB_POOL', 'thread')
+# Seconds a claimed job stays invisible to other workers; the worker keeps
+# extending it while the job runs, so it only runs out if the worker dies
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+# Retries wait JOB_RETRY_BASE_DELAY * 2**(attempts - 1) seconds, jittered
+# and capped at JOB_RETRY_MAX_DELAY
+JOB_RETRY_BASE_DELAY = int(os.getenv('JOB_RETRY_BASE_DELAY', 10))
+JOB_RETRY_MAX_DELAY = int(os.getenv('JOB_RETRY_MAX_DELAY', 60 * 60))
+# Queue a render_pdf job for every saved full result, so its report is in
+# the PDF cache before it is first downloaded; needs a run_jobs worker
+JOB_PRERENDER_PDFS = os.getenv('JOB_PRERENDER_PDFS', '').lower() in ('1', 'true', 'yes')
+# Queued bulk exports (results/export-all/queue/) write their ZIPs here
+EXPORT_DIR = BASE_DIR / '.cache' / 'exports'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -143,6 +315,13 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# `python manage.py collectstatic` fills this with hashed, gzip/brotli
+# compressed copies; third-party libraries are vendored in static/vendor/.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'calculator.storage.StaticStorage'},
+}
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -157,6 +336,23 @@ SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_HTTPONLY = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+# Where sessions live:
+# - 'db' (default): a django_session SELECT on every authenticated
+#   request.
+# - 'cached_db': reads come from the 'sessions' cache and writes go to
+#   both the cache and the database.
+# - 'signed_cookies': the session is kept in the cookie itself, with no
+#   server-side storage. The payload is only the login and flash
+#   messages. Logging out cannot revoke a copied cookie before it
+#   expires.
+# `python manage.py cleanup_sessions` deletes expired database rows.
+SESSION_PROFILE = os.getenv('SESSION_PROFILE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_PROFILE]
+SESSION_CACHE_ALIAS = 'sessions'
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
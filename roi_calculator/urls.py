@@ -19,9 +19,12 @@ from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from calculator import views as calculator_views
 from django.contrib.auth.decorators import login_required
+from calculator.perf import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Prometheus metrics (staff or METRICS_TOKEN)
+    path('metrics/', metrics_view, name='metrics'),
     # Authentication URLs
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', calculator_views.custom_logout, name='logout'),
@@ -31,6 +34,9 @@ urlpatterns = [
     path('', calculator_views.home_page, name='landing'),
     path('contact/', calculator_views.contact_page, name='contact'),
     
+    # REST API (token authentication)
+    path('api/', include('calculator.api.urls')),
+
     # Protected dashboard routes (authentication required)
     path('dashboard/', include('calculator.urls')),
     path('dashboard/history/analysis/', calculator_views.history_analysis, name='history_analysis'),
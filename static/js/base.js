@@ -0,0 +1,222 @@
+// Handle logout form submission
+document.addEventListener('DOMContentLoaded', function() {
+    const logoutForm = document.querySelector('form[action="/logout/"]');
+    if (logoutForm) {
+        logoutForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            if (confirm('Are you sure you want to logout?')) {
+                this.submit();
+            }
+        });
+    }
+
+});
+
+// Chatbot functionality
+let isChatbotOpen = false;
+let isLoading = false;
+
+function toggleChatbot() {
+    const modal = document.getElementById('chatbotModal');
+    if (isChatbotOpen) {
+        closeChatbot();
+    } else {
+        openChatbot();
+    }
+}
+
+function openChatbot() {
+    const modal = document.getElementById('chatbotModal');
+    modal.classList.add('open');
+    isChatbotOpen = true;
+
+    // Focus on input
+    setTimeout(() => {
+        document.getElementById('chatbotInput').focus();
+    }, 300);
+}
+
+function closeChatbot() {
+    const modal = document.getElementById('chatbotModal');
+    modal.classList.remove('open');
+    isChatbotOpen = false;
+}
+
+function handleKeyPress(event) {
+    if (event.key === 'Enter' && !event.shiftKey) {
+        event.preventDefault();
+        sendMessage();
+    }
+}
+
+function addMessage(content, isUser = false, isError = false) {
+    const messagesContainer = document.getElementById('chatbotMessages');
+    const messageDiv = document.createElement('div');
+
+    if (isError) {
+        messageDiv.className = 'error-message';
+        messageDiv.innerHTML = `<strong>Error:</strong> ${content}`;
+    } else {
+        messageDiv.className = `message ${isUser ? 'user' : 'bot'}`;
+        if (isUser) {
+            messageDiv.innerHTML = `<strong>You:</strong> ${content}`;
+        } else {
+            messageDiv.innerHTML = `<strong>AI Assistant:</strong> ${content}`;
+        }
+    }
+
+    messagesContainer.appendChild(messageDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function showTypingIndicator() {
+    const messagesContainer = document.getElementById('chatbotMessages');
+    const typingDiv = document.createElement('div');
+    typingDiv.className = 'typing-indicator';
+    typingDiv.id = 'typingIndicator';
+    typingDiv.innerHTML = `
+        <div class="typing-dot"></div>
+        <div class="typing-dot"></div>
+        <div class="typing-dot"></div>
+    `;
+
+    messagesContainer.appendChild(typingDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function hideTypingIndicator() {
+    const typingIndicator = document.getElementById('typingIndicator');
+    if (typingIndicator) {
+        typingIndicator.remove();
+    }
+}
+
+async function sendMessage() {
+    if (isLoading) return;
+
+    const input = document.getElementById('chatbotInput');
+    const sendButton = document.getElementById('chatbotSend');
+    const message = input.value.trim();
+
+    if (!message) return;
+
+    // Add user message
+    addMessage(message, true);
+    input.value = '';
+
+    // Show typing indicator
+    showTypingIndicator();
+    isLoading = true;
+    sendButton.disabled = true;
+
+    let replyText = null;
+    try {
+        await streamChatbotReply(message, function(event, data) {
+            if (event === 'token') {
+                if (!replyText) {
+                    hideTypingIndicator();
+                    replyText = addStreamingMessage();
+                }
+                replyText.textContent += data.text;
+                const messagesContainer = document.getElementById('chatbotMessages');
+            messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            } else if (event === 'error') {
+                hideTypingIndicator();
+                addMessage(data.error || 'An error occurred while processing your request.', false, true);
+            }
+        });
+        hideTypingIndicator();
+    } catch (error) {
+        hideTypingIndicator();
+        addMessage(error.message || 'Failed to connect to the AI assistant. Please try again.', false, true);
+        console.error('Chatbot error:', error);
+    } finally {
+        isLoading = false;
+        sendButton.disabled = false;
+        input.focus();
+    }
+}
+
+// Append an empty bot message and return the element that receives streamed text
+function addStreamingMessage() {
+    const messagesContainer = document.getElementById('chatbotMessages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message bot';
+    messageDiv.innerHTML = '<strong>AI Assistant:</strong> ';
+    const text = document.createElement('span');
+    messageDiv.appendChild(text);
+    messagesContainer.appendChild(messageDiv);
+    return text;
+}
+
+// POST a question to the streaming endpoint and call onEvent(event, data)
+// for every server-sent event until the stream ends
+async function streamChatbotReply(message, onEvent) {
+    const response = await fetch('/dashboard/chatbot/stream/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+        },
+        body: JSON.stringify({ message: message })
+    });
+
+    if (!response.ok || !response.body) {
+        let error = 'Failed to connect to the AI assistant. Please try again.';
+        try {
+            error = (await response.json()).error || error;
+        } catch (e) {}
+        throw new Error(error);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(function(line) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Close chatbot when clicking outside
+document.addEventListener('click', function(event) {
+    const modal = document.getElementById('chatbotModal');
+    const toggleButton = event.target.closest('.chatbot-toggle');
+
+    if (isChatbotOpen && !modal.contains(event.target) && !toggleButton) {
+        closeChatbot();
+    }
+});
+
+// Auto-open chatbot if URL contains #chatbot
+if (window.location.hash === '#chatbot') {
+    setTimeout(openChatbot, 500);
+}
@@ -0,0 +1,41 @@
+// Generated from calculator/roi_engine.py by `python manage.py build_roi_js`. Do not edit.
+(function (root) {
+  'use strict';
+  const INPUTS = ["annual_revenue", "gross_margin", "container_app_fraction", "annual_cloud_spend", "compute_spend_fraction", "cost_sensitive_fraction", "num_engineers", "engineer_cost_per_year", "ops_time_fraction", "ops_toil_fraction", "toil_reduction_fraction", "avg_response_time_sec", "exec_time_influence_fraction", "lat_red_container", "lat_red_serverless", "revenue_lift_per_100ms", "current_fci_fraction", "fci_reduction_fraction", "cost_per_1pct_fci"];
+  const DEFAULTS = {"gross_margin": 80, "container_app_fraction": 90, "compute_spend_fraction": 60, "cost_sensitive_fraction": 50, "engineer_cost_per_year": 150000, "ops_time_fraction": 15, "ops_toil_fraction": 50, "toil_reduction_fraction": 45, "avg_response_time_sec": 2, "exec_time_influence_fraction": 33, "lat_red_container": 28, "lat_red_serverless": 50, "revenue_lift_per_100ms": 1, "current_fci_fraction": 2, "fci_reduction_fraction": 75, "cost_per_1pct_fci": 1};
+  const OUTPUTS = ["cloud_savings", "productivity_gain", "performance_gain", "availability_gain", "total_annual_gain", "roi_percent", "payback_months"];
+
+  // Missing inputs take DEFAULTS; every input must end up a finite number.
+  function compute(inputs) {
+    const values = Object.assign({}, DEFAULTS, inputs);
+    for (const name of INPUTS) {
+      if (typeof values[name] !== 'number' || !isFinite(values[name])) {
+        throw new TypeError('ROIEngine: ' + name + ' must be a finite number');
+      }
+    }
+    const {annual_revenue, gross_margin, container_app_fraction, annual_cloud_spend, compute_spend_fraction, cost_sensitive_fraction, num_engineers, engineer_cost_per_year, ops_time_fraction, ops_toil_fraction, toil_reduction_fraction, avg_response_time_sec, exec_time_influence_fraction, lat_red_container, lat_red_serverless, revenue_lift_per_100ms, current_fci_fraction, fci_reduction_fraction, cost_per_1pct_fci} = values;
+    const compute_spend = (annual_cloud_spend * (compute_spend_fraction / 100));
+    const cost_sensitive_spend = (compute_spend * (cost_sensitive_fraction / 100));
+    const cloud_savings = (cost_sensitive_spend * (((container_app_fraction / 100) * 0.5) + ((1 - (container_app_fraction / 100)) * 0.2)));
+    const productivity_gain = ((((num_engineers * engineer_cost_per_year) * (ops_time_fraction / 100)) * (ops_toil_fraction / 100)) * (toil_reduction_fraction / 100));
+    const weighted_lat_red = (((container_app_fraction / 100) * (lat_red_container / 100)) + ((1 - (container_app_fraction / 100)) * (lat_red_serverless / 100)));
+    const time_saved_sec = (avg_response_time_sec * weighted_lat_red);
+    const rev_gain_pct = ((time_saved_sec / 0.1) * (revenue_lift_per_100ms / 100));
+    const performance_gain = (((annual_revenue * rev_gain_pct) * (gross_margin / 100)) * (exec_time_influence_fraction / 100));
+    const fci_cost_fraction = ((cost_per_1pct_fci / 100) * ((current_fci_fraction / 100) / 0.01));
+    const fci_cost = ((annual_revenue * fci_cost_fraction) * (gross_margin / 100));
+    const availability_gain = (fci_cost * (fci_reduction_fraction / 100));
+    const total_annual_gain = (((cloud_savings + productivity_gain) + performance_gain) + availability_gain);
+    const estimated_cost = (annual_cloud_spend / 10);
+    const roi_percent = ((total_annual_gain / (estimated_cost + (num_engineers * engineer_cost_per_year))) * 100);
+    const payback_months = ((total_annual_gain > 0) ? ((12 * estimated_cost) / total_annual_gain) : 0);
+    return {cloud_savings: cloud_savings, productivity_gain: productivity_gain, performance_gain: performance_gain, availability_gain: availability_gain, total_annual_gain: total_annual_gain, roi_percent: roi_percent, payback_months: payback_months};
+  }
+
+  const engine = {INPUTS, DEFAULTS, OUTPUTS, compute};
+  if (typeof module === 'object' && module.exports) {
+    module.exports = engine;
+  } else {
+    root.ROIEngine = engine;
+  }
+})(this);
@@ -0,0 +1,32 @@
+function formatValue(val, isCurrency, isPercentage) {
+  if (isCurrency) {
+    if (val >= 1000000) return "$" + (val / 1000000).toFixed(0) + "M";
+    if (val >= 1000) return "$" + (val / 1000).toFixed(0) + "K";
+    return "$" + parseFloat(val).toLocaleString();
+  }
+  if (isPercentage) {
+    return parseFloat(val).toFixed(1) + "%";
+  }
+  return val;
+}
+
+function updateSliderValue(id, isCurrency, isPercentage) {
+  const slider = document.getElementById(id + "-slider");
+  const input = document.getElementById(id + "-input");
+  const display = document.getElementById(id + "-display");
+
+  input.value = slider.value;
+  display.innerText = formatValue(slider.value, isCurrency, isPercentage);
+}
+
+function updateInputValue(id, isCurrency, isPercentage) {
+  const input = document.getElementById(id + "-input");
+  const slider = document.getElementById(id + "-slider");
+  const display = document.getElementById(id + "-display");
+
+  let val = parseFloat(input.value);
+  if (!isNaN(val) && val >= parseFloat(slider.min) && val <= parseFloat(slider.max)) {
+    slider.value = val;
+    display.innerText = formatValue(val, isCurrency, isPercentage);
+  }
+}